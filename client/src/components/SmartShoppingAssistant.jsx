@@ -192,7 +192,8 @@ const SmartShoppingAssistant = ({
     // Fetch available products from Django
     const fetchAvailableProducts = async () => {
         try {
-            const response = await fetch('http://localhost:8000/api/products/');
+            // Only the columns the assistant reads (sparse fieldset)
+            const response = await fetch('http://localhost:8000/api/products/?fields=id,name,category,selling_price,stock,in_stock');
             if (response.ok) {
                 const products = await response.json();
                 console.log('Fetched products:', products); // Debug log
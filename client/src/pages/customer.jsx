@@ -1424,7 +1424,7 @@ const showWishlistView = () => {
     fetchWishlistItems();
 };
 
-/** Check wishlist status when products are loaded */
+/** Check wishlist status when products are loaded (not on every pushed stock change) */
 useEffect(() => {
     if (products.length > 0) {
         const userId = localStorage.getItem('userId');
@@ -1432,7 +1432,39 @@ useEffect(() => {
             fetchWishlistItems();
         }
     }
-}, [products]);
+}, [products.length]);
+
+/** Live stock and price updates pushed by the server (Server-Sent Events) instead of refetching */
+useEffect(() => {
+    if (!showProducts || typeof EventSource === 'undefined') return undefined;
+
+    const query = selectedCategory && selectedCategory !== "All"
+        ? `?category=${encodeURIComponent(selectedCategory)}`
+        : '';
+    const source = new EventSource(`${buildApiUrl('django', API_CONFIG.endpoints.django.stockEvents)}${query}`);
+
+    const applyStock = (event) => {
+        const update = JSON.parse(event.data);
+        const merge = (list) => list.map(product => product.id === update.id
+            ? { ...product, price: update.price, stock: update.stock, in_stock: update.in_stock }
+            : product);
+        setProducts(merge);
+        setFilteredProducts(merge);
+    };
+    const removeProduct = (event) => {
+        const { id } = JSON.parse(event.data);
+        setProducts(list => list.filter(product => product.id !== id));
+        setFilteredProducts(list => list.filter(product => product.id !== id));
+    };
+
+    source.addEventListener('stock', applyStock);
+    source.addEventListener('deleted', removeProduct);
+    // Fell too far behind - reload the list once
+    source.addEventListener('resync', () => fetchProducts(selectedCategory));
+
+    return () => source.close();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+}, [showProducts, selectedCategory]);
 
 // =============================================================================
 // NOTIFICATION HELPER
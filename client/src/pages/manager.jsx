@@ -1122,7 +1122,7 @@ class Trie {
             console.log('📋 Bills data:', billsData);
 
             // Fetch products data from Django for profit calculations
-            const productsResponse = await fetch(`${API_CONFIG.DJANGO_SERVER}/api/products/`);
+            const productsResponse = await fetch(`${API_CONFIG.DJANGO_SERVER}/api/products/?fields=id,name,category,selling_price,cost_price`);
             if (!productsResponse.ok) {
                 throw new Error(`Failed to fetch products: ${productsResponse.status}`);
             }
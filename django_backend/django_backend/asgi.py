@@ -2,6 +2,7 @@
 ASGI config for django_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server, e.g. ``uvicorn django_backend.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +13,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_backend.settings")
+# Catalog reads are served by native async views under ASGI (ASYNC_CATALOG_VIEWS=False opts out)
+os.environ.setdefault("ASYNC_CATALOG_VIEWS", "True")
 
 application = get_asgi_application()
@@ -14,6 +14,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -87,6 +88,25 @@ DATABASES = {
 }
 
 
+# Caches
+# The catalog cache is a bounded in-process LRU with hit/miss metrics; entries are keyed
+# by CatalogVersion counters, so stale responses are never served after a product write
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": "inventory.cache_backend.MeteredLRUCache",
+        "LOCATION": "storezen-catalog",
+        "TIMEOUT": int(os.getenv('CATALOG_CACHE_TIMEOUT_SECONDS', '300')),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', '1000')),
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,6 +156,12 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Let browsers send the Idempotency-Key header on mutating requests
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
+# Let browser clients read the validators used for conditional GETs
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
+
 # Allow all origins during development (remove in production)
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -143,4 +169,83 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
-TWILIO_WHATSAPP_FROM = os.getenv('TWILIO_WHATSAPP_FROM')
\ No newline at end of file
+TWILIO_WHATSAPP_FROM = os.getenv('TWILIO_WHATSAPP_FROM')
+# Twilio account status on the dashboard: fresh for CACHE seconds, then served stale for up to STALE more while it refreshes
+TWILIO_STATUS_CACHE_SECONDS = int(os.getenv('TWILIO_STATUS_CACHE_SECONDS', '60'))
+TWILIO_STATUS_STALE_SECONDS = int(os.getenv('TWILIO_STATUS_STALE_SECONDS', '600'))
+# Where WhatsApp alerts go: 'twilio', 'fake' (in memory, for load tests) or 'file' (JSON lines to the sink path, or the log)
+WHATSAPP_TRANSPORT = os.getenv('WHATSAPP_TRANSPORT', 'twilio')
+WHATSAPP_FAKE_LATENCY_SECONDS = float(os.getenv('WHATSAPP_FAKE_LATENCY_SECONDS', '0'))
+WHATSAPP_FAKE_FAILURE_RATE = float(os.getenv('WHATSAPP_FAKE_FAILURE_RATE', '0'))
+WHATSAPP_FILE_SINK_PATH = os.getenv('WHATSAPP_FILE_SINK_PATH', '')  # Empty logs each message instead
+
+# Node.js server (manager profile)
+NODE_SERVER_URL = os.getenv('NODE_SERVER_URL', 'http://localhost:8080')
+# Manager profile cache: fresh for CACHE seconds, then served stale for up to STALE more while it refreshes in the background
+MANAGER_PROFILE_CACHE_SECONDS = int(os.getenv('MANAGER_PROFILE_CACHE_SECONDS', '30'))
+MANAGER_PROFILE_STALE_SECONDS = int(os.getenv('MANAGER_PROFILE_STALE_SECONDS', '300'))
+
+# Outbound calls (inventory/outbound.py) - per dependency: connect/read timeouts and a bulkhead of
+# max_concurrent calls in flight (also the connection pool size)
+OUTBOUND_DEPENDENCIES = {
+    'node': {
+        'connect_timeout': float(os.getenv('NODE_CONNECT_TIMEOUT_SECONDS', '1')),
+        'read_timeout': float(os.getenv('NODE_READ_TIMEOUT_SECONDS', '3')),
+        'max_concurrent': int(os.getenv('NODE_MAX_CONCURRENT', '8')),
+    },
+    'twilio': {
+        'connect_timeout': float(os.getenv('TWILIO_CONNECT_TIMEOUT_SECONDS', '3')),
+        'read_timeout': float(os.getenv('TWILIO_READ_TIMEOUT_SECONDS', '10')),
+        'max_concurrent': int(os.getenv('TWILIO_MAX_CONCURRENT', '16')),
+    },
+    'razorpay': {
+        'connect_timeout': float(os.getenv('RAZORPAY_CONNECT_TIMEOUT_SECONDS', '3')),
+        'read_timeout': float(os.getenv('RAZORPAY_READ_TIMEOUT_SECONDS', '15')),
+        'max_concurrent': int(os.getenv('RAZORPAY_MAX_CONCURRENT', '8')),
+    },
+}
+# How long a call waits for a free bulkhead slot before failing fast
+OUTBOUND_BULKHEAD_WAIT_SECONDS = float(os.getenv('OUTBOUND_BULKHEAD_WAIT_SECONDS', '0.5'))
+# Consecutive failures (errors, timeouts, 5xx/429) that open a dependency's circuit, and how long it stays open
+OUTBOUND_BREAKER_FAILURES = int(os.getenv('OUTBOUND_BREAKER_FAILURES', '5'))
+OUTBOUND_BREAKER_RESET_SECONDS = float(os.getenv('OUTBOUND_BREAKER_RESET_SECONDS', '30'))
+
+# How long a checkout holds stock between payment order creation and verification
+STOCK_RESERVATION_TTL_SECONDS = int(os.getenv('STOCK_RESERVATION_TTL_SECONDS', '900'))
+
+# How long a completed request is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_KEY_TTL_SECONDS', '86400'))
+# How long an unfinished request blocks its key before a retry may take over
+IDEMPOTENCY_LOCK_TIMEOUT_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT_SECONDS', '60'))
+
+# Memory budget of the typo-tolerant search layer (word trigram entries per process)
+SEARCH_FUZZY_MAX_TRIGRAMS = int(os.getenv('SEARCH_FUZZY_MAX_TRIGRAMS', '500000'))
+
+# How long delete tombstones are kept for delta sync (/api/products/changes/); older tokens must resync
+PRODUCT_TOMBSTONE_RETENTION_DAYS = int(os.getenv('PRODUCT_TOMBSTONE_RETENTION_DAYS', '30'))
+# Product changes are served by delta sync this long after they are stamped - must exceed the longest
+# write transaction plus the clock skew between app servers, or a late commit can be skipped
+DELTA_SYNC_SETTLE_SECONDS = float(os.getenv('DELTA_SYNC_SETTLE_SECONDS', '5'))
+
+# Stock push (/api/events/stock/, ASGI only)
+# Undelivered product states held per connection before a slow client is told to resync
+STOCK_EVENTS_MAX_PENDING = int(os.getenv('STOCK_EVENTS_MAX_PENDING', '500'))
+STOCK_EVENTS_HEARTBEAT_SECONDS = int(os.getenv('STOCK_EVENTS_HEARTBEAT_SECONDS', '15'))
+# Streams are closed after this long and EventSource reconnects
+STOCK_EVENTS_MAX_CONNECTION_SECONDS = int(os.getenv('STOCK_EVENTS_MAX_CONNECTION_SECONDS', '300'))
+# Stock level at or below which a low_stock event is pushed
+LOW_STOCK_EVENT_THRESHOLD = int(os.getenv('LOW_STOCK_EVENT_THRESHOLD', '10'))
+
+# Alert outbox worker (manage.py run_alert_worker)
+# Attempts before a message is dead-lettered; retries back off exponentially from the base delay up to the cap
+ALERT_OUTBOX_MAX_ATTEMPTS = int(os.getenv('ALERT_OUTBOX_MAX_ATTEMPTS', '6'))
+ALERT_OUTBOX_BACKOFF_SECONDS = float(os.getenv('ALERT_OUTBOX_BACKOFF_SECONDS', '5'))
+ALERT_OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv('ALERT_OUTBOX_BACKOFF_MAX_SECONDS', '900'))
+# A row claimed by a worker that died is retried after this long
+ALERT_OUTBOX_LEASE_SECONDS = int(os.getenv('ALERT_OUTBOX_LEASE_SECONDS', '120'))
+ALERT_OUTBOX_WORKER_THREADS = int(os.getenv('ALERT_OUTBOX_WORKER_THREADS', '4'))
+# Low stock alerts raised within this many seconds of a manager's first pending alert go out as one digest message
+ALERT_DIGEST_WINDOW_SECONDS = int(os.getenv('ALERT_DIGEST_WINDOW_SECONDS', '60'))
+
+# Route catalog reads to the native async views (inventory/async_views.py) - asgi.py turns this on
+ASYNC_CATALOG_VIEWS = os.getenv('ASYNC_CATALOG_VIEWS', 'False').lower() == 'true'
@@ -0,0 +1,286 @@
+import random
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, F
+from django.utils import timezone
+from twilio.base.exceptions import TwilioRestException
+from .models import AlertOutbox
+from .whatsapp_service import WhatsAppService, format_low_stock_digest
+from .stock_alerts import sync_alert_settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_ERROR_LENGTH = 1000
+
+
+class PermanentDeliveryError(Exception):
+    """
+    Delivery can never succeed (e.g. an invalid number) - dead-letter without retrying
+    """
+
+
+def enqueue_low_stock_check():
+    """
+    Queue a low stock scan for the worker - coalesced, so a burst of requests queues one
+    A scan already running does not absorb new requests (it may have read stock before them)
+    """
+    if not AlertOutbox.objects.filter(kind=AlertOutbox.LOW_STOCK_CHECK, status=AlertOutbox.PENDING).exists():
+        AlertOutbox.objects.create(kind=AlertOutbox.LOW_STOCK_CHECK)
+
+
+def backoff_delay(attempts):
+    """
+    Seconds before retry number attempts: exponential from the base delay, capped, with jitter
+    so messages that failed together don't all retry in the same instant
+    """
+    delay = min(settings.ALERT_OUTBOX_BACKOFF_MAX_SECONDS, settings.ALERT_OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_due(limit=None, **filters):
+    """
+    Lease up to limit due rows (oldest first, optionally filtered) to the caller and return them
+    Rows left in SENDING by a worker that died become due again when their lease runs out
+    """
+    now = timezone.now()
+    due = {'status__in': [AlertOutbox.PENDING, AlertOutbox.SENDING], 'available_at__lte': now}
+    ids = list(
+        AlertOutbox.objects.filter(**due, **filters).order_by('available_at').values_list('id', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+
+    # Conditional UPDATE - a row another worker claimed in between is no longer due and is skipped
+    claim = uuid.uuid4().hex
+    AlertOutbox.objects.filter(id__in=ids, **due).update(
+        status=AlertOutbox.SENDING,
+        claim=claim,
+        attempts=F('attempts') + 1,
+        available_at=now + timedelta(seconds=settings.ALERT_OUTBOX_LEASE_SECONDS)
+    )
+    return list(AlertOutbox.objects.filter(claim=claim).order_by('available_at', 'id'))
+
+
+def mark_sent(rows, sent_in=''):
+    """
+    Record rows as delivered - sent_in names the message that carried them (one per digest)
+    """
+    if rows:
+        AlertOutbox.objects.filter(id__in=[row.id for row in rows], status=AlertOutbox.SENDING).update(
+            status=AlertOutbox.SENT, sent_at=timezone.now(), sent_in=sent_in, last_error=''
+        )
+
+
+def mark_failed(rows, error):
+    """
+    Schedule a retry with backoff, or dead-letter rows whose attempts are used up; returns the rows dead-lettered
+    Rows that failed in the same message retry together, so a digest is retried as a digest
+    """
+    permanent = isinstance(error, PermanentDeliveryError)
+    now = timezone.now()
+    retry_at = now + timedelta(seconds=backoff_delay(max(row.attempts for row in rows)))
+    last_error = f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH]
+    dead = []
+    for row in rows:
+        if permanent or row.attempts >= settings.ALERT_OUTBOX_MAX_ATTEMPTS:
+            status, available_at = AlertOutbox.DEAD, now
+            dead.append(row)
+            logger.error(f"Alert outbox #{row.id} dead-lettered after {row.attempts} attempts: {error}")
+        else:
+            status, available_at = AlertOutbox.PENDING, retry_at
+        # Only while our lease holds - past it the row may already belong to another worker
+        AlertOutbox.objects.filter(id=row.id, claim=row.claim, status=AlertOutbox.SENDING).update(
+            status=status, available_at=available_at, last_error=last_error
+        )
+    return dead
+
+
+def release(rows):
+    """
+    Hand leased rows back untried (worker shutting down)
+    """
+    for row in rows:
+        AlertOutbox.objects.filter(id=row.id, claim=row.claim, status=AlertOutbox.SENDING).update(
+            status=AlertOutbox.PENDING, attempts=F('attempts') - 1, available_at=timezone.now()
+        )
+
+
+def retry_dead_letters():
+    """
+    Put every dead-lettered row back in the queue with a fresh set of attempts
+    """
+    return AlertOutbox.objects.filter(status=AlertOutbox.DEAD).update(
+        status=AlertOutbox.PENDING, attempts=0, available_at=timezone.now()
+    )
+
+
+def outbox_stats():
+    """
+    Row counts per status, digest savings (alerts delivered vs messages used) and the latest dead letters
+    """
+    counts = dict.fromkeys([AlertOutbox.PENDING, AlertOutbox.SENDING, AlertOutbox.SENT, AlertOutbox.DEAD], 0)
+    counts.update(AlertOutbox.objects.order_by().values_list('status').annotate(Count('id')))
+    dead_letters = AlertOutbox.objects.filter(status=AlertOutbox.DEAD).order_by('-available_at')[:20]
+    digests = AlertOutbox.objects.filter(kind=AlertOutbox.LOW_STOCK_ALERT, status=AlertOutbox.SENT).aggregate(
+        alerts_sent=Count('id'), messages_sent=Count('sent_in', distinct=True)
+    )
+    digests['messages_saved'] = digests['alerts_sent'] - digests['messages_sent']
+    return {
+        'counts': counts,
+        'digests': digests,
+        'dead_letters': [{
+            'id': row.id,
+            'kind': row.kind,
+            'attempts': row.attempts,
+            'last_error': row.last_error,
+            'created_at': row.created_at.isoformat(),
+        } for row in dead_letters],
+    }
+
+
+def send_whatsapp(service, to, body):
+    """
+    Send one message - Twilio 4xx (bad number, unverified sandbox recipient) is permanent, except 429
+    """
+    try:
+        service.send_message(to, body)
+    except TwilioRestException as e:
+        if 400 <= e.status < 500 and e.status != 429:
+            raise PermanentDeliveryError(e.msg) from e
+        raise
+
+
+def digest_messages(rows):
+    """
+    Split one recipient's LOW_STOCK_ALERT rows into messages: [(body, rows it carries)]
+    """
+    alerts = [(row.payload['product_name'], row.payload['stock'], row.payload['threshold']) for row in rows]
+    messages = []
+    start = 0
+    for body, count in format_low_stock_digest(alerts):
+        messages.append((body, rows[start:start + count]))
+        start += count
+    return messages
+
+
+def run_low_stock_check(service):
+    """
+    Deliver one LOW_STOCK_CHECK row - refresh the manager's alert settings and queue alerts for low products
+    missing one (reconciliation - day to day, alerts are raised by the stock writes themselves)
+    Raises on any failure, including alerts turned on without a number, so the row is retried
+    """
+    from .views import get_manager_profile_from_mongodb
+
+    manager_profile = get_manager_profile_from_mongodb()
+    if not manager_profile:
+        raise RuntimeError('Manager profile unavailable')
+    sync_alert_settings(manager_profile)
+    if manager_profile.get('whatsappAlertsEnabled'):
+        service.check_and_send_alerts(manager_profile.get('contact'), manager_profile.get('lowStockThreshold', 10))
+
+
+class AlertOutboxWorker:
+    """
+    Drains the alert outbox
+
+    Twilio sends run on a thread pool; claiming rows, low stock scans and
+    recording results stay on the thread calling run(), so the database only
+    ever sees one writer per worker process. Up to 2 x threads messages are in
+    flight at a time and refilled as sends finish, so one slow send never
+    holds up a whole batch.
+
+    Low stock alerts due for a manager are claimed together and sent as
+    digests - one message for the whole window unless it outgrows
+    WHATSAPP_MAX_LENGTH.
+    """
+
+    def __init__(self, threads=None, service=None):
+        self.threads = threads or settings.ALERT_OUTBOX_WORKER_THREADS
+        self.service = service or WhatsAppService()
+        self.stop_event = threading.Event()
+        self.checks = 0
+        self.sent = 0  # Messages sent
+        self.alerts = 0  # Low stock alerts delivered, in self.digests messages
+        self.digests = 0
+        self.retried = 0
+        self.dead = 0
+
+    def run(self, interval=1.0, once=False):
+        """
+        Process due rows until stop() - or, with once=True, until nothing is due or in flight
+        """
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='alert-outbox') as executor:
+            in_flight = {}
+            while not self.stop_event.is_set():
+                claimed = self._fill(executor, in_flight)
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=interval, return_when=FIRST_COMPLETED)
+                    self._record(done, in_flight)
+                elif not claimed:
+                    if once:
+                        break
+                    close_old_connections()
+                    self.stop_event.wait(interval)
+            # Stopping: sends not started yet go back to the queue, sends already
+            # running are waited for and recorded so they are not sent twice
+            release([row for future in list(in_flight) if future.cancel() for row in in_flight.pop(future)])
+            self._record(wait(in_flight).done, in_flight)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _fill(self, executor, in_flight):
+        room = self.threads * 2 - len(in_flight)
+        if room <= 0:
+            return 0
+        rows = claim_due(room)
+        recipients = {row.recipient for row in rows if row.kind == AlertOutbox.LOW_STOCK_ALERT}
+        if recipients:
+            # The rest of each due window too, so it goes out as one digest rather than in pieces
+            rows += claim_due(kind=AlertOutbox.LOW_STOCK_ALERT, recipient__in=recipients)
+
+        alerts = {}
+        for row in rows:
+            if row.kind == AlertOutbox.LOW_STOCK_CHECK:
+                # Database work - done here, its alerts are picked up by a later claim
+                try:
+                    run_low_stock_check(self.service)
+                except Exception as e:
+                    self._failed([row], e)
+                else:
+                    mark_sent([row])
+                    self.checks += 1
+            elif row.kind == AlertOutbox.LOW_STOCK_ALERT:
+                alerts.setdefault(row.recipient, []).append(row)
+            else:
+                in_flight[executor.submit(send_whatsapp, self.service, row.payload['to'], row.payload['body'])] = [row]
+
+        for recipient, alert_rows in alerts.items():
+            for body, message_rows in digest_messages(alert_rows):
+                in_flight[executor.submit(send_whatsapp, self.service, recipient, body)] = message_rows
+        return len(rows)
+
+    def _record(self, done, in_flight):
+        for future in done:
+            rows = in_flight.pop(future)
+            error = future.exception()
+            if error is None:
+                mark_sent(rows, sent_in=uuid.uuid4().hex)
+                self.sent += 1
+                if rows[0].kind == AlertOutbox.LOW_STOCK_ALERT:
+                    self.alerts += len(rows)
+                    self.digests += 1
+            else:
+                self._failed(rows, error)
+
+    def _failed(self, rows, error):
+        dead = mark_failed(rows, error)
+        self.dead += len(dead)
+        if len(dead) < len(rows):
+            self.retried += 1
+            logger.warning(f"Alert outbox #{rows[0].id} attempt {rows[0].attempts} failed, retrying: {error}")
@@ -0,0 +1,165 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from .models import Product, LowStockAlert
+from .serializers import product_list_serializer, customer_product_list_serializer
+from .renderers import FastJSONRenderer
+from .pagination import KeysetPagination, CustomerKeysetPagination
+from .catalog_snapshots import snapshot as catalog_snapshot
+from .catalog_cache import CATALOG_SCOPE, RESERVATIONS_SCOPE, acached_response_data, async_catalog_condition
+from .views import ProductViewSet, customer_products_scopes
+
+LIST_CHUNK_SIZE = 2000  # rows per async ORM fetch for full lists
+
+_renderer = FastJSONRenderer()
+
+# Writes on /api/products/ stay on the sync viewset
+_product_collection = ProductViewSet.as_view({'get': 'list', 'post': 'create'})
+
+
+def _json(data, status=200):
+    """
+    Same bytes and content type as a DRF Response rendered by FastJSONRenderer
+    """
+    return HttpResponse(_renderer.render(data), content_type='application/json', status=status)
+
+
+def _error(exc):
+    """
+    DRF exception -> JSON body shaped like DRF's default exception handler
+    """
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return _json(detail, status=exc.status_code)
+
+
+def _method_not_allowed(request):
+    return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+
+async def _fetch_page(paginator, queryset, request):
+    """
+    Keyset page (or None when not paginated) read with the async ORM
+    """
+    page_queryset = paginator.page_queryset(queryset, request)
+    if page_queryset is None:
+        return None
+    return paginator.finish_page([row async for row in page_queryset])
+
+
+async def _fetch_all(queryset):
+    return [row async for row in queryset.aiterator(chunk_size=LIST_CHUNK_SIZE)]
+
+
+async def products(request):
+    """
+    /api/products/ - async list for GET, the sync viewset for everything else (create)
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return await sync_to_async(_product_collection)(request)
+    return await product_list(request)
+
+products.csrf_exempt = True  # Like every DRF view; the viewset does its own checks
+
+
+@async_catalog_condition('products', lambda request: [CATALOG_SCOPE, RESERVATIONS_SCOPE])
+async def product_list(request):
+    """
+    Manager product list - async counterpart of ProductViewSet.list (same ?fields=, ?exclude=, keyset pages)
+    """
+    request = Request(request)
+    try:
+        list_serializer = product_list_serializer.for_request(request)
+        paginator = KeysetPagination()
+        extra = paginator.get_columns(request) if paginator.is_requested(request) else ()
+        queryset = list_serializer.project(paginator.order_queryset(Product.objects.all(), request), extra=extra)
+        page = await _fetch_page(paginator, queryset, request)
+    except APIException as e:
+        return _error(e)
+
+    if page is not None:
+        return _json(paginator.get_paginated_response(list_serializer.serialize(page)).data)
+
+    # Serializing a whole catalog is CPU work - keep it off the event loop
+    rows = await _fetch_all(queryset)
+    return await sync_to_async(lambda: _json(list_serializer.serialize(rows)))()
+
+
+@async_catalog_condition('customer-products', customer_products_scopes)
+async def customer_products(request):
+    """
+    Customer product list - async counterpart of views.customer_products
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return _method_not_allowed(request)
+    category = request.GET.get('category')
+
+    # Plain listings come from the pre-rendered snapshot (its refresh is sync, run in a thread)
+    if set(request.GET) <= {'category'}:
+        if category:
+            blob = await sync_to_async(catalog_snapshot.category_bytes)(category)
+        else:
+            blob = await sync_to_async(catalog_snapshot.catalog_bytes)()
+        return HttpResponse(blob, content_type='application/json')
+
+    drf_request = Request(request)
+
+    async def build():
+        products = Product.objects.filter(category=category) if category else Product.objects.all()
+
+        # Opt-in keyset pagination (?page_size= / ?cursor=), full list otherwise
+        paginator = CustomerKeysetPagination()
+        products = customer_product_list_serializer.project(
+            paginator.order_queryset(products, drf_request), extra=paginator.get_columns(drf_request)
+        )
+        page = await _fetch_page(paginator, products, drf_request)
+        if page is not None:
+            return paginator.get_paginated_response(customer_product_list_serializer.serialize(page)).data
+
+        rows = await _fetch_all(products)
+        return await sync_to_async(customer_product_list_serializer.serialize)(rows)
+
+    try:
+        data = await acached_response_data('customer-products', customer_products_scopes(request), request, build)
+    except APIException as e:
+        return _error(e)
+    return _json(data)
+
+
+@async_catalog_condition('categories', lambda request: [CATALOG_SCOPE])
+async def get_categories(request):
+    """
+    All unique product categories - async counterpart of views.get_categories
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return _method_not_allowed(request)
+
+    async def build():
+        return [category async for category in Product.objects.all().values_list('category', flat=True).distinct()]
+
+    return _json(await acached_response_data('categories', [CATALOG_SCOPE], request, build))
+
+
+async def low_stock_alerts_history(request):
+    """
+    Last 50 low stock alerts - async counterpart of views.low_stock_alerts_history
+    Product names come from the same query (select_related) instead of one query per alert
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return _method_not_allowed(request)
+
+    try:
+        alerts = LowStockAlert.objects.select_related('product').order_by('-sent_at')[:50]
+        alerts_data = [{
+            'id': alert.id,
+            'product_name': alert.product.name,
+            'stock_at_alert': alert.stock_at_alert,
+            'threshold_value': alert.threshold_value,
+            'sent_at': alert.sent_at.isoformat(),
+            'is_resolved': alert.is_resolved,
+            'resolved_at': alert.resolved_at.isoformat() if alert.resolved_at else None,
+        } async for alert in alerts]
+        return _json(alerts_data)
+
+    except Exception as e:
+        return _json({'error': str(e)}, status=500)
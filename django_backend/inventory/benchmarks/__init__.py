@@ -0,0 +1,5 @@
+"""
+Benchmark and stress scripts for the inventory app
+Run each script from the django_backend directory, e.g.:
+python inventory/benchmarks/stock_decrement_benchmark.py
+"""
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+WhatsApp alert outbox - product write latency and worker throughput with a fake Twilio
+1. Product writes: PATCH /api/products/<id>/ checks only its own product against the
+   threshold and queues an alert when it crosses - no Node lookup, no scan, no send.
+   Compared with doing the work inline - profile lookup, low stock scan and one
+   Twilio call per new alert - which is what each write used to wait for.
+2. Worker: drains M queued messages through FakeTransport (--latency per send,
+   --failure-rate failing like a 503) with 1..N send threads; reports messages/sec,
+   retries and dead letters, and checks every message was sent exactly once.
+3. Digests: a bulk sale drives 50 products under threshold at once - alerts delivered
+   vs WhatsApp messages actually sent.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/alert_outbox_benchmark.py [--messages 1000] [--threads 1,4,16,32] [--latency 0.1]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from unittest import mock
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, percentile, seed_products
+
+from django.conf import settings
+from rest_framework.test import APIClient
+from inventory.alert_outbox import AlertOutboxWorker, outbox_stats, run_low_stock_check
+from inventory.models import AlertOutbox, LowStockAlert, Product
+from inventory.stock_alerts import sync_alert_settings
+from inventory.messaging import FakeTransport
+from inventory.stock_service import decrement_stock
+from inventory.whatsapp_service import (
+    WhatsAppService, WHATSAPP_MAX_LENGTH, format_low_stock_message, message_length
+)
+
+PHONE = '+910000000000'
+PROFILE = {'whatsappAlertsEnabled': True, 'contact': PHONE, 'lowStockThreshold': 10}
+
+
+def write_path(args, client):
+    """
+    p50/p99 of product PATCHes, and the inline work each one would have waited for
+    """
+    # Inline equivalent: the scan plus one send per alert it finds before responding
+    service = WhatsAppService(transport=FakeTransport(latency=args.latency))
+    start = time.perf_counter()
+    with mock.patch('inventory.views.get_manager_profile_from_mongodb', return_value=PROFILE):
+        run_low_stock_check(service)
+    alerts = list(AlertOutbox.objects.filter(kind=AlertOutbox.LOW_STOCK_ALERT, status=AlertOutbox.PENDING))
+    for row in alerts:
+        service.send_message(row.recipient, format_low_stock_message(
+            row.payload['product_name'], row.payload['stock'], row.payload['threshold']
+        ))
+    inline_ms = (time.perf_counter() - start) * 1000
+    AlertOutbox.objects.all().delete()
+    LowStockAlert.objects.all().delete()
+
+    ids = list(Product.objects.values_list('id', flat=True))
+    rng = random.Random(5)
+    latencies = []
+    for _ in range(args.writes):
+        product_id = rng.choice(ids)
+        start = time.perf_counter()
+        response = client.patch(f'/api/products/{product_id}/', {'stock': rng.randint(0, 100)}, format='json')
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.content
+    queued = AlertOutbox.objects.filter(kind=AlertOutbox.LOW_STOCK_ALERT).count()
+    return latencies, queued, len(alerts), inline_ms
+
+
+def bulk_sale(args):
+    """
+    One purchase drives --sale-lines products under the threshold - alerts vs digest messages sent
+    """
+    AlertOutbox.objects.all().delete()
+    ids = list(Product.objects.filter(stock__gt=10).order_by('id').values_list('id', flat=True)[:args.sale_lines])
+    Product.objects.filter(id__in=ids).update(stock=12)
+    decrement_stock([{'productId': product_id, 'quantity': 5} for product_id in ids])  # Queues the alerts
+
+    transport = FakeTransport(latency=args.latency)
+    service = WhatsAppService(transport=transport)
+    start = time.perf_counter()
+    AlertOutboxWorker(service=service).run(interval=0.01, once=True)
+    elapsed = time.perf_counter() - start
+    return outbox_stats()['digests'], max(message_length(message['body']) for message in transport.sent), elapsed
+
+
+def drain(args, threads):
+    """
+    Queue --messages messages and time one worker draining them
+    """
+    AlertOutbox.objects.all().delete()
+    AlertOutbox.objects.bulk_create([
+        AlertOutbox(kind=AlertOutbox.WHATSAPP, payload={'to': PHONE, 'body': f'Alert {i}'})
+        for i in range(args.messages)
+    ], batch_size=500)
+    transport = FakeTransport(latency=args.latency, failure_rate=args.failure_rate, seed=threads)
+    worker = AlertOutboxWorker(threads=threads, service=WhatsAppService(transport=transport))
+
+    start = time.perf_counter()
+    worker.run(interval=0.01, once=True)
+    # Retries back off past the end of the first pass - keep going until nothing is left
+    while AlertOutbox.objects.filter(status=AlertOutbox.PENDING).exists():
+        time.sleep(settings.ALERT_OUTBOX_BACKOFF_SECONDS)
+        worker.run(interval=0.01, once=True)
+    elapsed = time.perf_counter() - start
+
+    bodies = [message['body'] for message in transport.sent]
+    exactly_once = len(bodies) == len(set(bodies)) == worker.sent
+    return elapsed, worker, exactly_once
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Alert outbox benchmark')
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--low', type=int, default=50, help='products at or below the threshold')
+    parser.add_argument('--writes', type=int, default=200)
+    parser.add_argument('--sale-lines', type=int, default=50, help='products a bulk sale drives under threshold')
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--threads', default='1,4,16,32')
+    parser.add_argument('--latency', type=float, default=0.1, help='seconds per fake Twilio send')
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    args = parser.parse_args()
+
+    settings.ALERT_OUTBOX_BACKOFF_SECONDS = 0.05
+    settings.ALERT_OUTBOX_MAX_ATTEMPTS = 10
+    logging.getLogger('inventory.alert_outbox').setLevel(logging.ERROR)  # One warning per injected failure
+
+    with benchmark_database():
+        seed_products(args.products)
+        low_ids = list(Product.objects.order_by('?').values_list('id', flat=True)[:args.low])
+        Product.objects.filter(id__in=low_ids).update(stock=3)
+        sync_alert_settings(PROFILE)
+        print(f"📨 Alert outbox - {args.products:,} products ({args.low} low), "
+              f"fake Twilio {args.latency * 1000:.0f} ms/send, {args.failure_rate:.0%} failures")
+
+        latencies, checks, alerts, inline_ms = write_path(args, APIClient())
+        print(f"\n   product PATCH (crossing check): p50 {percentile(latencies, 50):.1f} ms | "
+              f"p99 {percentile(latencies, 99):.1f} ms | {args.writes} writes -> {checks} alerts queued by threshold crossings")
+        print(f"   same work inline: {inline_ms:,.0f} ms for one write ({alerts} alerts found and sent)")
+
+        settings.ALERT_DIGEST_WINDOW_SECONDS = 0
+        digests, longest, elapsed = bulk_sale(args)
+        print(f"\n   bulk sale of {args.sale_lines} lines: {digests['alerts_sent']} alerts in "
+              f"{digests['messages_sent']} digest message(s), {digests['messages_saved']} messages saved | "
+              f"longest {longest}/{WHATSAPP_MAX_LENGTH} chars | delivered in {elapsed * 1000:.0f} ms")
+
+        print(f"\n   {'threads':>7} | {'msg/s':>7} {'seconds':>8} {'retries':>8} {'dead':>5} {'exactly once':>13}")
+        ok = True
+        for threads in [int(level) for level in args.threads.split(',')]:
+            elapsed, worker, exactly_once = drain(args, threads)
+            ok = ok and exactly_once and worker.sent == args.messages
+            print(f"   {threads:7d} | {worker.sent / elapsed:7.0f} {elapsed:8.1f} {worker.retried:8d} "
+                  f"{worker.dead:5d} {'yes' if exactly_once else 'NO':>13}")
+
+        if not ok:
+            print("❌ Messages lost or sent twice")
+            sys.exit(1)
+        print(f"\n✅ All {args.messages:,} messages delivered exactly once at every thread count")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Low stock alert pipeline end to end, offline - sales in, WhatsApp messages out
+A producer thread makes --events sales at --rate per second, each driving a different
+product under the threshold (decrement_stock -> threshold crossing -> LowStockAlert +
+outbox row), while an AlertOutboxWorker with --threads send threads delivers them through
+a message transport that never touches Twilio:
+- fake: FakeTransport, --latency per send and --failure-rate failing like a 503
+- file: FileTransport appending JSON lines to a temporary file
+for each transport at every --windows digest window (ALERT_DIGEST_WINDOW_SECONDS).
+Reports sales/s achieved, alerts and messages delivered per second, end-to-end alert
+latency (outbox row created by the sale -> marked sent) and checks every alert went out exactly once.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/alert_pipeline_benchmark.py [--events 2000] [--rate 50] [--threads 8] [--windows 0,1]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, percentile, seed_products
+
+from django.conf import settings
+from django.db import connection
+from inventory.alert_outbox import AlertOutboxWorker
+from inventory.messaging import FakeTransport, FileTransport
+from inventory.models import AlertOutbox, LowStockAlert, Product
+from inventory.stock_alerts import sync_alert_settings
+from inventory.stock_service import decrement_stock
+from inventory.whatsapp_service import WhatsAppService
+
+PHONE = '+910000000000'
+PROFILE = {'whatsappAlertsEnabled': True, 'contact': PHONE, 'lowStockThreshold': 10}
+START_STOCK = 20
+SALE_QUANTITY = 15  # 20 -> 5 crosses the threshold of 10
+
+
+def produce(ids, rate, done):
+    """
+    One crossing sale per product, paced at rate per second; appends the elapsed seconds to done
+    """
+    start = time.perf_counter()
+    try:
+        for i, product_id in enumerate(ids):
+            time.sleep(max(0, start + i / rate - time.perf_counter()))
+            decrement_stock([{'productId': product_id, 'quantity': SALE_QUANTITY}])
+    finally:
+        done.append(time.perf_counter() - start)
+        connection.close()
+
+
+def delivered_bodies(transport):
+    if isinstance(transport, FakeTransport):
+        return [message['body'] for message in transport.sent]
+    with open(transport.path, encoding='utf-8') as sink:
+        return [json.loads(line)['body'] for line in sink]
+
+
+def run_scenario(args, ids, transport, window):
+    """
+    Drive args.events crossing sales through the pipeline; returns the figures for one row
+    """
+    AlertOutbox.objects.all().delete()
+    LowStockAlert.objects.all().delete()
+    Product.objects.filter(id__in=ids).update(stock=START_STOCK, in_stock=True)
+    settings.ALERT_DIGEST_WINDOW_SECONDS = window
+
+    worker = AlertOutboxWorker(threads=args.threads, service=WhatsAppService(transport=transport))
+    worker_thread = threading.Thread(target=worker.run, kwargs={'interval': 0.01})
+    done = []
+    producer = threading.Thread(target=produce, args=(ids, args.rate, done))
+
+    start = time.perf_counter()
+    worker_thread.start()
+    producer.start()
+    producer.join()
+    # Producer finished - wait for the last window to close and drain
+    pending = AlertOutbox.objects.exclude(status__in=[AlertOutbox.SENT, AlertOutbox.DEAD])
+    while pending.exists():
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    worker.stop()
+    worker_thread.join()
+
+    rows = list(AlertOutbox.objects.filter(kind=AlertOutbox.LOW_STOCK_ALERT, status=AlertOutbox.SENT)
+                .values_list('created_at', 'sent_at'))
+    latencies = [(sent_at - created_at).total_seconds() * 1000 for created_at, sent_at in rows]
+
+    bodies = delivered_bodies(transport)
+    names = Product.objects.filter(id__in=ids).values_list('name', flat=True)
+    exactly_once = len(rows) == len(ids) and all(sum(f'*{name}*' in body for body in bodies) == 1 for name in names)
+    return {
+        'sales_per_second': len(ids) / done[0],
+        'alerts_per_second': worker.alerts / elapsed,
+        'messages_per_second': worker.sent / elapsed,
+        'alerts': worker.alerts,
+        'messages': worker.sent,
+        'retries': worker.retried,
+        'latencies': latencies,
+        'exactly_once': exactly_once,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Low stock alert pipeline benchmark')
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--events', type=int, default=2000, help='crossing sales, one per product')
+    parser.add_argument('--rate', type=float, default=50, help='sales per second offered')
+    parser.add_argument('--threads', type=int, default=8, help='worker send threads')
+    parser.add_argument('--windows', default='0,1', help='digest windows to try, seconds')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per fake send')
+    parser.add_argument('--failure-rate', type=float, default=0.02)
+    args = parser.parse_args()
+
+    settings.ALERT_OUTBOX_BACKOFF_SECONDS = 0.05
+    settings.ALERT_OUTBOX_MAX_ATTEMPTS = 10
+    logging.getLogger('inventory.alert_outbox').setLevel(logging.ERROR)  # One warning per injected failure
+
+    with benchmark_database(), tempfile.TemporaryDirectory() as directory:
+        seed_products(args.products)
+        ids = list(Product.objects.order_by('?').values_list('id', flat=True)[:args.events])
+        sync_alert_settings(PROFILE)
+        print(f"📲 Alert pipeline - {len(ids):,} crossing sales at {args.rate:.0f}/s over {args.products:,} products, "
+              f"{args.threads} send threads")
+        print(f"   fake transport {args.latency * 1000:.0f} ms/send, {args.failure_rate:.0%} failures; "
+              f"file transport appends JSON lines")
+
+        print(f"\n   {'transport':<9} {'window':>6} | {'sales/s':>7} {'alerts/s':>8} {'msgs/s':>7} {'alerts':>6} "
+              f"{'msgs':>5} {'retries':>7} | {'e2e p50 ms':>10} {'p95':>7} {'p99':>7} | exactly once")
+        ok = True
+        for window in [float(value) for value in args.windows.split(',')]:
+            for name in ('fake', 'file'):
+                if name == 'fake':
+                    transport = FakeTransport(latency=args.latency, failure_rate=args.failure_rate, seed=7)
+                else:
+                    transport = FileTransport(os.path.join(directory, f'whatsapp-{window:g}.jsonl'))
+                result = run_scenario(args, ids, transport, window)
+                ok = ok and result['exactly_once']
+                latencies = result['latencies']
+                print(f"   {name:<9} {window:5g}s | {result['sales_per_second']:7.0f} {result['alerts_per_second']:8.0f} "
+                      f"{result['messages_per_second']:7.0f} {result['alerts']:6,} {result['messages']:5,} "
+                      f"{result['retries']:7,} | {percentile(latencies, 50):10.0f} {percentile(latencies, 95):7.0f} "
+                      f"{percentile(latencies, 99):7.0f} | {'yes' if result['exactly_once'] else 'NO'}")
+
+        if not ok:
+            print("❌ Alerts lost or sent twice")
+            sys.exit(1)
+        print("\n✅ Every alert delivered exactly once with every transport and window")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Catalog read path under load - current WSGI deployment vs native async views under ASGI
+Serves the same seeded database two ways, each in its own process:
+- wsgi: Django's threaded WSGI server (what runserver runs) with the sync DRF views
+- asgi: uvicorn + django_backend.asgi, where ASYNC_CATALOG_VIEWS routes to inventory/async_views.py
+and drives both with N requests in flight (aiohttp) over a mix of catalog reads:
+keyset pages of the manager list, customer category pages, categories and alert history.
+Reports throughput, p50/p99 latency and errors for each concurrency level.
+
+Needs uvicorn (pip install uvicorn). Run from the django_backend directory with:
+python inventory/benchmarks/async_views_benchmark.py [--products 20000] [--concurrency 1,16,64,256]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+# Add the django_backend directory to the Python path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(BACKEND_DIR)
+
+CATEGORIES = ['Groceries', 'Spices', 'Snacks', 'Beverages', 'Dairy', 'Personal Care']
+ORDERINGS = ['id', 'price', '-price', 'stock', 'category', 'name']
+
+
+def serve(mode, database, port):
+    """
+    Server process: point Django at the benchmark database and serve on port
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_backend.settings')
+    os.environ['ASYNC_CATALOG_VIEWS'] = 'True' if mode == 'asgi' else 'False'
+    os.environ['DEBUG'] = 'False'
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = database
+    settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 60
+    settings.ALLOWED_HOSTS = ['127.0.0.1']
+
+    if mode == 'asgi':
+        import uvicorn
+        from django_backend.asgi import application
+        uvicorn.run(application, host='127.0.0.1', port=port, log_level='warning', access_log=False)
+    else:
+        # The threaded server runserver uses, minus per-request logging
+        from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+        from django.core.wsgi import get_wsgi_application
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        server = ThreadedWSGIServer(('127.0.0.1', port), QuietHandler)
+        server.daemon_threads = True
+        server.set_app(get_wsgi_application())
+        server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def request_mix(rng):
+    """
+    One catalog read, weighted towards the manager list and customer pages
+    """
+    roll = rng.random()
+    if roll < 0.4:
+        return '/api/products/', {'page_size': 50, 'ordering': rng.choice(ORDERINGS), 'fields': 'id,name,category,stock'}
+    if roll < 0.8:
+        return '/api/customer/products/', {'category': rng.choice(CATEGORIES), 'page_size': rng.choice([20, 50, 100])}
+    if roll < 0.9:
+        return '/api/customer/categories/', {}
+    return '/api/manager/alerts-history/', {}
+
+
+async def load(port, concurrency, requests):
+    import aiohttp
+    from inventory.benchmarks.utils import percentile
+
+    rng = random.Random(concurrency)
+    plan = [request_mix(rng) for _ in range(requests)]
+    latencies, errors = [], 0
+    base = f'http://127.0.0.1:{port}'
+
+    # A new connection per request keeps delayed-ACK stalls on kept-alive WSGI sockets out of the numbers
+    connector = aiohttp.TCPConnector(limit=concurrency, force_close=True)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        queue = iter(plan)
+
+        async def worker():
+            nonlocal errors
+            for path, params in queue:
+                start = time.perf_counter()
+                try:
+                    async with session.get(base + path, params=params) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return requests / elapsed, percentile(latencies, 50), percentile(latencies, 99), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='WSGI vs ASGI catalog read path')
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--concurrency', default='1,16,64,256')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.database, args.port)
+        return
+
+    from inventory.benchmarks.utils import benchmark_database, seed_products
+    from inventory.models import LowStockAlert, Product
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    with benchmark_database() as database:
+        seed_products(args.products)
+        products = list(Product.objects.order_by('id')[:50])
+        LowStockAlert.objects.bulk_create([
+            LowStockAlert(product=product, threshold_value=10, stock_at_alert=i % 10, manager_phone='+910000000000')
+            for i, product in enumerate(products)
+        ])
+        print(f"🚦 Catalog read path - {args.products:,} products, {args.requests} requests per level")
+
+        results = {}
+        for mode in ('wsgi', 'asgi'):
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--serve', mode, '--database', database, '--port', str(port)],
+                cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_until_up(port)
+                asyncio.run(load(port, 4, 100))  # Warm up imports, caches and the snapshot
+                for level in levels:
+                    results[mode, level] = asyncio.run(load(port, level, args.requests))
+            finally:
+                server.terminate()
+                server.wait()
+
+        print(f"\n   {'in flight':>9} | {'WSGI req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'err':>4} | "
+              f"{'ASGI req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'err':>4}")
+        for level in levels:
+            row = f"   {level:>9} |"
+            for mode in ('wsgi', 'asgi'):
+                rate, p50, p99, errors = results[mode, level]
+                row += f" {rate:10.0f} {p50:8.1f} {p99:8.1f} {errors:4d} |"
+            print(row.rstrip(' |'))
+
+
+if __name__ == "__main__":
+    main()
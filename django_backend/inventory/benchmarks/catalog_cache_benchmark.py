@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Cold vs warm request throughput for the cached catalog endpoints
+Cold = catalog cache cleared before every request, warm = served from the cache.
+Also checks that a product write is visible on the very next request.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/catalog_cache_benchmark.py [--products 5000] [--requests 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, seed_products
+
+from rest_framework.test import APIClient
+from inventory.catalog_cache import get_cache
+from inventory.models import Product
+
+
+def throughput(client, url, params, requests, clear):
+    cache = get_cache()
+    start = time.perf_counter()
+    for _ in range(requests):
+        if clear:
+            cache.clear()
+        response = client.get(url, params)
+        assert response.status_code == 200
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Catalog cache benchmark')
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed_products(args.products)
+        client = APIClient()
+        cache = get_cache()
+
+        endpoints = [
+            ('Full catalog', '/api/customer/products/', {}),
+            ('One category', '/api/customer/products/', {'category': 'Spices'}),
+            ('Keyset page', '/api/customer/products/', {'page_size': 50}),
+            ('Categories', '/api/customer/categories/', {}),
+        ]
+
+        print(f"⚡ Catalog cache - {args.products:,} products, {args.requests} requests per run")
+        for label, url, params in endpoints:
+            # The uncached full catalog is slow - fewer cold samples keep the run short
+            cold_requests = max(1, args.requests // 10) if label == 'Full catalog' else args.requests
+            cold = throughput(client, url, params, cold_requests, clear=True)
+            cache.reset_stats()
+            warm = throughput(client, url, params, args.requests, clear=False)
+            print(f"   {label:<13} cold {cold:9.1f} req/s | warm {warm:9.1f} req/s | speedup x{warm / cold:.1f}")
+
+        stats = cache.get_stats()
+        print(f"   Cache stats (last warm run): hits {stats['hits']} | misses {stats['misses']} | "
+              f"hit rate {stats['hit_rate']:.2%} | entries {stats['entries']}/{stats['max_entries']}")
+
+        # Writes must be visible immediately
+        product = Product.objects.filter(category='Spices').first()
+        client.get('/api/customer/products/', {'category': 'Spices'})
+        client.post('/api/manager/restock-product/', {'productId': product.id, 'quantity': 7}, format='json')
+        rows = client.get('/api/customer/products/', {'category': 'Spices'}).json()
+        served = next(row['stock'] for row in rows if row['id'] == product.id)
+        product.refresh_from_db()
+        if served != product.stock:
+            print(f"❌ Stale response after restock: served {served}, actual {product.stock}")
+            sys.exit(1)
+        print("✅ Restock invalidated the cached category listing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Catalog snapshot benchmark - memory footprint and latency against the serializer path
+Compares, per catalog size:
+- legacy: CustomerProductSerializer + JSONRenderer for every request
+- snapshot: pre-rendered bytes served by customer_products
+and reports the snapshot's memory use plus the cost of a single-category rebuild.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/catalog_snapshot_benchmark.py [--sizes 10000,100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, seed_products
+
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from inventory.catalog_snapshots import snapshot
+from inventory.models import Product
+from inventory.serializers import CustomerProductSerializer
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def legacy(queryset):
+    return JSONRenderer().render(CustomerProductSerializer(queryset, many=True).data)
+
+
+def bench_size(size):
+    Product.objects.all().delete()
+    seed_products(size)
+    snapshot.reset()
+    client = APIClient()
+
+    print(f"\n📦 {size:,} products")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    snapshot.catalog_bytes()
+    build_ms = (time.perf_counter() - start) * 1000
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = snapshot.stats()
+    print(f"   Full snapshot build: {build_ms:.0f} ms | retained {current / 1024 / 1024:.1f} MiB "
+          f"(peak {peak / 1024 / 1024:.1f} MiB during build)")
+    print(f"   Blob sizes: catalog {stats['catalog_blob_bytes'] / 1024:.0f} KiB | "
+          f"categories {stats['category_blob_bytes'] / 1024:.0f} KiB | "
+          f"row fragments {stats['row_fragment_bytes'] / 1024:.0f} KiB")
+
+    full = Product.objects.order_by('id')
+    category = Product.objects.filter(category='Spices').order_by('id')
+
+    legacy_full = best_of(lambda: legacy(full))
+    snapshot_full = best_of(lambda: client.get('/api/customer/products/'))
+    legacy_cat = best_of(lambda: legacy(category))
+    snapshot_cat = best_of(lambda: client.get('/api/customer/products/', {'category': 'Spices'}))
+
+    print(f"   Full catalog : serializer {legacy_full:8.1f} ms | snapshot endpoint {snapshot_full:6.2f} ms")
+    print(f"   One category : serializer {legacy_cat:8.1f} ms | snapshot endpoint {snapshot_cat:6.2f} ms")
+
+    # A stock change in one category only re-renders that category
+    product = Product.objects.filter(category='Spices').first()
+
+    def write_and_serve():
+        with transaction.atomic():
+            product.stock += 1
+            product.save()
+        client.get('/api/customer/products/')
+
+    rebuild = best_of(write_and_serve)
+    print(f"   Write + refreshed full catalog (one category rebuilt): {rebuild:.1f} ms")
+
+    response = client.get('/api/customer/products/')
+    if response.content != legacy(Product.objects.order_by('id')):
+        print("❌ Snapshot bytes differ from the serializer output")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Catalog snapshot benchmark')
+    parser.add_argument('--sizes', default='10000,100000')
+    args = parser.parse_args()
+
+    with benchmark_database():
+        for size in [int(s) for s in args.sizes.split(',')]:
+            bench_size(size)
+    print("\n✅ Snapshot responses are byte-for-byte identical to the serializer path")
+
+
+if __name__ == "__main__":
+    main()
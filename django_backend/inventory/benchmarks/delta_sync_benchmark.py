@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Delta sync benchmark - /api/products/changes/ polls vs re-downloading /api/products/
+A dashboard that keeps a local replica polls after every round of stock changes.
+For each catalog size it reports latency and bytes of a full list poll and of a
+delta poll after N checkouts, and checks the replica rebuilt from deltas matches the list.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/delta_sync_benchmark.py [--sizes 10000,100000] [--changes 10] [--repeat 10]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, percentile, seed_products
+
+from django.conf import settings
+from rest_framework.test import APIClient
+from inventory.models import Product
+from inventory.stock_service import decrement_stock
+
+
+def timed_get(client, url, params=None):
+    start = time.perf_counter()
+    response = client.get(url, params or {})
+    return (time.perf_counter() - start) * 1000, response
+
+
+def sync(client, replica, token=None):
+    """
+    Apply every page of changes since token to replica; returns the new token
+    """
+    while True:
+        data = client.get('/api/products/changes/', {'since': token} if token else {}).json()
+        replica.update((row['id'], row) for row in data['changed'])
+        for product_id in data['deleted']:
+            replica.pop(product_id, None)
+        token = data['token']
+        if not data['has_more']:
+            return token
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Delta sync benchmark')
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--changes', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    settings.DELTA_SYNC_SETTLE_SECONDS = 0  # One writer that has committed before each poll
+    client = APIClient()
+    rng = random.Random(7)
+    failures = 0
+
+    with benchmark_database():
+        seeded = 0
+        for size in sorted(int(s) for s in args.sizes.split(',')):
+            seed_products(size - seeded)
+            seeded = Product.objects.count()
+            ids = list(Product.objects.values_list('id', flat=True))
+
+            replica = {}
+            start = time.perf_counter()
+            token = sync(client, replica)
+            print(f"\n🔄 {size:,} products - initial full sync {time.perf_counter() - start:.2f}s")
+
+            full_ms, delta_ms, full_bytes, delta_bytes = [], [], 0, 0
+            for _ in range(args.repeat):
+                for product_id in rng.sample(ids, args.changes):
+                    decrement_stock([{'productId': product_id, 'quantity': 1}])
+
+                elapsed, response = timed_get(client, '/api/products/')
+                full_ms.append(elapsed)
+                full_bytes = len(response.content)
+
+                elapsed, response = timed_get(client, '/api/products/changes/', {'since': token})
+                delta_ms.append(elapsed)
+                delta_bytes = len(response.content)
+                data = response.json()
+                replica.update((row['id'], row) for row in data['changed'])
+                token = data['token']
+
+            print(f"   full list poll p50 {percentile(full_ms, 50):9.1f} ms | {full_bytes / 1024:9.1f} KiB")
+            print(f"   delta poll     p50 {percentile(delta_ms, 50):9.1f} ms | {delta_bytes / 1024:9.1f} KiB "
+                  f"({args.changes} changed rows)")
+
+            current = {row['id']: row for row in client.get('/api/products/').json()}
+            in_sync = current == replica
+            failures += not in_sync
+            print(f"   replica matches the list: {'✅' if in_sync else '❌'}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Streaming export memory profile - NDJSON/CSV export vs the full list endpoint
+For each catalog size it streams both formats through the Django test client and reports:
+- time to first byte and total time
+- traced peak memory (tracemalloc) while the response is consumed
+Timings include tracemalloc overhead (several times slower than untraced).
+The full list endpoint is profiled up to --list-max rows for comparison (it holds everything).
+
+Run from the django_backend directory with:
+python inventory/benchmarks/export_benchmark.py [--sizes 10000,100000,1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, seed_products
+
+from django.test import Client
+from inventory.models import Product
+
+
+def profile(client, url):
+    """
+    (first byte ms, total ms, bytes, peak MiB) for consuming a response
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url)
+    first_byte = None
+    size = 0
+    chunks = response.streaming_content if response.streaming else [response.content]
+    for chunk in chunks:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_byte * 1000, total * 1000, size, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming export memory profile')
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--list-max', type=int, default=100000)
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    client = Client()
+    peaks = {}
+
+    with benchmark_database():
+        # First requests pay one-off imports and URL resolver setup - keep them out of the profile
+        client.get('/api/manager/export-products/ndjson/', {'category': 'warmup'})
+        client.get('/api/products/', {'page_size': 1})
+
+        seeded = 0
+        for size in sizes:
+            seed_products(size - seeded)
+            seeded = Product.objects.count()
+            print(f"\n📤 {size:,} products")
+
+            endpoints = [
+                ('ndjson export', '/api/manager/export-products/ndjson/'),
+                ('csv export', '/api/manager/export-products/csv/'),
+            ]
+            if size <= args.list_max:
+                endpoints.append(('full list (JSON)', '/api/products/'))
+
+            for label, url in endpoints:
+                first_byte, total, size_bytes, peak = profile(client, url)
+                peaks.setdefault(label, []).append(peak)
+                print(f"   {label:<17} first byte {first_byte:8.1f} ms | total {total / 1000:6.2f} s | "
+                      f"{size_bytes / 1024 / 1024:7.1f} MiB sent | peak {peak:6.1f} MiB")
+
+    # Streaming exports must not grow with the catalog
+    for label in ('ndjson export', 'csv export'):
+        smallest, largest = peaks[label][0], peaks[label][-1]
+        if largest > smallest * 1.5 + 1:
+            print(f"❌ {label} peak grew from {smallest:.1f} to {largest:.1f} MiB")
+            sys.exit(1)
+    print("\n✅ Export memory stayed flat across catalog sizes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Typo-tolerant search benchmark - trigram word index vs scanning every product name
+Reports the index build time and fuzzy layer size, and the latency of misspelled
+queries against a brute-force trigram comparison with every row. It also checks
+incremental create/delete and that SEARCH_FUZZY_MAX_TRIGRAMS bounds the layer.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/fuzzy_search_benchmark.py [--products 100000] [--repeat 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, percentile
+from inventory.benchmarks.search_benchmark import seed
+
+from django.conf import settings
+from inventory.models import Product
+from inventory.search_index import index, trigrams
+
+# (typed query, word the top hit must contain)
+QUERIES = [
+    ('basmti rice', 'basmati'),
+    ('garam masla', 'masala'),
+    ('tooor dal', 'toor'),
+    ('haldirm', 'haldiram'),
+    ('chiken masala', 'chicken'),
+    ('aashirvad atta', 'aashirvaad'),
+]
+
+
+def brute_force(query, limit=20):
+    """
+    Trigram similarity of the query against every product name - the scan the index avoids
+    """
+    wanted = trigrams(query.lower())
+    scored = []
+    for product_id, name in Product.objects.values_list('id', 'name').iterator(chunk_size=5000):
+        grams = trigrams(name.lower())
+        shared = len(wanted & grams)
+        scored.append((shared / (len(wanted) + len(grams) - shared), product_id))
+    scored.sort(reverse=True)
+    return [product_id for _, product_id in scored[:limit]]
+
+
+def latency(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 50), percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fuzzy search benchmark')
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed(args.products)
+        index.reset()
+        start = time.perf_counter()
+        index.search('warmup')
+        stats = index.stats()
+        print(f"🔤 Fuzzy search - {args.products:,} products")
+        print(f"   Index build (prefix + trigram layer): {time.perf_counter() - start:.2f}s | "
+              f"{stats['fuzzy_words']} words, {stats['fuzzy_trigram_entries']} trigram entries, "
+              f"{stats['fuzzy_skipped']} skipped")
+
+        print(f"\n   {'query':<16} {'index p50/p99 ms':>18} {'full scan ms':>13}  correction / top hit")
+        failures = 0
+        for query, expected in QUERIES:
+            p50, p99 = latency(lambda: index.fuzzy_search(query), args.repeat)
+            scan_p50, _ = latency(lambda: brute_force(query), 1)
+            ids, corrections = index.fuzzy_search(query, limit=1)
+            top = Product.objects.get(id=ids[0]).name if ids else '-'
+            ok = expected in top.lower()
+            failures += not ok
+            print(f"   {query:<16} {p50:8.3f} /{p99:8.3f} {scan_p50:13.1f}  "
+                  f"{corrections} / {top} {'✅' if ok else '❌'}")
+
+        # Incremental maintenance - new words become fuzzy-searchable without a rebuild
+        builds = index.stats()['builds']
+        start = time.perf_counter()
+        product = Product.objects.create(name='Kashmiri Kahwa', category='Beverages', selling_price=250, stock=5)
+        created_ms = (time.perf_counter() - start) * 1000
+        found = index.fuzzy_search('kashmiri kahva')[0][:1] == [product.id]
+        product.delete()
+        gone = not index.fuzzy_search('kahva')[0]
+        rebuilt = index.stats()['builds'] != builds
+        print(f"\n   Create + incremental update: {created_ms:.2f} ms | found by typo: {found} | "
+              f"gone after delete: {gone} | rebuilt: {rebuilt}")
+        failures += (not found) + (not gone) + rebuilt
+
+        # Memory budget - a tiny budget admits only the most frequent words
+        settings.SEARCH_FUZZY_MAX_TRIGRAMS = 500
+        index.reset()
+        index.search('warmup')
+        stats = index.stats()
+        print(f"   Budget of 500 entries: {stats['fuzzy_trigram_entries']} used | {stats['fuzzy_words']} words kept | "
+              f"{stats['fuzzy_skipped']} skipped")
+        failures += stats['fuzzy_trigram_entries'] > 500
+
+        if failures:
+            print(f"❌ {failures} check(s) failed")
+            sys.exit(1)
+        print("✅ All fuzzy checks passed")
+
+
+if __name__ == "__main__":
+    main()
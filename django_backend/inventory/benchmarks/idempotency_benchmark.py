@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Retry-storm load test for the Idempotency-Key layer
+Every logical restock request is fired several times concurrently (as a flaky
+mobile network would), with and without an Idempotency-Key header.
+Shows how many retries were absorbed as replays and that stock moved once per logical request.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/idempotency_benchmark.py [--requests 300] [--retries 5] [--workers 16]
+"""
+
+import argparse
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, seed_products, percentile
+
+from django.db import connection
+from django.db.models import Sum
+from rest_framework.test import APIClient
+from inventory.models import Product, IdempotencyKey
+
+
+def run_storm(attempts, workers, use_keys):
+    work = queue.Queue()
+    for attempt in attempts:
+        work.put(attempt)
+
+    stats = {'applied': 0, 'replayed': 0, 'in_progress': 0, 'other': 0}
+    fresh_latencies = []
+    replay_latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        client = APIClient()
+        try:
+            while True:
+                try:
+                    key, product_id = work.get_nowait()
+                except queue.Empty:
+                    return
+                headers = {'HTTP_IDEMPOTENCY_KEY': key} if use_keys else {}
+                start = time.perf_counter()
+                response = client.post(
+                    '/api/manager/restock-product/',
+                    {'productId': product_id, 'quantity': 1},
+                    format='json',
+                    **headers
+                )
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if response.status_code == 200 and response.get('Idempotent-Replayed'):
+                        stats['replayed'] += 1
+                        replay_latencies.append(elapsed)
+                    elif response.status_code == 200:
+                        stats['applied'] += 1
+                        fresh_latencies.append(elapsed)
+                    elif response.status_code == 409:
+                        stats['in_progress'] += 1
+                    else:
+                        stats['other'] += 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats, time.perf_counter() - start, fresh_latencies, replay_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Idempotency retry storm benchmark')
+    parser.add_argument('--requests', type=int, default=300, help='Logical restock requests')
+    parser.add_argument('--retries', type=int, default=5, help='Copies sent of each logical request')
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed_products(50, stock=0)
+        product_ids = list(Product.objects.values_list('id', flat=True))
+
+        logical = [(uuid.uuid4().hex, random.choice(product_ids)) for _ in range(args.requests)]
+        attempts = [request for request in logical for _ in range(args.retries)]
+        random.shuffle(attempts)
+
+        for use_keys in (False, True):
+            Product.objects.update(stock=0, in_stock=False)
+            IdempotencyKey.objects.all().delete()
+
+            stats, elapsed, fresh, replays = run_storm(attempts, args.workers, use_keys)
+            total_stock = Product.objects.aggregate(total=Sum('stock'))['total']
+
+            label = 'With Idempotency-Key' if use_keys else 'Without Idempotency-Key'
+            print(f"\n🌩️  {label}: {len(attempts)} requests ({args.requests} logical x {args.retries})")
+            print(f"   Throughput: {len(attempts) / elapsed:.0f} req/sec ({elapsed:.2f}s)")
+            print(f"   Applied: {stats['applied']} | Replayed: {stats['replayed']} | "
+                  f"In progress (409): {stats['in_progress']} | Other: {stats['other']}")
+            print(f"   Units restocked: {total_stock} (expected {args.requests})")
+            if fresh:
+                print(f"   Fresh p50: {percentile(fresh, 50) * 1000:.2f} ms")
+            if replays:
+                print(f"   Replay p50: {percentile(replays, 50) * 1000:.2f} ms")
+
+            if use_keys and total_stock != args.requests:
+                print("❌ Retries were applied more than once")
+                sys.exit(1)
+
+        print("\n✅ Every logical request was applied exactly once with idempotency keys")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Low stock alert evaluation - per-product probe loop vs set-based check_and_send_alerts
+Seeds N products with a fraction at or below the threshold and runs both versions
+with WhatsApp sending stubbed out, so only the database work is measured:
+- first run: every low stock product needs an alert
+- steady state: every low stock product already has one (the usual repeat call)
+- partial: a few products restocked and a few newly low (through the stock service,
+  so the restocks resolve their alerts at write time)
+Reports queries and wall time for each, and checks both produce the same alerts.
+Then compares write-time crossing detection with a full scan: what a sale costs
+with and without threshold checks, against one check_and_send_alerts pass.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/low_stock_alert_benchmark.py [--products 100000] [--low 0.1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, percentile, seed_products
+
+from unittest import mock
+from django.db import connection
+from inventory.models import AlertOutbox, LowStockAlert, Product
+from inventory.stock_alerts import sync_alert_settings
+from inventory.stock_service import decrement_stock, increment_stock
+from inventory.whatsapp_service import WhatsAppService
+
+PHONE = '+910000000000'
+THRESHOLD = 10
+
+
+class StubbedService(WhatsAppService):
+    def send_low_stock_alert(self, manager_phone, product_name, current_stock, threshold):
+        return True
+
+
+def legacy_check_and_send_alerts(service, manager_phone, threshold):
+    """
+    The previous implementation: one probe per low stock product and one INSERT per alert
+    """
+    LowStockAlert.objects.filter(product__stock__gt=threshold, is_resolved=False).update(is_resolved=True)
+    alerts_sent = 0
+    for product in Product.objects.filter(stock__lte=threshold):
+        existing_unresolved_alert = LowStockAlert.objects.filter(
+            product=product, threshold_value=threshold, is_resolved=False
+        ).first()
+        if not existing_unresolved_alert:
+            if service.send_low_stock_alert(manager_phone, product.name, product.stock, threshold):
+                LowStockAlert.objects.create(
+                    product=product, threshold_value=threshold, stock_at_alert=product.stock,
+                    manager_phone=manager_phone, is_resolved=False
+                )
+                alerts_sent += 1
+    return alerts_sent
+
+
+def set_stock(low_ids):
+    """
+    Put exactly low_ids at or below the threshold (single UPDATEs, not timed)
+    """
+    Product.objects.update(stock=100)
+    ids = list(low_ids)
+    for start in range(0, len(ids), 5000):
+        Product.objects.filter(id__in=ids[start:start + 5000]).update(stock=THRESHOLD // 2)
+
+
+def churn(restocked, newly_low):
+    """
+    Restock and sell down through the stock service, as the app would (not timed)
+    """
+    for product_id in restocked:
+        increment_stock(product_id, 100)
+    decrement_stock([{'productId': product_id, 'quantity': 100 - THRESHOLD // 2} for product_id in newly_low])
+
+
+def sales(ids, count, rng):
+    """
+    count single-line sales; returns (per-sale ms, queries)
+    """
+    latencies, queries = [], 0
+    for _ in range(count):
+        sent, sale_queries, elapsed = timed(lambda: decrement_stock([{'productId': rng.choice(ids), 'quantity': 1}]))
+        latencies.append(elapsed)
+        queries += sale_queries
+    return latencies, queries
+
+
+def write_time_detection(args, ids, rng):
+    """
+    Sale latency with and without threshold crossing checks
+    """
+    LowStockAlert.objects.all().delete()
+    AlertOutbox.objects.all().delete()
+    sync_alert_settings({'whatsappAlertsEnabled': True, 'contact': PHONE, 'lowStockThreshold': THRESHOLD})
+    Product.objects.update(stock=THRESHOLD + 1 + args.sales)  # No sale crosses: the common case
+    with mock.patch('inventory.stock_service.stock_levels_changed'):
+        without, queries_without = sales(ids, args.sales, rng)
+    with_checks, queries_with = sales(ids, args.sales, rng)
+
+    Product.objects.update(stock=THRESHOLD + 1)  # Every sale crosses
+    crossing, queries_crossing = sales(ids, args.sales, rng)
+    alerts = AlertOutbox.objects.filter(kind=AlertOutbox.LOW_STOCK_ALERT).count()
+    return [
+        ('no threshold checks', without, queries_without),
+        ('checks, no crossing', with_checks, queries_with),
+        ('checks, every sale crosses', crossing, queries_crossing),
+    ], alerts
+
+
+def timed(check):
+    """
+    Run check once; returns (alerts sent, queries, ms)
+    Queries are counted with a wrapper because Django's query log is capped at 9000 entries
+    """
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        sent = check()
+        elapsed = (time.perf_counter() - start) * 1000
+    return sent, queries, elapsed
+
+
+def open_alerts():
+    return set(LowStockAlert.objects.filter(is_resolved=False).values_list('product_id', 'threshold_value'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Low stock alert evaluation benchmark')
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--low', type=float, default=0.1, help='fraction of products at or below threshold')
+    parser.add_argument('--churn', type=int, default=100, help='products restocked / newly low in the partial run')
+    parser.add_argument('--sales', type=int, default=500, help='single-line sales timed per write-time scenario')
+    args = parser.parse_args()
+
+    service = StubbedService()
+    rng = random.Random(3)
+    versions = {
+        'per-product loop': lambda: legacy_check_and_send_alerts(service, PHONE, THRESHOLD),
+        'set-based': lambda: service.check_and_send_alerts(PHONE, THRESHOLD),
+    }
+
+    with benchmark_database():
+        seed_products(args.products)
+        ids = list(Product.objects.values_list('id', flat=True))
+        low = set(rng.sample(ids, int(len(ids) * args.low)))
+        restocked = set(rng.sample(sorted(low), args.churn))
+        newly_low = set(rng.sample(sorted(set(ids) - low), args.churn))
+        print(f"🔔 Low stock alerts - {len(ids):,} products, {len(low):,} at or below {THRESHOLD}")
+
+        results, final_alerts = {}, {}
+        for name, check in versions.items():
+            LowStockAlert.objects.all().delete()
+            set_stock(low)
+            results[name, 'first run'] = timed(check)
+            results[name, 'steady state'] = timed(check)
+            churn(restocked, newly_low)
+            results[name, 'partial'] = timed(check)
+            final_alerts[name] = open_alerts()
+
+        print(f"\n   {'run':<13} | {'version':<17} {'alerts':>7} {'queries':>8} {'ms':>9}")
+        for run in ('first run', 'steady state', 'partial'):
+            for name in versions:
+                sent, queries, elapsed = results[name, run]
+                print(f"   {run:<13} | {name:<17} {sent:7,} {queries:8,} {elapsed:9.1f}")
+
+        same = final_alerts['per-product loop'] == final_alerts['set-based']
+        steady_queries = results['set-based', 'steady state'][1]
+        if not same or steady_queries > 3:
+            print("❌ Alert sets differ or the set-based check is not O(1) queries")
+            sys.exit(1)
+        print(f"\n✅ Same {len(final_alerts['set-based']):,} open alerts from both versions")
+
+        _, scan_queries, scan_ms = results['set-based', 'steady state']
+        scenarios, alerts = write_time_detection(args, ids, rng)
+        print(f"\n   {'sale (1 line)':<27} | {'p50 ms':>7} {'p99 ms':>7} {'queries/sale':>13}")
+        for name, latencies, queries in scenarios:
+            print(f"   {name:<27} | {percentile(latencies, 50):7.2f} {percentile(latencies, 99):7.2f} "
+                  f"{queries / args.sales:13.1f}")
+        print(f"   {args.sales} crossing sales queued {alerts} alerts | "
+              f"one set-based scan (steady state): {scan_ms:,.1f} ms, {scan_queries} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Manager profile lookups - per-call requests.get vs pooled session vs the TTL cache
+Serves /manager/profile from a local stub of the Node server in its own process
+(--node-latency per response) and times N lookups per version, from --threads
+threads at once:
+- legacy: requests.get with no session and no timeout (the previous code)
+- pooled: the shared keep-alive session with timeouts, no cache
+- cached: get_manager_profile_from_mongodb() through the TTL cache
+Then stalls the stub (--stall seconds per response) and times one lookup with
+a cold cache (bounded by the read timeout), a stale cache (served at once while
+it refreshes in the background) and the legacy call (waits out the stall).
+
+Run from the django_backend directory with:
+python inventory/benchmarks/manager_profile_benchmark.py [--lookups 2000] [--threads 16] [--node-latency 0.005]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import percentile
+
+import logging
+import requests
+from django.conf import settings
+from inventory.manager_profile import fetch_manager_profile, profile_cache
+from inventory.outbound import NODE, dependency
+from inventory.views import get_manager_profile_from_mongodb
+
+PROFILE = {
+    'success': True,
+    'manager': {'name': 'Store Manager', 'contact': '+910000000000', 'lowStockThreshold': 10,
+                'whatsappAlertsEnabled': True, 'storeSettings': {'storeName': 'StoreZen'}},
+}
+
+
+class StubNode(BaseHTTPRequestHandler):
+    """
+    GET /manager/profile after server.delay seconds; GET /stats returns and resets the
+    request/connection counters, POST /delay/<seconds> changes the delay
+    """
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like Express
+    disable_nagle_algorithm = True  # Headers and body are separate writes - avoid delayed-ACK stalls on kept-alive sockets
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def reply(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass  # The client timed out and went away
+
+    def do_GET(self):
+        if self.path == '/stats':
+            stats = {'requests': self.server.requests, 'connections': self.server.connections - 1}
+            self.server.requests = self.server.connections = 0
+            self.close_connection = True
+            return self.reply(stats)
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        self.reply(PROFILE)
+
+    def do_POST(self):
+        self.server.delay = float(self.path.rsplit('/', 1)[1])
+        self.close_connection = True
+        self.reply({})
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, delay):
+    """
+    Stub Node process
+    """
+    ThreadingHTTPServer.request_queue_size = 128  # Legacy opens a connection per lookup
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubNode)
+    server.daemon_threads = True
+    server.delay, server.requests, server.connections = delay, 0, 0
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def stub_stats():
+    return requests.get(f'{settings.NODE_SERVER_URL}/stats').json()
+
+
+def set_delay(seconds):
+    requests.post(f'{settings.NODE_SERVER_URL}/delay/{seconds}')
+
+
+def legacy_lookup():
+    """
+    The previous implementation
+    """
+    response = requests.get(f'{settings.NODE_SERVER_URL}/manager/profile')
+    return response.json().get('manager') if response.status_code == 200 else None
+
+
+def timed(lookup, count, threads):
+    """
+    Run count lookups from threads threads; returns (per-lookup ms, lookups/s)
+    """
+    def one(_):
+        start = time.perf_counter()
+        assert lookup() is not None
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(one, range(count)))
+    return latencies, count / (time.perf_counter() - start)
+
+
+def once_ms(lookup):
+    start = time.perf_counter()
+    try:
+        result = lookup()
+    except requests.RequestException as e:
+        result = type(e).__name__
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manager profile lookup benchmark')
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--node-latency', type=float, default=0.005, help='stub response time in seconds')
+    parser.add_argument('--stall', type=float, default=10, help='stub response time while stalled')
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.node_latency)
+        return
+
+    port = free_port()
+    stub = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', str(port),
+                             '--node-latency', str(args.node_latency)])
+    try:
+        run(args, port)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+def run(args, port):
+    settings.NODE_SERVER_URL = f'http://127.0.0.1:{port}'
+    settings.OUTBOUND_DEPENDENCIES[NODE]['max_concurrent'] = args.threads
+    for _ in range(100):
+        try:
+            stub_stats()
+            break
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    logging.getLogger('inventory.manager_profile').setLevel(logging.ERROR)
+    print(f"👤 Manager profile lookups - {args.lookups} per version from {args.threads} threads, "
+          f"stub Node {args.node_latency * 1000:.0f} ms/response")
+
+    versions = {'legacy': legacy_lookup, 'pooled': fetch_manager_profile, 'cached': get_manager_profile_from_mongodb}
+    print(f"\n   {'version':<7} | {'p50 ms':>7} {'p99 ms':>7} {'lookups/s':>10} {'node calls':>11} {'connections':>12}")
+    for name, lookup in versions.items():
+        dependency(NODE)  # Pool created outside the timing
+        stub_stats()
+        latencies, rate = timed(lookup, args.lookups, args.threads)
+        stats = stub_stats()
+        print(f"   {name:<7} | {percentile(latencies, 50):7.2f} {percentile(latencies, 99):7.2f} {rate:10,.0f} "
+              f"{stats['requests']:11,} {stats['connections']:12,}")
+
+    # Node stalls: what one request waits for
+    set_delay(args.stall)
+    timeout = dependency(NODE).timeout
+    print(f"\n   Node stalled for {args.stall:.0f} s per response (timeouts: connect {timeout[0]:.0f} s, read {timeout[1]:.0f} s)")
+    profile_cache._fetched_at -= settings.MANAGER_PROFILE_CACHE_SECONDS + 1
+    elapsed, result = once_ms(get_manager_profile_from_mongodb)
+    print(f"   {'stale cache':<12} | {elapsed:9.2f} ms -> {'profile' if isinstance(result, dict) else result}")
+    profile_cache.reset()
+    elapsed, result = once_ms(get_manager_profile_from_mongodb)
+    print(f"   {'cold cache':<12} | {elapsed:9.2f} ms -> {'profile' if isinstance(result, dict) else result} (read timeout)")
+    elapsed, result = once_ms(legacy_lookup)
+    print(f"   {'legacy':<12} | {elapsed:9.2f} ms -> {'profile' if isinstance(result, dict) else result}")
+
+
+if __name__ == "__main__":
+    main()
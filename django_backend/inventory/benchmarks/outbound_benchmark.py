@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+One slow provider vs the whole worker pool - unguarded requests vs outbound dependencies
+A fixed pool of --workers threads (like gunicorn/runserver threads) serves --requests
+requests arriving at --rate per second; --slow-share of them call a stalled payment provider (stub /slow, --stall
+seconds per response) and the rest a healthy Node server (stub /fast, 5 ms).
+- unguarded: requests.get with no timeout and no limit (the previous behaviour)
+- guarded: the razorpay and node dependencies from inventory/outbound.py - the stalled
+  provider gets --bulkhead concurrent calls and a --read-timeout, then its circuit opens
+Reports throughput, healthy-request latency and what happened to the slow calls.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/outbound_benchmark.py [--workers 16] [--requests 1000] [--stall 3]
+"""
+
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import percentile
+
+import logging
+import requests
+from django.conf import settings
+from inventory.outbound import NODE, RAZORPAY, CircuitOpen, BulkheadFull, dependency
+
+
+class Stub(BaseHTTPRequestHandler):
+    """
+    /fast answers after 5 ms, /slow after server.stall seconds
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(self.server.stall if self.path == '/slow' else 0.005)
+        body = b'{"success": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass  # The client timed out and went away
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, stall):
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer(('127.0.0.1', port), Stub)
+    server.daemon_threads = True
+    server.stall = stall
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_mode(args, base, guarded):
+    """
+    Serve the request mix from args.workers threads
+    Returns (req/s, seconds, healthy request latencies in ms, slow call outcomes); latency runs from
+    submission, so time spent queued behind workers stuck on the stalled provider counts
+    """
+    rng = random.Random(7)
+    plan = ['/slow' if rng.random() < args.slow_share else '/fast' for _ in range(args.requests)]
+
+    def handle(path):
+        try:
+            if guarded:
+                dependency(RAZORPAY if path == '/slow' else NODE).session.get(base + path)
+            else:
+                requests.get(base + path)
+            outcome = 'ok'
+        except CircuitOpen:
+            outcome = 'circuit open'
+        except BulkheadFull:
+            outcome = 'bulkhead full'
+        except requests.Timeout:
+            outcome = 'timed out'
+        return outcome, time.perf_counter()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = []
+        for i, path in enumerate(plan):
+            time.sleep(max(0, start + i / args.rate - time.perf_counter()))
+            futures.append((path, time.perf_counter(), pool.submit(handle, path)))
+        results = [(path, submitted, *future.result()) for path, submitted, future in futures]
+    elapsed = time.perf_counter() - start
+
+    healthy, outcomes = [], {}
+    for path, submitted, outcome, finished in results:
+        if path == '/fast':
+            healthy.append((finished - submitted) * 1000)
+        else:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return args.requests / elapsed, elapsed, healthy, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Outbound dependency isolation benchmark')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=200, help='requests arriving per second')
+    parser.add_argument('--slow-share', type=float, default=0.1, help='fraction of requests calling the stalled provider')
+    parser.add_argument('--stall', type=float, default=3)
+    parser.add_argument('--bulkhead', type=int, default=2, help='concurrent calls allowed to the stalled provider')
+    parser.add_argument('--read-timeout', type=float, default=1)
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.stall)
+        return
+
+    port = free_port()
+    stub = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', str(port), '--stall', str(args.stall)])
+    try:
+        run(args, f'http://127.0.0.1:{port}')
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+def run(args, base):
+    for _ in range(100):
+        try:
+            requests.get(base + '/fast')
+            break
+        except requests.ConnectionError:
+            time.sleep(0.1)
+
+    settings.OUTBOUND_DEPENDENCIES[RAZORPAY].update(read_timeout=args.read_timeout, max_concurrent=args.bulkhead)
+    settings.OUTBOUND_DEPENDENCIES[NODE].update(max_concurrent=args.workers)
+    settings.OUTBOUND_BULKHEAD_WAIT_SECONDS = 0.05
+    logging.getLogger('inventory.outbound').setLevel(logging.ERROR)
+
+    print(f"🧱 Outbound isolation - {args.workers} workers, {args.requests} requests at {args.rate:.0f}/s, "
+          f"{args.slow_share:.0%} to a provider stalled {args.stall:.0f} s")
+    print(f"\n   {'mode':<9} | {'req/s':>6} {'seconds':>8} {'healthy p50':>12} {'p99 ms':>8} | slow calls")
+    for mode in ('unguarded', 'guarded'):
+        rate, elapsed, healthy, outcomes = run_mode(args, base, mode == 'guarded')
+        slow = ', '.join(f'{count} {outcome}' for outcome, count in outcomes.items())
+        print(f"   {mode:<9} | {rate:6.0f} {elapsed:8.1f} {percentile(healthy, 50):12.1f} "
+              f"{percentile(healthy, 99):8.1f} | {slow}")
+
+    stats = dependency(RAZORPAY).stats()
+    print(f"\n   razorpay dependency: circuit {stats['circuit']} (opened {stats['circuit_opened']}x), "
+          f"rejected {stats['rejected']}, errors {stats['errors']}")
+
+
+if __name__ == "__main__":
+    main()
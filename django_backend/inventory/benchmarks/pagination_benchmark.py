@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Keyset vs offset pagination benchmark for the product list endpoints
+Measures first, middle and last page latency at several catalog sizes, plus
+the unpaginated full-list response for comparison.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/pagination_benchmark.py [--sizes 10000,100000,1000000] [--page-size 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, seed_products
+
+from rest_framework.test import APIClient
+from inventory.models import Product
+from inventory.pagination import KeysetPagination
+
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def bench_size(size, page_size, full_list_limit):
+    Product.objects.all().delete()
+    start = time.perf_counter()
+    seed_products(size)
+    print(f"\n📦 {size:,} products (seeded in {time.perf_counter() - start:.1f}s)")
+
+    client = APIClient()
+    paginator = KeysetPagination()
+
+    for ordering in ('id', 'category'):
+        fields = paginator.orderings[ordering]
+        ordered = Product.objects.order_by(*fields)
+        print(f"   ordering={ordering}")
+
+        for label, offset in (('first', 0), ('middle', size // 2), ('last', size - page_size)):
+            if offset:
+                values = list(ordered.values_list(*fields)[offset - 1])
+                cursor = paginator.encode_cursor(values)
+                params = {'page_size': page_size, 'cursor': cursor, 'ordering': ordering}
+            else:
+                params = {'page_size': page_size, 'ordering': ordering}
+
+            keyset_ms = best_of(lambda: client.get('/api/customer/products/', params))
+            offset_ms = best_of(lambda: list(ordered[offset:offset + page_size]))
+
+            response = client.get('/api/customer/products/', params)
+            assert response.status_code == 200 and len(response.json()['results']) == page_size
+
+            print(f"     {label:<6} page: keyset endpoint {keyset_ms:7.2f} ms | "
+                  f"OFFSET {offset:>9,} query only {offset_ms:7.2f} ms")
+
+    if size <= full_list_limit:
+        full_ms = best_of(lambda: client.get('/api/customer/products/'), repeat=1)
+        print(f"   Unpaginated full list: {full_ms:.0f} ms")
+    else:
+        print(f"   Unpaginated full list: skipped (> {full_list_limit:,} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keyset pagination benchmark')
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--full-list-limit', type=int, default=100000,
+                        help='Largest catalog for which the unpaginated list is timed')
+    args = parser.parse_args()
+
+    with benchmark_database():
+        for size in [int(s) for s in args.sizes.split(',')]:
+            bench_size(size, args.page_size, args.full_list_limit)
+
+
+if __name__ == "__main__":
+    main()
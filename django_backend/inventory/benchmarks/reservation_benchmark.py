@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Reservation throughput benchmark on a hot SKU
+Workers race to hold units of one product; half of the holds are committed
+as paid orders and the rest are left to expire and be swept.
+Reports reservations/sec, commit and sweep cost, and checks the counters add up.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/reservation_benchmark.py [--workers 16] [--attempts 200] [--hot-stock 1000]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, seed_products, percentile
+
+from django.db import connection
+from django.utils import timezone
+from inventory.models import Product, StockReservation
+from inventory.reservation_service import (
+    reserve_stock, attach_order, commit_reservations, release_expired_reservations
+)
+from inventory.stock_service import get_available_stock
+
+
+def run_worker(worker_id, hot_id, attempts, held_keys, latencies, lock):
+    keys = []
+    samples = []
+    try:
+        for attempt in range(attempts):
+            start = time.perf_counter()
+            key, _ = reserve_stock([{'productId': hot_id, 'quantity': 1}])
+            samples.append(time.perf_counter() - start)
+            if key:
+                attach_order(key, f"order_{worker_id}_{attempt}")
+                keys.append(f"order_{worker_id}_{attempt}")
+    finally:
+        connection.close()
+
+    with lock:
+        held_keys.extend(keys)
+        latencies.extend(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stock reservation throughput benchmark')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--attempts', type=int, default=200, help='Reservation attempts per worker')
+    parser.add_argument('--hot-stock', type=int, default=1000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed_products(100, stock=50)
+        hot_id = Product.objects.order_by('id').values_list('id', flat=True)[0]
+        Product.objects.filter(id=hot_id).update(stock=args.hot_stock)
+
+        order_ids = []
+        latencies = []
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=run_worker, args=(i, hot_id, args.attempts, order_ids, latencies, lock))
+            for i in range(args.workers)
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        total = args.workers * args.attempts
+        hot = Product.objects.get(id=hot_id)
+        print(f"🔒 Reservation attempts: {total} on one SKU with stock {args.hot_stock}")
+        print(f"   Throughput: {total / elapsed:.0f} attempts/sec ({elapsed:.2f}s)")
+        print(f"   Latency p50: {percentile(latencies, 50) * 1000:.2f} ms | "
+              f"p99: {percentile(latencies, 99) * 1000:.2f} ms")
+        print(f"   Held: {len(order_ids)} | reserved counter: {hot.reserved} | "
+              f"available: {get_available_stock([hot_id])[hot_id]}")
+
+        ok = len(order_ids) == min(total, args.hot_stock) == hot.reserved
+
+        # Commit half of the holds as paid orders
+        to_commit = order_ids[: len(order_ids) // 2]
+        start = time.perf_counter()
+        for order_id in to_commit:
+            commit_reservations(order_id)
+        commit_elapsed = time.perf_counter() - start
+        print(f"   Committed {len(to_commit)} orders at {len(to_commit) / max(commit_elapsed, 1e-9):.0f} commits/sec")
+
+        # Let the rest expire and sweep them
+        StockReservation.objects.filter(status=StockReservation.ACTIVE).update(expires_at=timezone.now())
+        start = time.perf_counter()
+        swept = 0
+        while True:
+            count = release_expired_reservations()
+            swept += count
+            if count == 0:
+                break
+        sweep_elapsed = time.perf_counter() - start
+        print(f"   Swept {swept} expired holds in {sweep_elapsed * 1000:.1f} ms")
+
+        hot.refresh_from_db()
+        print(f"   Final stock: {hot.stock} | reserved: {hot.reserved}")
+
+        ok = ok and hot.reserved == 0 and hot.stock == args.hot_stock - len(to_commit)
+        if not ok:
+            print("❌ Reservation counters do not add up")
+            sys.exit(1)
+        print("✅ Holds never exceeded stock and all counters reconcile")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Product search benchmark - in-process prefix index vs name__icontains scans
+Seeds realistic names (populate_products names x brands x pack sizes), then reports:
+- index build time and resident memory growth
+- per-query latency of the index alone, the /api/products/search/ endpoint and an
+  icontains query (every word must match, first 20 by name)
+
+Run from the django_backend directory with:
+python inventory/benchmarks/search_benchmark.py [--products 1000000] [--repeat 50]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, percentile
+
+from django.db.models import Q
+from rest_framework.test import APIClient
+from inventory.models import Product
+from inventory.populate_products import products as catalog
+from inventory.search_index import index
+
+BRANDS = ['Tata', 'Aashirvaad', 'Fortune', 'MDH', 'Everest', 'Patanjali', 'Amul', 'Haldiram', 'Daawat', 'Catch']
+PACKS = ['100g', '200g', '500g', '1kg', '2kg', '5kg', '250ml', '1l', 'Family Pack', 'Value Pack']
+QUERIES = ['basmati rice', 'garam mas', 'toor', 'tata 1kg', 'amul', 'masala', 'haldiram namkeen', 'b']
+
+
+def seed(count, batch_size=10000):
+    batch = []
+    for i in range(count):
+        base = catalog[i % len(catalog)]
+        brand = BRANDS[(i // len(catalog)) % len(BRANDS)]
+        pack = PACKS[(i // (len(catalog) * len(BRANDS))) % len(PACKS)]
+        batch.append(Product(
+            name=f"{brand} {base['name']} {pack}",
+            category=base['category'],
+            selling_price=base['price'],
+            cost_price=0,
+            stock=i % 50,
+            in_stock=i % 50 > 0,
+        ))
+        if len(batch) >= batch_size:
+            Product.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Product.objects.bulk_create(batch)
+
+
+def icontains(query, limit=20):
+    condition = Q()
+    for word in query.split():
+        condition &= Q(name__icontains=word) | Q(category__icontains=word)
+    return list(Product.objects.filter(condition).order_by('name').values_list('id', flat=True)[:limit])
+
+
+def timings(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 50), percentile(samples, 99)
+
+
+def max_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Product search benchmark')
+    parser.add_argument('--products', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        start = time.perf_counter()
+        seed(args.products)
+        print(f"🔍 Search benchmark - {args.products:,} products (seeded in {time.perf_counter() - start:.1f}s)")
+
+        index.reset()
+        rss_before = max_rss_mib()
+        start = time.perf_counter()
+        index.search('warmup')
+        print(f"   Index build: {(time.perf_counter() - start):.2f}s | max RSS +{max_rss_mib() - rss_before:.0f} MiB "
+              f"| {index.stats()}")
+
+        client = APIClient()
+        scan_repeat = max(1, args.repeat // 10)
+        print(f"\n   {'query':<18} {'index p50/p99 ms':>18} {'endpoint p50/p99 ms':>21} {'icontains p50 ms':>17}  top hit")
+        for query in QUERIES:
+            index_p50, index_p99 = timings(lambda: index.search(query), args.repeat)
+            api_p50, api_p99 = timings(lambda: client.get('/api/products/search/', {'q': query}), args.repeat)
+            scan_p50, _ = timings(lambda: icontains(query), scan_repeat)
+            results = client.get('/api/products/search/', {'q': query, 'limit': 1}).json()['results']
+            top = results[0]['name'] if results else '-'
+            print(f"   {query:<18} {index_p50:8.3f} /{index_p99:8.3f} {api_p50:10.3f} /{api_p99:8.3f} "
+                  f"{scan_p50:17.1f}  {top}")
+
+        # Incremental maintenance - a rename is searchable immediately, without a rebuild
+        product = Product.objects.first()
+        builds = index.stats()['builds']
+        start = time.perf_counter()
+        product.name = 'Zafrani Kesar Special'
+        product.save()
+        update_ms = (time.perf_counter() - start) * 1000
+        found = index.search('zafrani kesar') == [product.id]
+        rebuilt = index.stats()['builds'] != builds
+        print(f"\n   Rename + incremental index update: {update_ms:.2f} ms | searchable: {found} | rebuilt: {rebuilt}")
+        if not found or rebuilt:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
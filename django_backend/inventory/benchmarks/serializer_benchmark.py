@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Serializer micro-benchmark - DRF ModelSerializer vs values_list() list mode
+For ProductSerializer (manager) and CustomerProductSerializer (customer) it times:
+- drf: Serializer(queryset, many=True).data + JSONRenderer (current behaviour)
+- list mode: ValuesListSerializer + JSONRenderer
+- list mode + orjson: ValuesListSerializer + FastJSONRenderer
+and checks that every variant renders exactly the same bytes.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/serializer_benchmark.py [--sizes 1000,100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, seed_products
+
+from rest_framework.renderers import JSONRenderer
+from inventory.models import Product
+from inventory.renderers import FastJSONRenderer, orjson
+from inventory.serializers import (
+    ProductSerializer, CustomerProductSerializer, product_list_serializer, customer_product_list_serializer
+)
+
+# Names and prices that exercise escaping and Decimal formatting
+EDGE_CASES = [
+    ('Quote "and" back\\slash', Decimal('0.10')),
+    ('Unicode – चाय ☕ 🍵', Decimal('1234567.89')),
+    ('Line separator and\ttab\ncontrol\x01', Decimal('0.00')),
+    ('</script> & slash/', Decimal('5.05')),
+]
+
+
+def best_of(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def seed(size):
+    Product.objects.all().delete()
+    seed_products(size - len(EDGE_CASES))
+    for name, price in EDGE_CASES:
+        Product.objects.create(name=name, category='Edge', selling_price=price, cost_price=Decimal('0.03'), stock=3)
+
+
+def bench(label, serializer_class, list_serializer, repeat):
+    queryset = Product.objects.order_by('id')
+    drf = JSONRenderer()
+    fast = FastJSONRenderer()
+
+    variants = [
+        ('drf', lambda: drf.render(serializer_class(queryset, many=True).data)),
+        ('list mode', lambda: drf.render(list_serializer.serialize(list_serializer.project(queryset)))),
+        ('list mode + orjson', lambda: fast.render(list_serializer.serialize(list_serializer.project(queryset)))),
+    ]
+
+    baseline_ms, expected = None, None
+    for name, func in variants:
+        elapsed, body = best_of(func, repeat)
+        if expected is None:
+            baseline_ms, expected = elapsed, body
+        elif body != expected:
+            print(f"❌ {label} / {name}: output differs from the DRF serializer")
+            sys.exit(1)
+        print(f"   {label:<9} {name:<19} {elapsed:9.1f} ms | x{baseline_ms / elapsed:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serializer micro-benchmark')
+    parser.add_argument('--sizes', default='1000,100000')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("⚠️ orjson is not installed - FastJSONRenderer falls back to json.dumps")
+
+    with benchmark_database():
+        for size in [int(s) for s in args.sizes.split(',')]:
+            seed(size)
+            print(f"\n📦 {size:,} products")
+            bench('manager', ProductSerializer, product_list_serializer, args.repeat)
+            bench('customer', CustomerProductSerializer, customer_product_list_serializer, args.repeat)
+
+    print("\n✅ All variants rendered byte-identical JSON")
+
+
+if __name__ == "__main__":
+    main()
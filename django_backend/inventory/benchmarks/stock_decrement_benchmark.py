@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress benchmark for stock_service.decrement_stock
+Many workers check out the same hot SKU (plus a few random SKUs) at once.
+Reports checkouts per second and verifies that stock is never oversold.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/stock_decrement_benchmark.py [--workers 16] [--checkouts 200] [--hot-stock 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, seed_products, percentile
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from inventory.models import Product
+from inventory.stock_service import decrement_stock, APPLIED
+
+
+def run_worker(hot_id, other_ids, checkouts, cart_size, results, latencies, lock):
+    applied_hot = 0
+    failed = 0
+    samples = []
+    rng = random.Random()
+
+    try:
+        for _ in range(checkouts):
+            cart = [{'productId': hot_id, 'quantity': 1}]
+            cart += [{'productId': pid, 'quantity': 1} for pid in rng.sample(other_ids, cart_size - 1)]
+
+            start = time.perf_counter()
+            lines = decrement_stock(cart)
+            samples.append(time.perf_counter() - start)
+
+            hot_line = next(line for line in lines if line.get('product_id') == hot_id)
+            if hot_line['status'] == APPLIED:
+                applied_hot += 1
+            else:
+                failed += 1
+    finally:
+        connection.close()
+
+    with lock:
+        results['applied_hot'] += applied_hot
+        results['failed'] += failed
+        latencies.extend(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stock decrement concurrency benchmark')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--checkouts', type=int, default=200, help='Checkouts per worker')
+    parser.add_argument('--cart-size', type=int, default=5)
+    parser.add_argument('--hot-stock', type=int, default=500, help='Initial stock of the contended SKU')
+    parser.add_argument('--catalog', type=int, default=1000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed_products(args.catalog, stock=10 ** 6)
+        ids = list(Product.objects.values_list('id', flat=True))
+        hot_id = ids[0]
+        Product.objects.filter(id=hot_id).update(stock=args.hot_stock, in_stock=args.hot_stock > 0)
+        other_ids = ids[1:]
+
+        # Query count for a single cart (fast path)
+        sample_cart = [{'productId': pid, 'quantity': 1} for pid in other_ids[:40]]
+        with CaptureQueriesContext(connection) as ctx:
+            decrement_stock(sample_cart)
+        print(f"📊 Queries for a 40-line cart: {len(ctx.captured_queries)} (including transaction statements)")
+
+        results = {'applied_hot': 0, 'failed': 0}
+        latencies = []
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(
+                target=run_worker,
+                args=(hot_id, other_ids, args.checkouts, args.cart_size, results, latencies, lock)
+            )
+            for _ in range(args.workers)
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        hot = Product.objects.get(id=hot_id)
+        total = args.workers * args.checkouts
+        expected_sold = min(args.hot_stock, total)
+
+        print(f"\n🛒 Workers: {args.workers} | Checkouts: {total} | Cart size: {args.cart_size}")
+        print(f"   Throughput: {total / elapsed:.0f} checkouts/sec ({elapsed:.2f}s)")
+        print(f"   Latency p50: {percentile(latencies, 50) * 1000:.2f} ms | "
+              f"p99: {percentile(latencies, 99) * 1000:.2f} ms")
+        print(f"   Hot SKU sold: {results['applied_hot']} | rejected: {results['failed']} | "
+              f"final stock: {hot.stock} | in_stock: {hot.in_stock}")
+
+        oversold = results['applied_hot'] != expected_sold or hot.stock != args.hot_stock - expected_sold or hot.stock < 0
+        if oversold or hot.in_stock != (hot.stock > 0):
+            print("❌ Stock invariant violated")
+            sys.exit(1)
+        print("✅ No oversell - sold units match initial stock exactly")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Stock push fan-out load test - thousands of SSE subscribers on one in-process broker
+Each connection is the real /api/events/stock/ stream generator on one event loop (no sockets),
+subscribed to one category or the whole catalog. A writer thread runs checkouts through
+decrement_stock, and every committed round is pushed to the subscribers. It reports:
+- time from checkout to delivery on every matching connection (p50/p99/max)
+- events delivered vs what the same freshness would cost in full-list polls
+- slow consumers (reading every --slow-delay seconds): conflation, resyncs and buffer sizes
+
+Run from the django_backend directory with:
+python inventory/benchmarks/stock_push_benchmark.py [--connections 5000] [--slow 0.05] [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sys
+import time
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import benchmark_database, percentile, seed_products
+
+from django.conf import settings
+from inventory.models import Product
+from inventory.stock_events import broker, event_stream
+from inventory.stock_service import decrement_stock
+
+CATEGORIES = ['Groceries', 'Spices', 'Snacks', 'Beverages', 'Dairy', 'Personal Care']
+
+
+class Connection:
+    def __init__(self, categories, delay):
+        self.categories = categories
+        self.delay = delay
+        self.arrivals = []
+        self.frames = 0
+        self.resyncs = 0
+
+
+async def consume(connection, stop):
+    stream = event_stream(connection.categories)
+    try:
+        async for chunk in stream:
+            if stop.is_set():
+                return
+            if chunk.startswith(b'event:'):
+                connection.arrivals.append(time.perf_counter())
+                connection.frames += chunk.count(b'\n\n')
+                connection.resyncs += chunk.count(b'event: resync')
+            if connection.delay:
+                await asyncio.sleep(connection.delay)
+    finally:
+        await stream.aclose()
+
+
+def checkout_round(product_ids, lines):
+    """
+    One round of single-line checkouts; returns [(product id, checkout start time)]
+    The push can land before decrement_stock returns, so latency is timed from the call
+    """
+    commits = []
+    for product_id in random.sample(product_ids, lines):
+        commits.append((product_id, time.perf_counter()))
+        decrement_stock([{'productId': product_id, 'quantity': 1}])
+    return commits
+
+
+async def run(args, product_ids, categories_by_id):
+    rng = random.Random(11)
+    connections = []
+    for i in range(args.connections):
+        categories = None if i % 10 == 0 else [rng.choice(CATEGORIES)]
+        delay = args.slow_delay if rng.random() < args.slow else 0
+        connections.append(Connection(categories, delay))
+
+    stop = asyncio.Event()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    tasks = [asyncio.create_task(consume(connection, stop)) for connection in connections]
+    await asyncio.sleep(0.5)  # Let every stream subscribe
+    print(f"   {broker.stats()['subscribers']:,} subscribers, max RSS +"
+          f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - rss_before:.0f} MiB")
+
+    loop = asyncio.get_running_loop()
+    rounds = []
+    for _ in range(args.rounds):
+        started = time.perf_counter()
+        commits = await loop.run_in_executor(None, checkout_round, product_ids, args.lines)
+        rounds.append((started, [(categories_by_id[product_id], committed) for product_id, committed in commits]))
+        await asyncio.sleep(args.interval)
+    await asyncio.sleep(max(1.0, args.slow_delay * 2))
+
+    # Delivery latency: first matching checkout of a round -> first arrival on the connection
+    latencies, expected = [], 0
+    for connection in connections:
+        if connection.delay:
+            continue
+        for index, (_, commits) in enumerate(rounds):
+            matching = [t for category, t in commits if connection.categories is None or category in connection.categories]
+            if not matching:
+                continue
+            expected += 1
+            committed = matching[0]
+            window_end = rounds[index + 1][0] if index + 1 < len(rounds) else float('inf')
+            arrived = next((t for t in connection.arrivals if committed <= t < window_end), None)
+            if arrived is not None:
+                latencies.append((arrived - committed) * 1000)
+
+    stats = broker.stats()
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return connections, latencies, expected, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stock push fan-out load test')
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--lines', type=int, default=5, help='checkouts per round')
+    parser.add_argument('--interval', type=float, default=0.2, help='seconds between rounds')
+    parser.add_argument('--slow', type=float, default=0.05, help='fraction of slow consumers')
+    parser.add_argument('--slow-delay', type=float, default=2.0)
+    parser.add_argument('--max-pending', type=int, default=20)
+    args = parser.parse_args()
+
+    settings.STOCK_EVENTS_MAX_PENDING = args.max_pending
+    settings.STOCK_EVENTS_HEARTBEAT_SECONDS = 30
+    settings.STOCK_EVENTS_MAX_CONNECTION_SECONDS = 3600
+
+    with benchmark_database():
+        seed_products(args.products, stock=1000)
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        categories_by_id = dict(Product.objects.values_list('id', 'category'))
+        print(f"📡 Stock push - {args.connections:,} connections, {args.rounds} rounds of {args.lines} checkouts")
+
+        start = time.perf_counter()
+        connections, latencies, expected, stats = asyncio.run(run(args, product_ids, categories_by_id))
+        elapsed = time.perf_counter() - start
+
+        fast = [connection for connection in connections if not connection.delay]
+        slow = [connection for connection in connections if connection.delay]
+        frames = sum(connection.frames for connection in connections)
+        print(f"   checkout -> delivery p50 {percentile(latencies, 50):.1f} ms | p99 {percentile(latencies, 99):.1f} ms | "
+              f"max {max(latencies or [0]):.1f} ms | {len(latencies):,}/{expected:,} deliveries")
+        print(f"   {frames:,} events delivered in {elapsed:.1f}s | broker dropped {stats['dropped']:,}")
+        if slow:
+            print(f"   slow consumers: {len(slow)} | {sum(c.frames for c in slow) / len(slow):.1f} events each "
+                  f"(fast: {sum(c.frames for c in fast) / max(1, len(fast)):.1f}) | "
+                  f"{sum(c.resyncs for c in slow)} resyncs | max buffered {args.max_pending}")
+
+        # The polling this replaces: every connection re-downloading its list once per round
+        list_rows = {category: sum(1 for c in categories_by_id.values() if c == category) for category in CATEGORIES}
+        polled = sum(
+            len(categories_by_id) if connection.categories is None else list_rows[connection.categories[0]]
+            for connection in connections
+        ) * args.rounds
+        print(f"   equivalent polling: {polled:,} product rows re-sent for the same freshness")
+
+        if len(latencies) < expected or percentile(latencies, 99) > 1000:
+            print("❌ Missed deliveries or fan-out too slow")
+            sys.exit(1)
+        print("✅ Every fast connection received each round")
+
+
+if __name__ == "__main__":
+    main()
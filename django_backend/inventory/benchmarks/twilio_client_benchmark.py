@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Twilio client reuse and the cached account status - against a local stub of the Twilio API
+Serves the three Twilio calls the app makes (send message, fetch account, list messages)
+from a stub in its own process with --api-latency per response, and compares:
+- sends: a new twilio.rest.Client per WhatsAppService (the previous code - a new
+  session and connection every time) vs the process-wide shared client
+- dashboard: GET /api/manager/twilio-status/ calling Twilio live (2 API calls per view)
+  vs served from account_status_cache
+Reports p50/p99 per call, calls/sec, API requests and TCP connections the stub saw.
+
+Run from the django_backend directory with:
+python inventory/benchmarks/twilio_client_benchmark.py [--calls 500] [--threads 8] [--api-latency 0.02]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the django_backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from inventory.benchmarks.utils import percentile
+
+import requests
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+from rest_framework.test import APIClient
+from inventory.messaging import TwilioTransport, twilio_client, twilio_credentials
+from inventory.whatsapp_service import WhatsAppService, account_status_cache, fetch_account_status
+
+MESSAGE = {'sid': 'SM00000000000000000000000000000000', 'status': 'queued', 'to': 'whatsapp:+910000000000',
+           'from': 'whatsapp:+14155238886', 'body': 'Alert', 'date_sent': None, 'error_code': None,
+           'error_message': None}
+
+
+class StubTwilio(BaseHTTPRequestHandler):
+    """
+    POST .../Messages.json, GET .../Messages.json and GET .../Accounts/<sid>.json after server.delay seconds
+    GET /stats returns and resets the request/connection counters
+    """
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like api.twilio.com
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def reply(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            stats = {'requests': self.server.requests, 'connections': self.server.connections - 1}
+            self.server.requests = self.server.connections = 0
+            self.close_connection = True
+            return self.reply(stats)
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        if '/Messages.json' in self.path:
+            self.reply({'messages': [MESSAGE] * 5, 'next_page_uri': None, 'page': 0, 'page_size': 5, 'uri': self.path})
+        else:
+            self.reply({'sid': 'AC' + '0' * 32, 'status': 'active', 'type': 'Trial'})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        self.reply(MESSAGE, status=201)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port, delay):
+    ThreadingHTTPServer.request_queue_size = 128
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubTwilio)
+    server.daemon_threads = True
+    server.delay, server.requests, server.connections = delay, 0, 0
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def timed(call, count, threads):
+    def one(_):
+        start = time.perf_counter()
+        call()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(one, range(count)))
+    return latencies, count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Twilio client reuse benchmark')
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--api-latency', type=float, default=0.02, help='stub response time in seconds')
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.api_latency)
+        return
+
+    port = free_port()
+    stub = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', str(port),
+                             '--api-latency', str(args.api_latency)])
+    try:
+        run(args, f'http://127.0.0.1:{port}')
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+def run(args, base):
+    for _ in range(100):
+        try:
+            requests.get(base + '/stats')
+            break
+        except requests.ConnectionError:
+            time.sleep(0.1)
+
+    def pointed(client):
+        client.api.base_url = base
+        return client
+
+    def per_call_client():
+        # The previous WhatsAppService: a new Client (and http session) each time
+        return pointed(Client(*twilio_credentials(), http_client=TwilioHttpClient()))
+
+    pointed(twilio_client())
+
+    def send_legacy():
+        WhatsAppService(transport=TwilioTransport(per_call_client())).send_message('+910000000000', 'Alert')
+
+    def send_shared():
+        WhatsAppService().send_message('+910000000000', 'Alert')
+
+    def status_live():
+        # The previous twilio_account_status view: two live API calls per dashboard view
+        client = per_call_client()
+        client.api.accounts(twilio_credentials()[0]).fetch()
+        client.messages.list(limit=5)
+
+    api = APIClient()
+
+    def status_cached():
+        assert api.get('/api/manager/twilio-status/').status_code == 200
+
+    print(f"📱 Twilio client - {args.calls} calls per version from {args.threads} threads, "
+          f"stub API {args.api_latency * 1000:.0f} ms/response")
+    print(f"\n   {'call':<22} | {'p50 ms':>7} {'p99 ms':>7} {'calls/s':>8} {'API requests':>13} {'connections':>12}")
+    versions = [
+        ('send, client per call', send_legacy),
+        ('send, shared client', send_shared),
+        ('status, live', status_live),
+        ('status, cached', status_cached),
+    ]
+    fetch_account_status()  # Warm the cache and the shared client's connections outside the timing
+    account_status_cache.get()
+    for name, call in versions:
+        requests.get(base + '/stats')
+        latencies, rate = timed(call, args.calls, args.threads)
+        stats = requests.get(base + '/stats').json()
+        print(f"   {name:<22} | {percentile(latencies, 50):7.2f} {percentile(latencies, 99):7.2f} {rate:8,.0f} "
+              f"{stats['requests']:13,} {stats['connections']:12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Shared helpers for the benchmark scripts - Django setup, a throwaway database and timing
+"""
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_backend.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection, connections
+
+# Query logging would skew timings and grow memory for the whole run
+settings.DEBUG = False
+# Allow the Django/DRF test client to drive real views
+settings.ALLOWED_HOSTS = ['testserver']
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Create a migrated, file-backed SQLite database for the duration of a benchmark
+    A file (not :memory:) is used so worker threads share the same data and locking
+    """
+    fd, path = tempfile.mkstemp(prefix='storezen_bench_', suffix='.sqlite3')
+    os.close(fd)
+
+    connection.settings_dict['TEST']['NAME'] = path
+    connection.settings_dict.setdefault('OPTIONS', {})['timeout'] = 60
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield path
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def seed_products(count, stock=100, categories=None, batch_size=5000):
+    """
+    Bulk insert synthetic products (bypasses Product.save, so profit fields are filled here)
+    """
+    from inventory.models import Product
+
+    categories = categories or ['Groceries', 'Spices', 'Snacks', 'Beverages', 'Dairy', 'Personal Care']
+    batch = []
+    for i in range(count):
+        batch.append(Product(
+            name=f"Product {i:07d}",
+            category=categories[i % len(categories)],
+            selling_price=100 + (i % 400),
+            cost_price=80 + (i % 300),
+            profit_per_unit=20,
+            profit_margin=10,
+            stock=stock,
+            in_stock=stock > 0,
+        ))
+        if len(batch) >= batch_size:
+            Product.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Product.objects.bulk_create(batch)
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of a list of numbers
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+@contextmanager
+def timer(label):
+    """
+    Print how long the wrapped block took
+    """
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f"   {label}: {elapsed * 1000:.1f} ms")
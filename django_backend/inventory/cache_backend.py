@@ -0,0 +1,63 @@
+from threading import Lock
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+# Per-location counters, shared by every thread's cache instance (like LocMemCache's own storage)
+_stats = {}
+_stats_lock = Lock()
+
+_MISSING = object()
+
+
+class MeteredLRUCache(LocMemCache):
+    """
+    Bounded in-memory LRU cache with hit/miss/eviction counters
+
+    LocMemCache already keeps entries in recency order; this backend evicts
+    exactly the least recently used entry when MAX_ENTRIES is reached
+    (instead of culling a whole fraction) and counts what happens.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        with _stats_lock:
+            self._stats = _stats.setdefault(name, {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0})
+
+    def _count(self, counter, amount=1):
+        with _stats_lock:
+            self._stats[counter] += amount
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._count('sets')
+        super().set(key, value, timeout, version=version)
+
+    def _cull(self):
+        # Called under the cache lock when the cache is full - drop the LRU tail only
+        evicted = 0
+        while self._cache and len(self._cache) >= self._max_entries:
+            key, _ = self._cache.popitem()
+            self._expire_info.pop(key, None)
+            evicted += 1
+        self._count('evictions', evicted)
+
+    def get_stats(self):
+        with _stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['entries'] = len(self._cache)
+        stats['max_entries'] = self._max_entries
+        return stats
+
+    def reset_stats(self):
+        with _stats_lock:
+            for counter in self._stats:
+                self._stats[counter] = 0
@@ -0,0 +1,213 @@
+import hashlib
+from functools import wraps
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from .models import CatalogVersion
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SCOPE = 'catalog'
+RESERVATIONS_SCOPE = 'reservations'
+SEARCH_SCOPE = 'search'
+
+
+def category_scope(category):
+    return f'category:{category}'
+
+
+def get_cache():
+    return caches['catalog']
+
+
+def get_watermark(request, scopes):
+    """
+    (versions, last_modified) for scopes in one query, memoized on the request
+    Versions are 0 and last_modified is None for scopes never bumped
+    """
+    memo, scopes = _watermark_memo(request), tuple(scopes)
+    if scopes not in memo:
+        memo[scopes] = _watermark(scopes, _version_rows(scopes))
+    return memo[scopes]
+
+
+async def aget_watermark(request, scopes):
+    """
+    get_watermark() for native async views (async ORM)
+    """
+    memo, scopes = _watermark_memo(request), tuple(scopes)
+    if scopes not in memo:
+        memo[scopes] = _watermark(scopes, [row async for row in _version_rows(scopes)])
+    return memo[scopes]
+
+
+def _watermark_memo(request):
+    request = getattr(request, '_request', request)  # DRF Request -> HttpRequest
+    return request.__dict__.setdefault('_catalog_watermarks', {})
+
+
+def _version_rows(scopes):
+    return CatalogVersion.objects.filter(scope__in=scopes).values_list('scope', 'version', 'updated_at')
+
+
+def _watermark(scopes, rows):
+    found = {scope: (version, updated_at) for scope, version, updated_at in rows}
+    versions = tuple(found.get(scope, (0, None))[0] for scope in scopes)
+    timestamps = [found[scope][1] for scope in scopes if scope in found]
+    return versions, max(timestamps) if timestamps else None
+
+
+def bump_catalog_version(categories=()):
+    """
+    Invalidate cached catalog responses after a Product write
+
+    Bumps the global catalog version and the version of every touched
+    category. When called inside a transaction the bump runs after commit, so
+    the hot version row is never locked for the length of a checkout.
+    """
+    scopes = [CATALOG_SCOPE] + sorted({category_scope(category) for category in categories if category})
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def bump_reservations_version():
+    """
+    Reserved counts changed - only the manager product list shows them
+    """
+    transaction.on_commit(lambda: _bump([RESERVATIONS_SCOPE]))
+
+
+def bump_version_now(scope):
+    """
+    Bump one scope immediately and return its new version
+    For callers that already run after commit (e.g. in-process index updates)
+    """
+    _bump([scope])
+    return CatalogVersion.objects.filter(scope=scope).values_list('version', flat=True).first()
+
+
+def current_version(scope):
+    return CatalogVersion.objects.filter(scope=scope).values_list('version', flat=True).first() or 0
+
+
+def _bump(scopes):
+    now = timezone.now()
+    updated = CatalogVersion.objects.filter(scope__in=scopes).update(version=F('version') + 1, updated_at=now)
+    if updated == len(scopes):
+        return
+
+    existing = set(CatalogVersion.objects.filter(scope__in=scopes).values_list('scope', flat=True))
+    for scope in scopes:
+        if scope in existing:
+            continue
+        try:
+            with transaction.atomic():
+                CatalogVersion.objects.create(scope=scope, version=1, updated_at=now)
+        except IntegrityError:
+            # Created concurrently - bump it instead
+            CatalogVersion.objects.filter(scope=scope).update(version=F('version') + 1, updated_at=now)
+
+
+def _query_part(request):
+    return '&'.join(f'{key}={value}' for key, value in sorted(request.GET.items()))
+
+
+def cache_key(name, versions, request):
+    """
+    Cache key for a catalog response: endpoint, scope versions and the normalized query string
+    """
+    version_part = '.'.join(str(version) for version in versions)
+    return f'{name}:v{version_part}:{_query_part(request)}'
+
+
+def cached_response_data(name, scopes, request, build):
+    """
+    Return build() from the catalog cache, keyed by the current versions of scopes
+    """
+    cache = get_cache()
+    versions, _ = get_watermark(request, scopes)
+    key = cache_key(name, versions, request)
+
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data)
+    return data
+
+
+async def acached_response_data(name, scopes, request, build):
+    """
+    cached_response_data() for native async views - build is a coroutine function
+    The cache is in-process memory, so lookups stay on the event loop
+    """
+    cache = get_cache()
+    versions, _ = await aget_watermark(request, scopes)
+    key = cache_key(name, versions, request)
+
+    data = cache.get(key)
+    if data is None:
+        data = await build()
+        cache.set(key, data)
+    return data
+
+
+def _etag(name, versions, request):
+    return hashlib.sha1(cache_key(name, versions, request).encode('utf-8')).hexdigest()
+
+
+def _validators(name, request, watermark):
+    """
+    (quoted ETag, Last-Modified timestamp) for a response built from scopes at watermark
+    """
+    versions, updated_at = watermark
+    return quote_etag(_etag(name, versions, request)), int(updated_at.timestamp()) if updated_at else None
+
+
+def _tag(request, response, etag, last_modified):
+    # Error responses (invalid cursor, bad filters) are not cacheable representations - never tag them
+    if request.method in ('GET', 'HEAD') and response.status_code < 400:
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified)
+        response.headers.setdefault('ETag', etag)
+    return response
+
+
+def catalog_condition(name, get_scopes):
+    """
+    Conditional GET for a catalog list view (strong ETag + Last-Modified)
+
+    get_scopes(request) returns the version scopes the response depends on.
+    The ETag is derived from those versions and the query string only, so an
+    If-None-Match hit answers 304 before the list query or serializer runs.
+    Like django.views.decorators.http.condition, except that error responses
+    are left untagged.
+    """
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            etag, last_modified = _validators(name, request, get_watermark(request, get_scopes(request)))
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _tag(request, response, etag, last_modified)
+        return inner
+    return decorator
+
+
+def async_catalog_condition(name, get_scopes):
+    """
+    catalog_condition() for native async views - same ETag, Last-Modified and 304 handling
+    """
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag, last_modified = _validators(name, request, await aget_watermark(request, get_scopes(request)))
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            return _tag(request, response, etag, last_modified)
+        return inner
+    return decorator
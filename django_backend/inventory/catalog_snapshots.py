@@ -0,0 +1,141 @@
+import heapq
+import threading
+from .models import CatalogVersion, Product
+from .renderers import FastJSONRenderer
+from .serializers import customer_product_list_serializer
+from .catalog_cache import CATALOG_SCOPE, category_scope
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_PREFIX = category_scope('')
+
+
+class CatalogSnapshot:
+    """
+    Ready-to-send JSON bytes for the customer catalog (full list and one per category)
+
+    Each product row is rendered once (list-mode serializer + FastJSONRenderer)
+    and kept as a byte fragment, so the blobs are byte-for-byte what
+    CustomerProductSerializer + Response would produce. When a category's
+    CatalogVersion moves, only that category is re-read and re-rendered; the
+    full-catalog blob is then re-assembled by merging the per-category
+    fragments in id order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._renderer = FastJSONRenderer()
+        self.reset()
+
+    def reset(self):
+        self._categories = {}  # category -> {'version', 'rows': [(id, bytes)], 'blob'}
+        self._catalog_version = None
+        self._catalog_blob = None
+        self.rebuilds = 0
+
+    def _current_versions(self):
+        """
+        Global version plus every category version in one query (the table is tiny)
+        """
+        catalog_version = 0
+        category_versions = {}
+        for scope, version in CatalogVersion.objects.values_list('scope', 'version'):
+            if scope == CATALOG_SCOPE:
+                catalog_version = version
+            elif scope.startswith(CATEGORY_PREFIX):
+                category_versions[scope[len(CATEGORY_PREFIX):]] = version
+        return catalog_version, category_versions
+
+    def _render_rows(self, products):
+        """
+        Render each product once - returns [(id, category, json_bytes)] in queryset order
+        """
+        data = customer_product_list_serializer.serialize(customer_product_list_serializer.project(products))
+        return [(row['id'], row['category'], self._renderer.render(row)) for row in data]
+
+    @staticmethod
+    def _join(fragments):
+        return b'[' + b','.join(fragments) + b']'
+
+    def _store_category(self, category, version, rows):
+        if rows:
+            self._categories[category] = {'version': version, 'rows': rows, 'blob': self._join(f for _, f in rows)}
+        else:
+            self._categories.pop(category, None)
+
+    def _full_build(self, category_versions):
+        by_category = {}
+        for product_id, category, fragment in self._render_rows(Product.objects.order_by('id')):
+            by_category.setdefault(category, []).append((product_id, fragment))
+
+        self._categories = {}
+        for category, rows in by_category.items():
+            self._store_category(category, category_versions.get(category, 0), rows)
+
+    def _rebuild_category(self, category, version):
+        products = Product.objects.filter(category=category).order_by('id')
+        rows = [(product_id, fragment) for product_id, _, fragment in self._render_rows(products)]
+        self._store_category(category, version, rows)
+
+    def _refresh(self, catalog_version, category_versions):
+        if catalog_version == self._catalog_version and self._catalog_blob is not None:
+            return
+
+        if self._catalog_blob is None:
+            self._full_build(category_versions)
+        else:
+            for category, version in category_versions.items():
+                cached = self._categories.get(category)
+                if cached is None or cached['version'] != version:
+                    self._rebuild_category(category, version)
+
+        merged = heapq.merge(*(entry['rows'] for entry in self._categories.values()))
+        self._catalog_blob = self._join(fragment for _, fragment in merged)
+        self._catalog_version = catalog_version
+        self.rebuilds += 1
+
+    # Versions are read before taking the lock, so a cache hit never holds it across a query.
+    # A request that read older versions than the stored ones at worst causes one extra
+    # rebuild - rows are always read fresh, so the bytes are never older than their label.
+
+    def catalog_bytes(self):
+        versions = self._current_versions()
+        with self._lock:
+            self._refresh(*versions)
+            return self._catalog_blob
+
+    def category_bytes(self, category):
+        if self._catalog_blob is None:
+            versions = self._current_versions()
+            with self._lock:
+                if self._catalog_blob is None:
+                    self._refresh(*versions)
+                entry = self._categories.get(category)
+                return entry['blob'] if entry else b'[]'
+
+        # Only this category's version matters; the full blob is re-merged lazily
+        version = CatalogVersion.objects.filter(scope=category_scope(category)).values_list('version', flat=True).first() or 0
+        with self._lock:
+            entry = self._categories.get(category)
+            if entry is None or entry['version'] != version:
+                self._rebuild_category(category, version)
+                self._catalog_version = None
+                entry = self._categories.get(category)
+            return entry['blob'] if entry else b'[]'
+
+    def stats(self):
+        with self._lock:
+            fragment_bytes = sum(len(f) for entry in self._categories.values() for _, f in entry['rows'])
+            category_blob_bytes = sum(len(entry['blob']) for entry in self._categories.values())
+            return {
+                'categories': len(self._categories),
+                'products': sum(len(entry['rows']) for entry in self._categories.values()),
+                'catalog_blob_bytes': len(self._catalog_blob or b''),
+                'category_blob_bytes': category_blob_bytes,
+                'row_fragment_bytes': fragment_bytes,
+                'rebuilds': self.rebuilds,
+            }
+
+
+snapshot = CatalogSnapshot()
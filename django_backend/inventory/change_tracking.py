@@ -0,0 +1,158 @@
+import threading
+import time
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from .models import CatalogVersion, Product, ProductTombstone
+from .pagination import KeysetPagination
+import logging
+
+logger = logging.getLogger(__name__)
+
+PURGED_SCOPE = 'changes-purged'  # Highest change version of a purged tombstone
+
+CHANGES_PAGE_SIZE = 1000
+CHANGES_MAX_PAGE_SIZE = 5000
+
+CHANGE_FIELDS = ('change_version', 'id')
+TOKEN_FIELDS = ('change_version', 'id', 'deleted_after')
+
+# Token id meaning "every row of this version already seen"
+END_OF_VERSION = 2 ** 62
+
+INVALID_TOKEN_MESSAGE = 'Invalid sync token'
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Sync token expired - deletes since it were purged. Resync without ?since='
+    default_code = 'sync_token_expired'
+
+
+_clock_lock = threading.Lock()
+_last_version = 0
+
+
+def next_change_version():
+    """
+    Change version for a product write or delete - the wall clock in microseconds
+
+    Read from the clock instead of a shared counter row, so concurrent writers
+    never wait on each other. Strictly increasing within a process.
+    """
+    global _last_version
+    with _clock_lock:
+        _last_version = max(_last_version + 1, time.time_ns() // 1000)
+        return _last_version
+
+
+def settled_version():
+    """
+    Change version below which every write has committed - DELTA_SYNC_SETTLE_SECONDS behind the clock
+    """
+    return time.time_ns() // 1000 - int(settings.DELTA_SYNC_SETTLE_SECONDS * 1_000_000)
+
+
+def change_stamp():
+    """
+    Update kwargs marking rows changed by a bulk UPDATE (which skips save() and auto_now)
+    """
+    return {'change_version': next_change_version(), 'updated_at': timezone.now()}
+
+
+def record_deletion(product_id):
+    ProductTombstone.objects.create(product_id=product_id, change_version=next_change_version())
+
+
+def _watermark(scope):
+    return CatalogVersion.objects.filter(scope=scope).values_list('version', flat=True).first() or 0
+
+
+def encode_token(version, product_id, deleted_after):
+    return KeysetPagination().encode_cursor([version, product_id, deleted_after])
+
+
+def decode_token(token):
+    """
+    Sync token -> (change version, product id, deletes reported up to) - NotFound like a bad list cursor
+    """
+    values = KeysetPagination().decode_values(token, TOKEN_FIELDS)
+    if values is None or not all(isinstance(value, int) and value >= 0 for value in values):
+        raise NotFound(INVALID_TOKEN_MESSAGE)
+    return tuple(values)
+
+
+def changes_since(list_serializer, token=None, limit=CHANGES_PAGE_SIZE):
+    """
+    Products written and ids deleted after token, oldest change first
+
+    Rows are read in (change_version, id) order from the change index, so a
+    poll costs O(changes) rather than a full list. Versions come from the
+    writers' clocks and commit out of order, so only versions older than the
+    settle window are read: every write stamped before it has committed, and a
+    token never skips a row. Newer writes arrive on a later poll.
+
+    Without a token the whole catalog is returned (a full sync, a page at a
+    time). has_more means the client should call again right away with the
+    new token.
+    """
+    if token:
+        since_version, since_id, deleted_after = decode_token(token)
+        if deleted_after < _watermark(PURGED_SCOPE):
+            raise SyncTokenExpired()
+
+    settled = settled_version()
+    if not token:
+        # Products deleted before a full sync starts were never sent, so there is nothing to tombstone
+        since_version, since_id, deleted_after = 0, 0, settled
+
+    queryset = KeysetPagination().after(
+        Product.objects.filter(change_version__lte=settled).order_by(*CHANGE_FIELDS),
+        CHANGE_FIELDS, [since_version, since_id]
+    )
+    rows = list(list_serializer.project(queryset, extra=CHANGE_FIELDS)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if has_more:
+        end_version = rows[-1].change_version
+        next_token = encode_token(end_version, rows[-1].id, deleted_after)
+    else:
+        end_version = max(settled, since_version)
+        next_token = encode_token(end_version, END_OF_VERSION, end_version)
+
+    # Consecutive pages cover consecutive version ranges, so each delete is reported once
+    deleted = list(
+        ProductTombstone.objects.filter(
+            change_version__gt=max(since_version, deleted_after), change_version__lte=end_version
+        ).order_by('change_version').values_list('product_id', flat=True)
+    )
+
+    return {
+        'changed': list_serializer.serialize(rows),
+        'deleted': deleted,
+        'token': next_token,
+        'has_more': has_more,
+    }
+
+
+def purge_tombstones(older_than, batch_size=1000):
+    """
+    Delete tombstones recorded before older_than, oldest first
+    Tokens issued before a purged delete then get 410 and must resync
+    """
+    deleted = 0
+    while True:
+        batch = list(
+            ProductTombstone.objects.filter(deleted_at__lt=older_than)
+            .order_by('change_version').values_list('id', 'change_version')[:batch_size]
+        )
+        if not batch:
+            return deleted
+        # Raise the watermark before the rows go, so no token can miss a delete unnoticed
+        purged = max(version for _, version in batch)
+        CatalogVersion.objects.update_or_create(
+            scope=PURGED_SCOPE, defaults={'version': max(purged, _watermark(PURGED_SCOPE))}
+        )
+        deleted += ProductTombstone.objects.filter(id__in=[tombstone_id for tombstone_id, _ in batch]).delete()[0]
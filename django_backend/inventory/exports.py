@@ -0,0 +1,62 @@
+import csv
+import io
+from itertools import islice
+from .renderers import FastJSONRenderer
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per database round trip and flushed per write
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _chunks(list_serializer, queryset, chunk_size):
+    """
+    Serialized rows, chunk_size at a time, straight off a server-side iterator
+    Only one chunk of rows is ever held in memory
+    """
+    rows = list_serializer.project(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield list_serializer.serialize(chunk)
+
+
+def ndjson_stream(list_serializer, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    One JSON object per line - the same values the list endpoint returns
+    """
+    renderer = FastJSONRenderer()
+    for chunk in _chunks(list_serializer, queryset, chunk_size):
+        yield b''.join(renderer.render(row) + b'\n' for row in chunk)
+
+
+def csv_stream(list_serializer, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Header row, then one line per product
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    names = list_serializer.names
+
+    writer.writerow(names)
+    for chunk in _chunks(list_serializer, queryset, chunk_size):
+        writer.writerows([row[name] for name in names] for row in chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only (empty catalog)
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+STREAMS = {
+    'ndjson': ndjson_stream,
+    'csv': csv_stream,
+}
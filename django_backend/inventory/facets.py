@@ -0,0 +1,103 @@
+from functools import reduce
+from operator import and_
+from django.db.models import Count, Q
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Price bucket edges (selling price) - the last bucket is open ended
+PRICE_BUCKETS = [0, 50, 100, 250, 500, 1000]
+
+# Dimensions with facet counts; every other filter narrows all counts
+FACET_DIMENSIONS = ('category', 'in_stock', 'price')
+
+
+def _all(conditions):
+    return reduce(and_, conditions, Q())
+
+
+def build_filters(params):
+    """
+    Validated ProductFacetQuerySerializer data -> (base Q, {facet dimension: Q})
+
+    Filters on a faceted dimension are kept apart so that dimension's counts can
+    ignore them. With category=Spices, the category facet still shows how many
+    products every other category would have.
+    """
+    base = []
+    if params.get('demand_level'):
+        base.append(Q(demand_level__in=params['demand_level']))
+    if params.get('min_margin') is not None:
+        base.append(Q(profit_margin__gte=params['min_margin']))
+    if params.get('max_margin') is not None:
+        base.append(Q(profit_margin__lte=params['max_margin']))
+
+    faceted = {}
+    if params.get('category'):
+        faceted['category'] = Q(category__in=params['category'])
+    if params.get('in_stock') is not None:
+        faceted['in_stock'] = Q(in_stock=params['in_stock'])
+    price = []
+    if params.get('min_price') is not None:
+        price.append(Q(selling_price__gte=params['min_price']))
+    if params.get('max_price') is not None:
+        price.append(Q(selling_price__lte=params['max_price']))
+    if price:
+        faceted['price'] = _all(price)
+
+    return _all(base), faceted
+
+
+def _price_buckets():
+    buckets = []
+    for index, low in enumerate(PRICE_BUCKETS):
+        high = PRICE_BUCKETS[index + 1] if index + 1 < len(PRICE_BUCKETS) else None
+        condition = Q(selling_price__gte=low)
+        if high is not None:
+            condition &= Q(selling_price__lt=high)
+        buckets.append((low, high, condition))
+    return buckets
+
+
+def facet_counts(queryset, faceted):
+    """
+    Result count plus category / stock status / price bucket counts - one GROUP BY category query
+
+    Each count is a conditional aggregate that applies every faceted filter
+    except its own dimension's. Summing the per-category rows then gives the
+    stock and price facets.
+    """
+    def excluding(dimension, *extra):
+        conditions = [condition for name, condition in faceted.items() if name != dimension] + list(extra)
+        return _all(conditions) if conditions else None
+
+    buckets = _price_buckets()
+    annotations = {
+        'matched': Count('id', filter=_all(faceted.values()) if faceted else None),
+        'category_count': Count('id', filter=excluding('category')),
+        'in_stock_count': Count('id', filter=excluding('in_stock', Q(in_stock=True))),
+        'out_of_stock_count': Count('id', filter=excluding('in_stock', Q(in_stock=False))),
+    }
+    for index, (_, _, condition) in enumerate(buckets):
+        annotations[f'price_{index}'] = Count('id', filter=excluding('price', condition))
+
+    rows = list(queryset.order_by().values('category').annotate(**annotations))
+
+    def total(key):
+        return sum(row[key] for row in rows)
+
+    categories = sorted(
+        ({'value': row['category'], 'count': row['category_count']} for row in rows if row['category_count']),
+        key=lambda facet: (-facet['count'], facet['value'])
+    )
+    return {
+        'count': total('matched'),
+        'facets': {
+            'category': categories,
+            'in_stock': {'true': total('in_stock_count'), 'false': total('out_of_stock_count')},
+            'price': [
+                {'min': low, 'max': high, 'count': total(f'price_{index}')}
+                for index, (low, high, _) in enumerate(buckets)
+            ],
+        },
+    }
@@ -0,0 +1,127 @@
+import functools
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from .models import IdempotencyKey
+import logging
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def _request_hash(request, kwargs):
+    """
+    Fingerprint of everything that makes a request unique - reusing a key with a different body is a client bug
+    """
+    payload = json.dumps(
+        [request.method, request.path, kwargs, request.data],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _claim(scope, key, request_hash):
+    """
+    Insert an in-progress record for the key
+    Returns (record, None) if this request owns the key, or (None, existing) if another request does
+    """
+    now = timezone.now()
+    lock_expiry = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    scope=scope, key=key, request_hash=request_hash, expires_at=lock_expiry
+                ), None
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+            if existing is None:
+                continue  # Purged between our insert and lookup - try again
+            if existing.expires_at > now:
+                return None, existing
+            # Expired replay window or abandoned in-progress lock - take the key over
+            IdempotencyKey.objects.filter(id=existing.id, expires_at__lte=now).delete()
+
+    existing = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    return None, existing
+
+
+def idempotent(scope):
+    """
+    Decorator for mutating views - replays the stored response when a request repeats an Idempotency-Key
+
+    Works on function views (below @api_view) and ViewSet methods. Requests
+    without the header run as before. A replay never re-runs the view, so it
+    touches no Product rows and makes no outbound calls. Server errors (5xx)
+    are not stored, so the client may retry them.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(*args, **kwargs):
+            request = next(arg for arg in args if hasattr(arg, 'META'))
+            key = request.META.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view_func(*args, **kwargs)
+
+            if len(key) > 255:
+                return Response({'error': 'Idempotency-Key must be at most 255 characters'}, status=400)
+
+            request_hash = _request_hash(request, kwargs)
+            record, existing = _claim(scope, key, request_hash)
+
+            if record is None:
+                if existing is None or existing.status_code is None:
+                    return Response({'error': 'A request with this Idempotency-Key is already in progress'}, status=409)
+                if existing.request_hash != request_hash:
+                    return Response({'error': 'Idempotency-Key was already used with a different request'}, status=422)
+                logger.info(f"Replaying {scope} response for idempotency key {key}")
+                return _replay(existing)
+
+            try:
+                response = view_func(*args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+
+            if response.status_code >= 500 or not hasattr(response, 'data'):
+                record.delete()
+                return response
+
+            record.status_code = response.status_code
+            # Encode exactly as DRF renders it, so a replay is identical to the original
+            record.response_body = json.loads(json.dumps(response.data, cls=JSONEncoder))
+            record.expires_at = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+            record.save(update_fields=['status_code', 'response_body', 'expires_at'])
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired_keys(batch_size=1000):
+    """
+    Delete expired idempotency records in batches (uses the expires_at index)
+    """
+    deleted = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
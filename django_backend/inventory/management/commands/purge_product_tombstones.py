@@ -0,0 +1,21 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from inventory.change_tracking import purge_tombstones
+
+
+class Command(BaseCommand):
+    """
+    Housekeeping - deletes delta sync tombstones older than the retention window
+    """
+    help = 'Delete product tombstones older than PRODUCT_TOMBSTONE_RETENTION_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.PRODUCT_TOMBSTONE_RETENTION_DAYS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(days=options['days'])
+        deleted = purge_tombstones(older_than, batch_size=options['batch_size'])
+        self.stdout.write(f"Deleted {deleted} product tombstones older than {options['days']} days")
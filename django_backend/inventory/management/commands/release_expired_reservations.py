@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from inventory.reservation_service import release_expired_reservations
+
+
+class Command(BaseCommand):
+    """
+    Background sweeper - returns expired checkout holds to available stock
+    Run once (e.g. from cron) or as a daemon with --interval
+    """
+    help = 'Release stock reservations whose TTL has expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep running and sweep every N seconds (0 = run once)')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        batch_size = options['batch_size']
+
+        while True:
+            released = 0
+            # Drain the backlog in batches so a single transaction never grows unbounded
+            while True:
+                count = release_expired_reservations(batch_size=batch_size)
+                released += count
+                if count < batch_size:
+                    break
+
+            if released or not interval:
+                self.stdout.write(f"Released {released} expired reservations")
+
+            if not interval:
+                break
+            time.sleep(interval)
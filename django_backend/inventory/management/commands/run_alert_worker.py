@@ -0,0 +1,45 @@
+import signal
+from django.core.management.base import BaseCommand
+from inventory.alert_outbox import AlertOutboxWorker, enqueue_low_stock_check, outbox_stats, retry_dead_letters
+from inventory.messaging import TRANSPORTS, get_transport
+from inventory.whatsapp_service import WhatsAppService
+
+
+class Command(BaseCommand):
+    """
+    Background worker - sends queued WhatsApp alerts with retries, backoff and dead-lettering
+    Run as a daemon, or with --once (e.g. from cron) to drain what is due and exit
+    """
+    help = 'Deliver queued low stock checks and WhatsApp alerts from the alert outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=None,
+                            help='Concurrent sends (default ALERT_OUTBOX_WORKER_THREADS)')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds between polls when the outbox is idle')
+        parser.add_argument('--once', action='store_true', help='Drain due rows and exit')
+        parser.add_argument('--retry-dead', action='store_true',
+                            help='Requeue dead-lettered rows before starting')
+        parser.add_argument('--transport', choices=list(TRANSPORTS), default=None,
+                            help='Where messages go (default WHATSAPP_TRANSPORT)')
+
+    def handle(self, *args, **options):
+        if options['retry_dead']:
+            self.stdout.write(f"Requeued {retry_dead_letters()} dead-lettered rows")
+
+        # Reconcile on start: refresh the alert settings stock writes use and catch alerts missed while stopped
+        enqueue_low_stock_check()
+        service = WhatsAppService(transport=get_transport(options['transport']))
+        worker = AlertOutboxWorker(threads=options['threads'], service=service)
+        # Finish the sends in flight on Ctrl+C / SIGTERM instead of abandoning them
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+
+        self.stdout.write(f"Alert worker running with {worker.threads} threads, {service.transport.name} transport")
+        worker.run(interval=options['interval'], once=options['once'])
+        self.stdout.write(
+            f"Ran {worker.checks} checks, sent {worker.sent} messages "
+            f"({worker.alerts} low stock alerts in {worker.digests} digests), "
+            f"{worker.retried} retries scheduled, {worker.dead} dead-lettered"
+        )
+        self.stdout.write(f"Outbox: {outbox_stats()['counts']}")
@@ -0,0 +1,33 @@
+from django.conf import settings
+from .outbound import NODE, dependency
+from .refreshing_cache import RefreshingCache
+
+
+def fetch_manager_profile():
+    """
+    GET the manager profile from the Node server - raises on timeouts, errors and unexpected replies
+    Goes through the node outbound dependency (pooled session, timeouts, bulkhead, circuit breaker)
+    """
+    response = dependency(NODE).session.get(f'{settings.NODE_SERVER_URL}/manager/profile')
+    response.raise_for_status()
+    data = response.json()
+    if not data.get('success') or not data.get('manager'):
+        raise ValueError('Node server returned no manager profile')
+    return data['manager']
+
+
+class ManagerProfileCache(RefreshingCache):
+    """
+    The Node manager profile, cached per process (MANAGER_PROFILE_CACHE_SECONDS fresh,
+    then MANAGER_PROFILE_STALE_SECONDS served stale while it refreshes)
+
+    Node calls /api/manager/profile/invalidate/ when the profile changes; in
+    a multi-process deployment only the process that received the call drops
+    its copy, the others catch up within the TTL.
+    """
+
+    def __init__(self, fetch=fetch_manager_profile):
+        super().__init__(fetch, 'manager-profile', 'MANAGER_PROFILE_CACHE_SECONDS', 'MANAGER_PROFILE_STALE_SECONDS')
+
+
+profile_cache = ManagerProfileCache()
@@ -0,0 +1,134 @@
+import abc
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from twilio.base.exceptions import TwilioRestException
+from twilio.rest import Client
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from .outbound import GuardedTwilioHttpClient
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def twilio_credentials():
+    # Twilio credentials - Add these to your environment variables
+    return (
+        os.getenv('TWILIO_ACCOUNT_SID', 'your_account_sid_here'),
+        os.getenv('TWILIO_AUTH_TOKEN', 'your_auth_token_here'),
+    )
+
+
+_twilio_client = None
+_twilio_client_lock = threading.Lock()
+
+
+def twilio_client():
+    """
+    Process-wide Twilio client, built once and shared by every WhatsAppService and thread
+    Its requests go through the twilio outbound dependency, so keep-alive connections are reused
+    """
+    global _twilio_client
+    with _twilio_client_lock:
+        if _twilio_client is None:
+            _twilio_client = Client(*twilio_credentials(), http_client=GuardedTwilioHttpClient())
+        return _twilio_client
+
+
+class MessageTransport(abc.ABC):
+    """
+    Where WhatsApp messages go - send() delivers one message and returns an object with
+    sid and status, or raises so the outbox worker can retry it
+    """
+    name = None
+
+    @abc.abstractmethod
+    def send(self, to, from_, body):
+        ...
+
+
+class TwilioTransport(MessageTransport):
+    """
+    Sends through the Twilio API (the shared twilio_client() unless a client is given)
+    """
+    name = 'twilio'
+
+    def __init__(self, client=None):
+        self.client = client or twilio_client()
+
+    def send(self, to, from_, body):
+        return self.client.messages.create(body=body, from_=from_, to=to)
+
+
+class FakeTransport(MessageTransport):
+    """
+    Records messages in memory instead of sending them (tests, benchmarks, offline load tests)
+    latency is seconds per send; failure_rate is the fraction of sends that fail like a Twilio 503
+    """
+    name = 'fake'
+
+    def __init__(self, latency=0, failure_rate=0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = []
+        self.failed = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(self, to, from_, body):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self._random.random() < self.failure_rate:
+                self.failed += 1
+                raise TwilioRestException(503, '/Messages.json', msg='Service unavailable (fake)')
+            self.sent.append({'to': to, 'from': from_, 'body': body})
+            return SimpleNamespace(sid=f'SMfake{len(self.sent):08d}', status='queued')
+
+
+class FileTransport(MessageTransport):
+    """
+    Appends each message to path as one JSON line, or logs it when no path is set
+    For development and staging, where alerts should be visible but not sent
+    """
+    name = 'file'
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, to, from_, body):
+        sid = f'SMfile{uuid.uuid4().hex[:26]}'
+        if not self.path:
+            logger.info(f"WhatsApp message {sid} to {to}:\n{body}")
+            return SimpleNamespace(sid=sid, status='logged')
+
+        line = json.dumps({'sid': sid, 'to': to, 'from': from_, 'body': body, 'sent_at': timezone.now().isoformat()})
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as sink:
+                sink.write(line + '\n')
+        return SimpleNamespace(sid=sid, status='logged')
+
+
+TRANSPORTS = {transport.name: transport for transport in (TwilioTransport, FakeTransport, FileTransport)}
+
+
+def get_transport(name=None):
+    """
+    A new transport of the given kind, settings.WHATSAPP_TRANSPORT by default, configured from settings
+    """
+    name = name or settings.WHATSAPP_TRANSPORT
+    if name == FakeTransport.name:
+        return FakeTransport(latency=settings.WHATSAPP_FAKE_LATENCY_SECONDS,
+                             failure_rate=settings.WHATSAPP_FAKE_FAILURE_RATE)
+    if name == FileTransport.name:
+        return FileTransport(settings.WHATSAPP_FILE_SINK_PATH)
+    if name == TwilioTransport.name:
+        return TwilioTransport()
+    raise ImproperlyConfigured(f"Unknown WHATSAPP_TRANSPORT {name!r} - expected one of {', '.join(TRANSPORTS)}")
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0006_rename_price_product_selling_price_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="reserved",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("reservation_key", models.CharField(db_index=True, max_length=64)),
+                ("order_id", models.CharField(blank=True, max_length=64)),
+                ("quantity", models.IntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("active", "Active"),
+                            ("committed", "Committed"),
+                            ("released", "Released"),
+                            ("expired", "Expired"),
+                        ],
+                        default="active",
+                        max_length=10,
+                    ),
+                ),
+                ("expires_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("closed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="inventory.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Stock Reservation",
+                "verbose_name_plural": "Stock Reservations",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "expires_at"],
+                        name="inv_resv_status_expiry_idx",
+                    ),
+                    models.Index(
+                        fields=["order_id", "status"], name="inv_resv_order_status_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
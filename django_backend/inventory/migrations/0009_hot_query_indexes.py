@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0008_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lowstockalert",
+            index=models.Index(
+                condition=models.Q(("is_resolved", False)),
+                fields=["product", "threshold_value", "-sent_at"],
+                name="inv_alert_open_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lowstockalert",
+            index=models.Index(fields=["-sent_at"], name="inv_alert_sent_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "name", "id"], name="inv_product_cat_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "id"], name="inv_product_cat_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["stock"], name="inv_product_stock_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["name"], name="inv_product_name_idx"),
+        ),
+    ]
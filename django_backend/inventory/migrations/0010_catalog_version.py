@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0009_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("scope", models.CharField(max_length=100, unique=True)),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Catalog Version",
+                "verbose_name_plural": "Catalog Versions",
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:43
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0010_catalog_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="catalogversion",
+            name="updated_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:17
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0011_catalog_version_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("product_id", models.BigIntegerField()),
+                ("change_version", models.BigIntegerField()),
+                (
+                    "deleted_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Product Tombstone",
+                "verbose_name_plural": "Product Tombstones",
+            },
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="change_version",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["change_version", "id"], name="inv_product_change_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="producttombstone",
+            index=models.Index(
+                fields=["change_version"], name="inv_tombstone_version_idx"
+            ),
+        ),
+    ]
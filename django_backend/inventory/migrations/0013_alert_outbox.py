@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0012_product_change_tracking"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlertOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("low_stock_check", "Low stock check"),
+                            ("whatsapp", "WhatsApp message"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("payload", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sending", "Sending"),
+                            ("sent", "Sent"),
+                            ("dead", "Dead letter"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("claim", models.CharField(blank=True, db_index=True, max_length=32)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Alert Outbox Entry",
+                "verbose_name_plural": "Alert Outbox",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"], name="inv_outbox_due_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0013_alert_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="alertoutbox",
+            name="recipient",
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name="alertoutbox",
+            name="sent_in",
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AlterField(
+            model_name="alertoutbox",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("low_stock_check", "Low stock check"),
+                    ("low_stock_alert", "Low stock alert"),
+                    ("whatsapp", "WhatsApp message"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 
@@ -13,12 +13,15 @@ class Product(models.Model):
     profit_per_unit = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)  # Auto-calculated
     profit_margin = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)  # Auto-calculated percentage
     stock = models.IntegerField(default=0)  # Number of items in stock
+    reserved = models.IntegerField(default=0)  # Units held by active checkout reservations
     in_stock = models.BooleanField(default=True)  # Automatically managed
     demand_level = models.CharField(
         max_length=10,
         choices=[('High', 'High'), ('Normal', 'Normal'), ('Low', 'Low')],
         default='Normal'
     )
+    updated_at = models.DateTimeField(auto_now=True)  # Last write of any kind
+    change_version = models.BigIntegerField(default=0, editable=False)  # Delta sync watermark, stamped on every write
 
     def __str__(self):
         return self.name
@@ -37,8 +40,38 @@ class Product(models.Model):
         else:
             self.profit_per_unit = 0.00
             self.profit_margin = 0.00
-            
-        super().save(*args, **kwargs)
+        
+        # reserved is only changed by F() updates in the reservation service; a full save of a
+        # loaded instance would write its stale count back, so existing rows are saved without it
+        if kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'reserved'
+            ]
+        
+        # Stamp the change version with the write itself (delta sync)
+        from .change_tracking import next_change_version
+        self.change_version = next_change_version()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'change_version', 'updated_at'}
+        
+        # The row and the save signals' alert/outbox/tombstone rows commit together or not at all
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # Category listing, DISTINCT category and (category, name, id) keyset pages
+            models.Index(fields=['category', 'name', 'id'], name='inv_product_cat_name_idx'),
+            # Category filter with the default id ordering
+            models.Index(fields=['category', 'id'], name='inv_product_cat_id_idx'),
+            # Low stock scans (stock <= threshold)
+            models.Index(fields=['stock'], name='inv_product_stock_idx'),
+            # Lookups by name (populate_products, alert status)
+            models.Index(fields=['name'], name='inv_product_name_idx'),
+            # Delta sync: rows changed after a (change_version, id) watermark
+            models.Index(fields=['change_version', 'id'], name='inv_product_change_idx'),
+        ]
 
 
 class ManagerProfile(models.Model):
@@ -86,5 +119,154 @@ class LowStockAlert(models.Model):
 
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            # Duplicate-alert probe: unresolved alert for (product, threshold)
+            models.Index(
+                fields=['product', 'threshold_value', '-sent_at'],
+                condition=models.Q(is_resolved=False),
+                name='inv_alert_open_idx'
+            ),
+            # Alert history, newest first
+            models.Index(fields=['-sent_at'], name='inv_alert_sent_at_idx'),
+        ]
         verbose_name = "Low Stock Alert"
-        verbose_name_plural = "Low Stock Alerts"
\ No newline at end of file
+        verbose_name_plural = "Low Stock Alerts"
+
+
+class StockReservation(models.Model):
+    """
+    Stock Reservation model - Holds cart quantities between payment order creation and verification
+    Product.reserved is the running total of ACTIVE reservations, so available stock is stock - reserved
+    """
+    ACTIVE = 'active'
+    COMMITTED = 'committed'
+    RELEASED = 'released'
+    EXPIRED = 'expired'
+
+    reservation_key = models.CharField(max_length=64, db_index=True)  # Groups the lines of one checkout
+    order_id = models.CharField(max_length=64, blank=True)  # Razorpay order id, attached after order creation
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.IntegerField()
+    status = models.CharField(
+        max_length=10,
+        choices=[(ACTIVE, 'Active'), (COMMITTED, 'Committed'), (RELEASED, 'Released'), (EXPIRED, 'Expired')],
+        default=ACTIVE
+    )
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(null=True, blank=True)  # When the hold was committed, released or expired
+
+    def __str__(self):
+        return f"Reservation: {self.product_id} x {self.quantity} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='inv_resv_status_expiry_idx'),
+            models.Index(fields=['order_id', 'status'], name='inv_resv_order_status_idx'),
+        ]
+        verbose_name = "Stock Reservation"
+        verbose_name_plural = "Stock Reservations"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Idempotency Key model - Remembers the response of a mutating request so client retries are replayed, not re-applied
+    """
+    scope = models.CharField(max_length=50)  # Endpoint the key belongs to
+    key = models.CharField(max_length=255)  # Client supplied Idempotency-Key header
+    request_hash = models.CharField(max_length=64)  # Fingerprint of method, path and body
+    status_code = models.IntegerField(null=True, blank=True)  # Empty while the first request is still running
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency key: {self.scope}/{self.key}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='inv_idempotency_scope_key_uniq'),
+        ]
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+
+
+class CatalogVersion(models.Model):
+    """
+    Catalog Version model - Counters bumped on every Product write, used to key cached catalog responses and ETags
+    scope is 'catalog' for the whole catalog, 'category:<name>' for one category or 'reservations' for reserved counts
+    """
+    scope = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)  # Last bump, served as Last-Modified
+
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
+
+    class Meta:
+        verbose_name = "Catalog Version"
+        verbose_name_plural = "Catalog Versions"
+
+
+class ProductTombstone(models.Model):
+    """
+    Product Tombstone model - Records deleted products so delta sync clients can drop them from their replica
+    """
+    product_id = models.BigIntegerField()  # Id of the deleted product (the row itself is gone)
+    change_version = models.BigIntegerField()  # Change version allocated for the delete
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)  # Purge cut-off
+
+    def __str__(self):
+        return f"Deleted product {self.product_id} v{self.change_version}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['change_version'], name='inv_tombstone_version_idx'),
+        ]
+        verbose_name = "Product Tombstone"
+        verbose_name_plural = "Product Tombstones"
+
+
+class AlertOutbox(models.Model):
+    """
+    Alert Outbox model - Durable queue of WhatsApp alert work, drained by the alert worker (manage.py run_alert_worker)
+    Requests only insert rows; the worker sends them with retries and exponential backoff, and
+    rows that keep failing are dead-lettered (status DEAD) instead of being retried forever
+    """
+    LOW_STOCK_CHECK = 'low_stock_check'  # Scan the catalog and queue an alert per newly low product
+    LOW_STOCK_ALERT = 'low_stock_alert'  # One product's alert, sent in a digest with the rest of its window
+    WHATSAPP = 'whatsapp'  # Send one WhatsApp message (payload: to, body)
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+    kind = models.CharField(max_length=20, choices=[
+        (LOW_STOCK_CHECK, 'Low stock check'), (LOW_STOCK_ALERT, 'Low stock alert'), (WHATSAPP, 'WhatsApp message')
+    ])
+    recipient = models.CharField(max_length=20, blank=True)  # Manager phone - digests group alerts by it
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=[(PENDING, 'Pending'), (SENDING, 'Sending'), (SENT, 'Sent'), (DEAD, 'Dead letter')],
+        default=PENDING
+    )
+    attempts = models.IntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)  # Next attempt (PENDING) or lease expiry (SENDING)
+    claim = models.CharField(max_length=32, blank=True, db_index=True)  # Worker batch holding the lease
+    last_error = models.TextField(blank=True)
+    sent_in = models.CharField(max_length=32, blank=True)  # Message that delivered the row - shared by a digest's alerts
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Outbox {self.kind} #{self.id} ({self.status})"
+
+    class Meta:
+        indexes = [
+            # Worker poll: due rows, oldest first
+            models.Index(fields=['status', 'available_at'], name='inv_outbox_due_idx'),
+        ]
+        verbose_name = "Alert Outbox Entry"
+        verbose_name_plural = "Alert Outbox"
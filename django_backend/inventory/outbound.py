@@ -0,0 +1,251 @@
+import bisect
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+NODE = 'node'
+TWILIO = 'twilio'
+RAZORPAY = 'razorpay'
+
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]  # Upper bounds; one more bucket for slower
+
+
+class DependencyUnavailable(requests.exceptions.ConnectionError):
+    """
+    The call was refused before reaching the dependency - callers handle it like a connection error
+    """
+
+
+class CircuitOpen(DependencyUnavailable):
+    pass
+
+
+class BulkheadFull(DependencyUnavailable):
+    pass
+
+
+class LatencyHistogram:
+    """
+    Call latencies in fixed millisecond buckets (cumulative since start-up)
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+
+    def record(self, elapsed_ms):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.total_ms += elapsed_ms
+
+    def percentile(self, pct):
+        """
+        Upper bound of the bucket holding the pct-th percentile (None when empty or past the last bound)
+        """
+        count = sum(self.counts)
+        if not count:
+            return None
+        rank = count * pct / 100
+        seen = 0
+        for bound, bucket in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += bucket
+            if seen >= rank:
+                return bound
+        return None
+
+    def stats(self):
+        count = sum(self.counts)
+        return {
+            'count': count,
+            'mean_ms': round(self.total_ms / count, 1) if count else None,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': {
+                **{f'le_{bound}': bucket for bound, bucket in zip(LATENCY_BUCKETS_MS, self.counts)},
+                'slower': self.counts[-1],
+            },
+        }
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures; after reset_seconds one trial call
+    is let through (half-open) - success closes the circuit, failure opens it again
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.times_opened = 0
+
+    def allow(self):
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self.trial_running:
+                return False
+            self.trial_running = True
+            return True
+        return self.state == self.CLOSED
+
+    def succeeded(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trial_running = False
+
+    def failed(self):
+        self.failures += 1
+        self.trial_running = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class Dependency:
+    """
+    One external service: a connection pool, a bulkhead of max_concurrent calls,
+    a circuit breaker and a latency histogram
+
+    Every call goes through guard() - directly, or via session, a requests.Session
+    whose send() is guarded. Calls over the limit wait up to
+    OUTBOUND_BULKHEAD_WAIT_SECONDS for a slot, then fail with BulkheadFull, so a
+    slow provider ties up at most max_concurrent threads instead of every worker.
+    While the circuit is open calls fail at once with CircuitOpen.
+    """
+
+    def __init__(self, name, connect_timeout, read_timeout, max_concurrent):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()  # Held for breaker and counters
+        self.breaker = CircuitBreaker(settings.OUTBOUND_BREAKER_FAILURES, settings.OUTBOUND_BREAKER_RESET_SECONDS)
+        self.histogram = LatencyHistogram()
+        self.in_flight = 0
+        self.errors = 0
+        self.rejected = {'bulkhead': 0, 'circuit': 0}
+        self.session = GuardedSession(self)
+
+    def guard(self, call, *args, **kwargs):
+        """
+        Run call(*args, **kwargs) as one call to this dependency
+        It counts as failed when it raises or returns a response with a 5xx/429 status
+        """
+        with self._lock:
+            if not self.breaker.allow():
+                self.rejected['circuit'] += 1
+                raise CircuitOpen(f'{self.name}: circuit open after {self.breaker.failures} failures')
+        if not self._slots.acquire(timeout=settings.OUTBOUND_BULKHEAD_WAIT_SECONDS):
+            with self._lock:
+                self.rejected['bulkhead'] += 1
+                if self.breaker.state == CircuitBreaker.HALF_OPEN:
+                    self.breaker.trial_running = False
+            raise BulkheadFull(f'{self.name}: {self.max_concurrent} calls already in flight')
+
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = call(*args, **kwargs)
+            status = getattr(result, 'status_code', 200)
+            failed = status >= 500 or status == 429
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._slots.release()
+            with self._lock:
+                self.in_flight -= 1
+                self.histogram.record(elapsed_ms)
+                if failed:
+                    self.errors += 1
+                    was_open = self.breaker.state == CircuitBreaker.OPEN
+                    self.breaker.failed()
+                    if not was_open and self.breaker.state == CircuitBreaker.OPEN:
+                        logger.warning(f"Outbound {self.name}: circuit opened for {self.breaker.reset_seconds}s")
+                else:
+                    self.breaker.succeeded()
+
+    def reset(self):
+        with self._lock:
+            self.breaker = CircuitBreaker(settings.OUTBOUND_BREAKER_FAILURES, settings.OUTBOUND_BREAKER_RESET_SECONDS)
+            self.histogram = LatencyHistogram()
+            self.errors = 0
+            self.rejected = {'bulkhead': 0, 'circuit': 0}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'circuit': self.breaker.state,
+                'circuit_opened': self.breaker.times_opened,
+                'in_flight': self.in_flight,
+                'max_concurrent': self.max_concurrent,
+                'errors': self.errors,
+                'rejected': dict(self.rejected),
+                'latency': self.histogram.stats(),
+            }
+
+
+class GuardedSession(requests.Session):
+    """
+    Keep-alive session pooled to the dependency's concurrency, with its timeouts as the default
+    send() is the one method every request (and redirect) goes through, so clients built
+    on requests (Razorpay, Twilio's http client) are guarded without changes
+    """
+
+    def __init__(self, dependency):
+        super().__init__()
+        self.dependency = dependency
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=dependency.max_concurrent, max_retries=0)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.dependency.timeout
+        return self.dependency.guard(super().send, request, **kwargs)
+
+
+class GuardedTwilioHttpClient(TwilioHttpClient):
+    """
+    Twilio's http client on the twilio dependency's session
+    """
+
+    def __init__(self):
+        super().__init__(pool_connections=True)
+        self.session = dependency(TWILIO).session
+
+
+_dependencies = {}
+_dependencies_lock = threading.Lock()
+
+
+def dependency(name):
+    """
+    The process-wide Dependency for name, built from settings.OUTBOUND_DEPENDENCIES on first use
+    """
+    with _dependencies_lock:
+        if name not in _dependencies:
+            _dependencies[name] = Dependency(name, **settings.OUTBOUND_DEPENDENCIES[name])
+        return _dependencies[name]
+
+
+def outbound_stats():
+    with _dependencies_lock:
+        dependencies = list(_dependencies.values())
+    return {dep.name: dep.stats() for dep in dependencies}
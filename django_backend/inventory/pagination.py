@@ -0,0 +1,198 @@
+import base64
+import json
+from django.db import connections
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (cursor) pagination for product lists
+
+    Pagination only kicks in when the request sends ``page_size`` or
+    ``cursor``, so existing clients keep receiving the full list. Pages are
+    fetched with a row-value comparison against the last row of the previous
+    page (``(category, name, id) > (...)``), which the database answers with
+    an index range scan - page 10,000 costs the same as page 1.
+
+    ?ordering=id (default), category for (category, name, id), name, price,
+    margin or stock - the last three also descending (?ordering=-price).
+    Cursors hold the ordering's column values, so public lists use
+    CustomerKeysetPagination, which has no margin ordering.
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+
+    orderings = {
+        'id': ('id',),
+        'category': ('category', 'name', 'id'),
+        'name': ('name', 'id'),
+        'price': ('selling_price', 'id'),
+        '-price': ('-selling_price', '-id'),
+        'margin': ('profit_margin', 'id'),
+        '-margin': ('-profit_margin', '-id'),
+        'stock': ('stock', 'id'),
+        '-stock': ('-stock', '-id'),
+    }
+    opt_in = True
+    default_ordering = 'id'
+
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        return self.orderings.get(ordering, self.orderings[self.default_ordering])
+
+    def get_columns(self, request):
+        """
+        Field names of the ordering without direction - what a cursor is built from
+        """
+        return tuple(field.lstrip('-') for field in self.get_ordering(request))
+
+    def order_queryset(self, queryset, request):
+        """
+        Stable server-side ordering - also applied when the list is not paginated
+        """
+        return queryset.order_by(*self.get_ordering(request))
+
+    def is_requested(self, request):
+        if not self.opt_in:
+            return True
+        params = request.query_params
+        return self.page_size_query_param in params or self.cursor_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')  # Decimal -> "12.50"
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        return self.decode_values(encoded, fields)
+
+    def decode_values(self, encoded, fields):
+        """
+        Cursor string -> one value per field; NotFound when it does not decode to that shape
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def after(self, queryset, fields, values):
+        """
+        Rows strictly after the cursor in (fields) order, as one row-value comparison
+        Orderings are all ascending or all descending ('-' prefix), never mixed
+        """
+        quote_name = connections[queryset.db].ops.quote_name
+        table = quote_name(queryset.model._meta.db_table)
+        columns = ', '.join(
+            f"{table}.{quote_name(queryset.model._meta.get_field(field.lstrip('-')).column)}"
+            for field in fields
+        )
+        operator = '<' if fields[0].startswith('-') else '>'
+        placeholders = ', '.join(['%s'] * len(values))
+        condition = RawSQL(f"({columns}) {operator} ({placeholders})", values, output_field=BooleanField())
+        return queryset.filter(condition)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.finish_page(list(queryset))
+
+    def page_queryset(self, queryset, request):
+        """
+        Unevaluated queryset for the requested page, or None when pagination was not asked for
+        Async views evaluate it themselves and pass the rows to finish_page()
+        """
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.fields = self.get_ordering(request)
+        self.size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.fields)
+        values = self.decode_cursor(request, self.fields)
+        if values is not None:
+            queryset = self.after(queryset, self.fields, values)
+
+        # Fetch one extra row to learn whether another page exists
+        return queryset[:self.size + 1]
+
+    def finish_page(self, rows):
+        """
+        Trim the look-ahead row and work out the next cursor
+        """
+        self.has_next = len(rows) > self.size
+        rows = rows[:self.size]
+
+        self.next_cursor = None
+        if self.has_next and rows:
+            last = rows[-1]
+            get = last.get if isinstance(last, dict) else lambda field: getattr(last, field)
+            self.next_cursor = self.encode_cursor([get(field.lstrip('-')) for field in self.fields])
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.size)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'page_size': self.size,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+class FacetPagination(KeysetPagination):
+    """
+    Keyset pagination that is always on - faceted results are returned a page at a time
+    """
+    opt_in = False
+
+
+class CustomerKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for the public customer list - orders only by fields customers see
+    ?ordering=margin falls back to id, so no cursor carries profit_margin
+    """
+    orderings = {
+        name: KeysetPagination.orderings[name]
+        for name in ('id', 'category', 'name', 'price', '-price', 'stock', '-stock')
+    }
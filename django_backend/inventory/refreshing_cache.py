@@ -0,0 +1,125 @@
+import threading
+import time
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+FAILED_FETCH_BACKOFF_SECONDS = 5  # With nothing cached, an outage costs one timeout per this many seconds
+
+
+class RefreshingCache:
+    """
+    In-process cache of one value fetched from an external service
+
+    Fresh for settings.<fresh_setting> seconds. After that, for up to another
+    settings.<stale_setting> seconds, the stale copy is returned at once while
+    one background thread refetches it (stale-while-revalidate). Past that,
+    or when nothing is cached, callers fetch inline - one at a time, so a
+    burst of requests after expiry makes a single call. A failed fetch keeps
+    serving the last good value.
+    """
+
+    def __init__(self, fetch, label, fresh_setting, stale_setting):
+        self._fetch = fetch
+        self.label = label
+        self.fresh_setting = fresh_setting
+        self.stale_setting = stale_setting
+        self._lock = threading.Lock()  # Held for the state below
+        self._fetch_lock = threading.Lock()  # Held by the one inline fetch
+        self.reset()
+
+    def reset(self):
+        self._value = None
+        self._fetched_at = None
+        self._failed_at = None
+        self.last_error = None  # Message of the latest failed fetch, cleared by a good one
+        self._refreshing = False
+        self._generation = 0  # Bumped by invalidate() so a fetch started before it is not stored
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetch_errors = 0
+
+    def _windows(self):
+        fresh = getattr(settings, self.fresh_setting)
+        return fresh, fresh + getattr(settings, self.stale_setting)
+
+    def _age(self):
+        return None if self._fetched_at is None else time.monotonic() - self._fetched_at
+
+    def get(self):
+        """
+        The cached value, or None when the service is unreachable and nothing usable is cached
+        """
+        fresh, stale = self._windows()
+        with self._lock:
+            age = self._age()
+            if age is not None and age < fresh:
+                self.hits += 1
+                return self._value
+            if age is not None and age < stale:
+                self.stale_hits += 1
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(
+                        target=self._refresh, args=(self._generation,), name=f'{self.label}-refresh', daemon=True
+                    ).start()
+                return self._value
+
+        with self._fetch_lock:
+            # Someone else may have fetched while we waited
+            with self._lock:
+                age = self._age()
+                if age is not None and age < fresh:
+                    self.hits += 1
+                    return self._value
+                if self._failed_at is not None and time.monotonic() - self._failed_at < FAILED_FETCH_BACKOFF_SECONDS:
+                    return self._value
+                self.misses += 1
+                generation = self._generation
+            self._refresh(generation)
+            with self._lock:
+                return self._value
+
+    def _refresh(self, generation):
+        try:
+            value = self._fetch()
+        except Exception as e:
+            with self._lock:
+                self.fetch_errors += 1
+                self._failed_at = time.monotonic()
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._refreshing = False
+            logger.warning(f"Error fetching {self.label}: {e}")
+            return
+        with self._lock:
+            if generation == self._generation:
+                self._value = value
+                self._fetched_at = time.monotonic()
+                self._failed_at = None
+                self.last_error = None
+            self._refreshing = False
+
+    def invalidate(self):
+        """
+        Drop the cached value - the next get() fetches it again
+        """
+        with self._lock:
+            self._generation += 1
+            self._fetched_at = None
+            self._failed_at = None
+            self._refreshing = False
+
+    def stats(self):
+        with self._lock:
+            age = self._age()
+            return {
+                'cached': self._fetched_at is not None,
+                'age_seconds': round(age, 1) if age is not None else None,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'fetch_errors': self.fetch_errors,
+                'last_error': self.last_error,
+            }
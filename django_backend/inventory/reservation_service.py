@@ -0,0 +1,244 @@
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import StockReservation
+from .catalog_cache import bump_reservations_version
+from .stock_service import (
+    APPLIED, INVALID, NOT_FOUND, apply_guarded_update, build_line_results, decrement_stock,
+    fetch_rows, in_stock_after, normalize_items, stock_changed
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _reserve_guard(quantity):
+    return {'stock__gte': F('reserved') + quantity}
+
+
+def _reserve_changes(quantity):
+    return {'reserved': F('reserved') + quantity}
+
+
+def _release_guard(quantity):
+    return {'reserved__gte': quantity}
+
+
+def _release_changes(quantity):
+    return {'reserved': F('reserved') - quantity}
+
+
+def _commit_guard(quantity):
+    return {'stock__gte': quantity, 'reserved__gte': quantity}
+
+
+def _commit_changes(quantity):
+    return {
+        'stock': F('stock') - quantity,
+        'reserved': F('reserved') - quantity,
+        'in_stock': in_stock_after(quantity)
+    }
+
+
+def reserve_stock(items, ttl_seconds=None):
+    """
+    Hold cart quantities for a checkout - all lines or nothing
+
+    Each product's reserved counter is raised with a conditional UPDATE
+    (``stock - reserved >= quantity``), so two checkouts can never hold the
+    same unit. Returns (reservation_key, results); reservation_key is None
+    when any line could not be held, in which case nothing is reserved.
+    Malformed lines and unknown products come back as INVALID / NOT_FOUND
+    results (see is_invalid_cart), stock shortfalls as INSUFFICIENT.
+    """
+    quantities, invalid_items = normalize_items(items)
+    if invalid_items or not quantities:
+        return None, [
+            {'status': INVALID, 'item': item, 'error': f"Invalid item data: {item}"}
+            for item in invalid_items
+        ]
+
+    # Give back expired holds on these products before competing for them
+    release_expired_reservations(product_ids=quantities)
+
+    ttl_seconds = ttl_seconds or settings.STOCK_RESERVATION_TTL_SECONDS
+    expires_at = timezone.now() + timedelta(seconds=ttl_seconds)
+    reservation_key = uuid.uuid4().hex
+
+    with transaction.atomic():
+        applied = apply_guarded_update(quantities, _reserve_guard, _reserve_changes)
+        rows = fetch_rows(quantities)
+
+        if len(applied) != len(quantities):
+            # Undo the lines that did fit - a partial hold is useless to the customer
+            transaction.set_rollback(True)
+            failed = {pid: qty for pid, qty in quantities.items() if pid not in applied}
+            return None, build_line_results(failed, set(), rows)
+
+        StockReservation.objects.bulk_create([
+            StockReservation(
+                reservation_key=reservation_key,
+                product_id=product_id,
+                quantity=quantity,
+                expires_at=expires_at
+            )
+            for product_id, quantity in quantities.items()
+        ])
+        bump_reservations_version()
+
+    results = [
+        {
+            'status': APPLIED,
+            'product_id': product_id,
+            'product_name': rows[product_id]['name'],
+            'quantity': quantity,
+            'available': rows[product_id]['stock'] - rows[product_id]['reserved'],
+            'expires_at': expires_at.isoformat()
+        }
+        for product_id, quantity in quantities.items()
+    ]
+    logger.info(f"Reserved {len(quantities)} products under {reservation_key} until {expires_at}")
+    return reservation_key, results
+
+
+def is_invalid_cart(results):
+    """
+    True when a failed reserve_stock() was refused for bad input rather than missing stock
+    """
+    return any(line['status'] in (INVALID, NOT_FOUND) for line in results)
+
+
+def attach_order(reservation_key, order_id):
+    """
+    Link a checkout's holds to the payment order created for it
+    """
+    return StockReservation.objects.filter(
+        reservation_key=reservation_key,
+        status=StockReservation.ACTIVE
+    ).update(order_id=order_id)
+
+
+def _close_reservations(status, **filters):
+    """
+    Move ACTIVE reservations matching filters to status and return their per-product totals
+    The status change is the first statement, so the transaction takes the write lock before reading
+    """
+    closed_at = timezone.now()
+    with transaction.atomic():
+        closed = StockReservation.objects.filter(
+            status=StockReservation.ACTIVE, **filters
+        ).update(status=status, closed_at=closed_at)
+
+        if not closed:
+            return {}
+        bump_reservations_version()
+
+        quantities = dict(
+            StockReservation.objects.filter(status=status, closed_at=closed_at, **filters)
+            .values('product_id')
+            .annotate(total=Sum('quantity'))
+            .values_list('product_id', 'total')
+        )
+
+        if status == StockReservation.COMMITTED:
+            return quantities
+
+        released = apply_guarded_update(quantities, _release_guard, _release_changes)
+        if len(released) != len(quantities):
+            logger.warning(f"Reserved counter already below hold for products {set(quantities) - released}")
+
+    return quantities
+
+
+def release_reservation(reservation_key):
+    """
+    Give back every hold of a checkout (e.g. payment order creation failed)
+    """
+    quantities = _close_reservations(StockReservation.RELEASED, reservation_key=reservation_key)
+    return sum(quantities.values())
+
+
+def release_expired_reservations(product_ids=None, batch_size=500):
+    """
+    Expire ACTIVE holds whose TTL has passed and return their units to available stock
+    Uses the (status, expires_at) index; processes at most batch_size holds per call
+    """
+    now = timezone.now()
+    expired = StockReservation.objects.filter(status=StockReservation.ACTIVE, expires_at__lte=now)
+    if product_ids is not None:
+        expired = expired.filter(product_id__in=list(product_ids))
+
+    reservation_ids = list(expired.values_list('id', flat=True)[:batch_size])
+    if not reservation_ids:
+        return 0
+
+    quantities = _close_reservations(StockReservation.EXPIRED, id__in=reservation_ids)
+    if quantities:
+        logger.info(f"Expired {len(reservation_ids)} reservations, released {sum(quantities.values())} units")
+    return len(reservation_ids)
+
+
+def commit_reservations(order_id):
+    """
+    Turn an order's ACTIVE holds into real stock decrements
+    Returns per-line results in the same shape as stock_service.decrement_stock
+    """
+    if not order_id:
+        return []
+
+    with transaction.atomic():
+        quantities = _close_reservations(StockReservation.COMMITTED, order_id=order_id)
+        if not quantities:
+            return []
+
+        applied = apply_guarded_update(quantities, _commit_guard, _commit_changes)
+
+        failed = {pid: qty for pid, qty in quantities.items() if pid not in applied}
+        if failed:
+            # Stock was lowered below the hold (e.g. manual edit) - drop the hold instead
+            apply_guarded_update(failed, _release_guard, _release_changes)
+            StockReservation.objects.filter(
+                order_id=order_id,
+                status=StockReservation.COMMITTED,
+                product_id__in=list(failed)
+            ).update(status=StockReservation.RELEASED)
+
+        rows = fetch_rows(quantities)
+        stock_changed(applied, rows, {product_id: -quantity for product_id, quantity in quantities.items()})
+
+    return build_line_results(quantities, applied, rows)
+
+
+def fulfil_order(order_id, items):
+    """
+    Apply the stock changes for a paid order
+
+    Products held for the order are committed from their reservation. Items
+    without a live hold (expired, or an older client that never reserved) fall
+    back to a guarded decrement. Products already committed for this order
+    are not decremented again.
+    """
+    results = commit_reservations(order_id)
+
+    committed_ids = {line['product_id'] for line in results}
+    if order_id:
+        committed_ids.update(
+            StockReservation.objects.filter(order_id=order_id, status=StockReservation.COMMITTED)
+            .values_list('product_id', flat=True)
+        )
+
+    remaining = []
+    for item in items:
+        try:
+            product_id = int(item.get('productId') or item.get('id'))
+        except (TypeError, ValueError):
+            product_id = None
+        if product_id not in committed_ids:
+            remaining.append(item)
+
+    if remaining:
+        results += decrement_stock(remaining)
+    return results
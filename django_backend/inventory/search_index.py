@@ -0,0 +1,400 @@
+import heapq
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
+from .models import Product
+from .catalog_cache import SEARCH_SCOPE, bump_version_now, current_version
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """
+    Lowercase word tokens of a name/category/query
+    """
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(word):
+    """
+    Padded character trigrams of a word ("rice" -> "  r", " ri", "ric", "ice", "ce ")
+    """
+    padded = f'  {word} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class ProductSearchIndex:
+    """
+    In-process prefix index over Product name + category for ranked search
+
+    Every word of the query must prefix-match a word of the product's name or
+    category. The vocabulary is a sorted list, so a prefix expands with two
+    bisects. Each posting list holds the products' static rank keys
+    (name length, name, id) in sorted order. Names whose start matches the
+    whole query (tier 0) are one range of a name-sorted list. The other
+    matches come from walking the best-ranked candidates of the query's most
+    selective word instead of every row.
+
+    Results are ordered by tier, then static rank:
+    0 - the name starts with the whole query
+    1 - every query word is a whole word of the product
+    2 - prefix matches only
+
+    fuzzy_search() tolerates typos ("basmti rice", "garam masla"). Vocabulary
+    words are indexed by their character trigrams, so a misspelled word is
+    corrected by probing a few trigram sets instead of comparing it with every
+    name. The trigram layer covers words, not products, and stops admitting
+    words at SEARCH_FUZZY_MAX_TRIGRAMS entries. The most frequent words are
+    admitted first. Pure numbers are never fuzzy-matched.
+
+    Writes in this process are applied incrementally from the Product signals.
+    The SEARCH_SCOPE CatalogVersion tells each process when another one changed
+    products, and that process then rebuilds its index.
+    """
+    max_expansions = 64  # vocabulary words a single prefix may expand to
+    scan_factor = 10  # matching candidates ranked per requested result
+    max_scan = 50000  # hard cap on candidates visited per query
+    recheck_interval = 1.0  # seconds between SEARCH_SCOPE version checks
+    fuzzy_threshold = 0.3  # minimum trigram (Jaccard) similarity of a correction
+    fuzzy_alternatives = 8  # corrections tried per misspelled word
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        self._docs = {}  # id -> (rank_key, tokens)
+        self._postings = {}  # token -> sorted [rank_key]
+        self._vocabulary = []  # sorted tokens
+        self._names = []  # sorted (lowercase name, id) - tier 0 is one prefix range
+        self._word_trigrams = {}  # word -> trigrams, for words in the fuzzy layer
+        self._trigram_words = {}  # trigram -> {words}
+        self._trigram_entries = 0
+        self.fuzzy_skipped = 0  # words left out of the fuzzy layer by the memory budget
+        self._version = None
+        self._checked_at = 0.0
+        self.builds = 0
+
+    # Index maintenance
+
+    @staticmethod
+    def _document(product_id, name, category):
+        name_lower = name.lower()
+        tokens = tuple(dict.fromkeys(sys.intern(token) for token in tokenize(f'{name} {category}')))
+        return (len(name_lower), name_lower, product_id), tokens
+
+    def _full_build(self):
+        self._docs, self._postings, self._names = {}, {}, []
+        for product_id, name, category in Product.objects.values_list('id', 'name', 'category').iterator(chunk_size=5000):
+            rank_key, tokens = self._docs[product_id] = self._document(product_id, name, category)
+            self._names.append((rank_key[1], product_id))
+            for token in tokens:
+                self._postings.setdefault(token, []).append(rank_key)
+
+        for posting in self._postings.values():
+            posting.sort()
+        self._vocabulary = sorted(self._postings)
+        self._names.sort()
+
+        self._word_trigrams, self._trigram_words = {}, {}
+        self._trigram_entries = self.fuzzy_skipped = 0
+        for word in sorted(self._postings, key=lambda word: -len(self._postings[word])):
+            self._index_word(word)
+        self.builds += 1
+
+    def _index_word(self, word):
+        if word.isdigit():
+            return
+        grams = trigrams(word)
+        if self._trigram_entries + len(grams) > settings.SEARCH_FUZZY_MAX_TRIGRAMS:
+            self.fuzzy_skipped += 1
+            return
+        self._word_trigrams[word] = grams
+        for gram in grams:
+            self._trigram_words.setdefault(gram, set()).add(word)
+        self._trigram_entries += len(grams)
+
+    def _unindex_word(self, word):
+        grams = self._word_trigrams.pop(word, None)
+        if grams is None:
+            return
+        for gram in grams:
+            words = self._trigram_words[gram]
+            words.discard(word)
+            if not words:
+                del self._trigram_words[gram]
+        self._trigram_entries -= len(grams)
+
+    def _add(self, product_id, name, category):
+        rank_key, tokens = self._docs[product_id] = self._document(product_id, name, category)
+        insort(self._names, (rank_key[1], product_id))
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                self._postings[token] = [rank_key]
+                insort(self._vocabulary, token)
+                self._index_word(token)
+            else:
+                insort(posting, rank_key)
+
+    def _remove(self, product_id):
+        doc = self._docs.get(product_id)
+        if doc is None:
+            return
+        rank_key, tokens = doc
+        del self._names[bisect_left(self._names, (rank_key[1], product_id))]
+        for token in tokens:
+            posting = self._postings[token]
+            index = bisect_left(posting, rank_key)
+            if index < len(posting) and posting[index] == rank_key:
+                del posting[index]
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+                self._unindex_word(token)
+        del self._docs[product_id]
+
+    def _refresh(self):
+        """
+        Rebuild when another process changed products - checked at most every recheck_interval
+        (this process's own writes are applied immediately by apply())
+        """
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.recheck_interval:
+            return
+        version = current_version(SEARCH_SCOPE)
+        if version != self._version:
+            self._full_build()
+            self._version = version
+        self._checked_at = now
+
+    def apply(self, product_id, name=None, category=None):
+        """
+        A product was created/renamed/moved (name given) or deleted (name None) - runs after commit
+        """
+        with self._lock:
+            version = bump_version_now(SEARCH_SCOPE)
+            if self._version is None:
+                return  # Not built yet - the first query builds from the database
+            if version != self._version + 1:
+                # Another process changed products as well - resync on the next query
+                self._version = None
+                return
+            self._remove(product_id)
+            if name is not None:
+                self._add(product_id, name, category)
+            self._version = version
+
+    # Queries
+
+    def _expand(self, term, limit):
+        """
+        Up to limit vocabulary words starting with term (the exact word, if present, comes first)
+        """
+        start = bisect_left(self._vocabulary, term)
+        end = bisect_left(self._vocabulary, term + '\U0010ffff', start)
+        return self._vocabulary[start:min(end, start + limit)]
+
+    def _prefix_test(self, term):
+        """
+        Fast "does any token start with term" check - a set probe unless the prefix is very broad
+        """
+        words = self._expand(term, 4096)
+        if len(words) < 4096:
+            words = frozenset(words)
+            return lambda tokens: not words.isdisjoint(tokens)
+        return lambda tokens: any(token.startswith(term) for token in tokens)
+
+    def _merged(self, words):
+        postings = [self._postings[word] for word in words]
+        return postings[0] if len(postings) == 1 else heapq.merge(*postings)
+
+    def _name_starts(self, phrase, first_term, limit):
+        """
+        Best `limit` rank keys of the names starting with phrase (tier 0) - such a name also
+        prefix-matches every query word, and its first word starts with first_term
+
+        Every such name is in one range of the name list. A narrow range is ranked
+        directly; a broad one is walked through first_term's postings in rank order,
+        where the first `limit` names starting with phrase are the best ones.
+        """
+        start = bisect_left(self._names, (phrase,))
+        end = bisect_left(self._names, (phrase + '\U0010ffff',), start)
+        if end - start > limit * self.scan_factor:
+            words = self._expand(first_term, self.max_expansions + 1)
+            if len(words) <= self.max_expansions:
+                found = []
+                previous = None
+                for rank_key in islice(self._merged(words), self.max_scan):
+                    if rank_key is not previous and rank_key[1].startswith(phrase):
+                        found.append(rank_key)
+                        if len(found) >= limit:
+                            return found
+                    previous = rank_key
+
+        names = self._names[start:min(end, start + self.max_scan)]
+        return heapq.nsmallest(limit, ((len(name), name, product_id) for name, product_id in names))
+
+    def search(self, query, limit=20):
+        """
+        Ids of the best matches for query, best first
+        """
+        terms = tokenize(query)
+        if not terms or limit <= 0:
+            return []
+
+        with self._lock:
+            self._refresh()
+
+            expansions = [self._expand(term, self.max_expansions) for term in terms]
+            if not all(expansions):
+                return []
+
+            # Walk the term whose expansion has the fewest postings
+            sizes = [sum(len(self._postings[token]) for token in tokens) for tokens in expansions]
+            driving = sizes.index(min(sizes))
+            others = [self._prefix_test(term) for index, term in enumerate(terms) if index != driving]
+            phrase = ' '.join(terms)
+
+            results = self._name_starts(phrase, terms[0], limit)
+            if len(results) >= limit:
+                return [rank_key[2] for rank_key in results]
+
+            candidates = self._merged(expansions[driving])
+
+            # Candidates arrive in rank order: once the remaining places are filled with
+            # tier 1 matches nothing later can beat them. Otherwise the walk stops after
+            # scan_factor matches per place, so a tier 1 product ranked further down than
+            # that can lose its place to a tier 2 one.
+            wanted = limit - len(results)
+            matches = []
+            whole_words = 0
+            previous = None
+            for rank_key in islice(candidates, self.max_scan):
+                if rank_key is previous:
+                    continue  # Several words of one product share the prefix
+                previous = rank_key
+
+                if rank_key[1].startswith(phrase):
+                    continue  # Tier 0, already ranked
+                tokens = self._docs[rank_key[2]][1]
+                if others and not all(test(tokens) for test in others):
+                    continue
+                if all(term in tokens for term in terms):
+                    tier = 1
+                    whole_words += 1
+                else:
+                    tier = 2
+                matches.append((tier, rank_key))
+                if whole_words >= wanted or len(matches) >= wanted * self.scan_factor:
+                    break
+
+            results += [rank_key for _, rank_key in heapq.nsmallest(wanted, matches)]
+            return [rank_key[2] for rank_key in results]
+
+    def _corrections(self, term):
+        """
+        {word: similarity} for indexed words sharing enough trigrams with term
+        """
+        grams = trigrams(term)
+        shared = {}
+        for gram in grams:
+            for word in self._trigram_words.get(gram, ()):
+                shared[word] = shared.get(word, 0) + 1
+
+        scored = []
+        for word, count in shared.items():
+            similarity = count / (len(grams) + len(self._word_trigrams[word]) - count)
+            if similarity >= self.fuzzy_threshold:
+                scored.append((similarity, word))
+        return {word: similarity for similarity, word in heapq.nlargest(self.fuzzy_alternatives, scored)}
+
+    def fuzzy_search(self, query, limit=20):
+        """
+        Typo-tolerant search - (ids best first, {misspelled word: correction})
+
+        Words that prefix-match the vocabulary count as exact (similarity 1).
+        Other words are replaced by their closest indexed words. Words with no
+        close match are ignored. Products are ranked by summed similarity, then
+        static rank.
+        """
+        terms = tokenize(query)
+        if not terms or limit <= 0:
+            return [], {}
+
+        with self._lock:
+            self._refresh()
+
+            prefixes, fuzzy, corrections, expansions = [], [], {}, []
+            for term in terms:
+                words = self._expand(term, self.max_expansions)
+                if words:
+                    prefixes.append(term)
+                    expansions.append(words)
+                    continue
+                similar = self._corrections(term)
+                if similar:
+                    fuzzy.append(similar)
+                    expansions.append(list(similar))
+                    corrections[term] = max(similar, key=similar.get)
+            if not expansions:
+                return [], {}
+
+            sizes = [sum(len(self._postings[word]) for word in words) for words in expansions]
+            postings = [self._postings[word] for word in expansions[sizes.index(min(sizes))]]
+            candidates = postings[0] if len(postings) == 1 else heapq.merge(*postings)
+
+            wanted = limit * self.scan_factor
+            matches = []
+            previous = None
+            for rank_key in islice(candidates, self.max_scan):
+                if rank_key is previous:
+                    continue
+                previous = rank_key
+
+                tokens = self._docs[rank_key[2]][1]
+                if not all(any(token.startswith(term) for token in tokens) for term in prefixes):
+                    continue
+                score = len(prefixes)
+                for similar in fuzzy:
+                    best = max((similar[token] for token in tokens if token in similar), default=0)
+                    if not best:
+                        break
+                    score += best
+                else:
+                    matches.append((-score, rank_key))
+                    if len(matches) >= wanted:
+                        break
+
+            return [rank_key[2] for _, rank_key in heapq.nsmallest(limit, matches)], corrections
+
+    def stats(self):
+        with self._lock:
+            return {
+                'products': len(self._docs),
+                'vocabulary': len(self._vocabulary),
+                'postings': sum(len(posting) for posting in self._postings.values()),
+                'fuzzy_words': len(self._word_trigrams),
+                'fuzzy_trigram_entries': self._trigram_entries,
+                'fuzzy_skipped': self.fuzzy_skipped,
+                'version': self._version,
+                'builds': self.builds,
+            }
+
+
+index = ProductSearchIndex()
+
+
+def product_changed(product_id, name=None, category=None):
+    """
+    Queue an index update for after the surrounding transaction commits
+    """
+    transaction.on_commit(lambda: index.apply(product_id, name, category))
@@ -1,4 +1,8 @@
+import decimal
+from django.db import models
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 from .models import Product
 
 
@@ -9,11 +13,12 @@ class ProductSerializer(serializers.ModelSerializer):
     in_stock = serializers.ReadOnlyField()  # Make in_stock read-only
     profit_per_unit = serializers.ReadOnlyField()  # Auto-calculated field
     profit_margin = serializers.ReadOnlyField()  # Auto-calculated field
+    reserved = serializers.ReadOnlyField()  # Maintained by checkout reservations
     
     class Meta:
         model = Product
-        fields = '__all__'
-        read_only_fields = ['in_stock', 'profit_per_unit', 'profit_margin']
+        exclude = ['updated_at', 'change_version']  # Delta sync bookkeeping, not product data
+        read_only_fields = ['in_stock', 'profit_per_unit', 'profit_margin', 'reserved']
 
 
 class CustomerProductSerializer(serializers.ModelSerializer):
@@ -26,4 +31,192 @@ class CustomerProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = ['id', 'name', 'category', 'price', 'stock', 'in_stock']
-        read_only_fields = ['in_stock']
\ No newline at end of file
+        read_only_fields = ['in_stock']
+
+
+class ProductFacetQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the faceted product listing - category and demand_level are comma separated
+    """
+    category = serializers.CharField(required=False)
+    demand_level = serializers.CharField(required=False)
+    in_stock = serializers.BooleanField(required=False, allow_null=True, default=None)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    min_margin = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    max_margin = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+
+    @staticmethod
+    def _split(value):
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    def validate_category(self, value):
+        return self._split(value)
+
+    def validate_demand_level(self, value):
+        levels = self._split(value)
+        allowed = [choice for choice, _ in Product._meta.get_field('demand_level').choices]
+        unknown = [level for level in levels if level not in allowed]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown demand level(s): {', '.join(unknown)}")
+        return levels
+
+    def validate(self, attrs):
+        for low, high in (('min_price', 'max_price'), ('min_margin', 'max_margin')):
+            if attrs.get(low) is not None and attrs.get(high) is not None and attrs[low] > attrs[high]:
+                raise serializers.ValidationError({low: [f'Must not be greater than {high}']})
+        return attrs
+
+
+def _memoized(convert):
+    """
+    Per-call memo for a pure column conversion - a list repeats the same few prices
+    Zero is never cached so -0.00 and 0.00 (equal as Decimals) keep their own output
+    """
+    memo = {}
+
+    def cached(value):
+        if not value:
+            return convert(value)
+        try:
+            return memo[value]
+        except KeyError:
+            result = memo[value] = convert(value)
+            return result
+    return cached
+
+
+class ValuesListSerializer:
+    """
+    High-throughput list mode for a ModelSerializer - same keys, key order and JSON values
+
+    Reads only the serializer's source columns with values_list() and converts
+    them column by column with precomputed functions, instead of building a
+    model instance and running the DRF field machinery for every row. Field
+    names (including the ``price`` alias), their order and Decimal formatting
+    are taken from serializer_class, so the rendered JSON is byte-for-byte the same.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._names = None
+
+    def _build(self):
+        # Resolved on first use - ModelSerializer fields need the app registry
+        model = self.serializer_class.Meta.model
+        fields = [(name, field) for name, field in self.serializer_class().fields.items() if not field.write_only]
+        conversions = []
+        for name, field in fields:
+            convert, pure = self._converter(field, model)
+            if convert is not None:
+                conversions.append((name, convert, pure))
+        self._sources = [field.source for _, field in fields]
+        self._conversions = conversions
+        self._names = [name for name, _ in fields]
+
+    @staticmethod
+    def _converter(field, model):
+        """
+        (function, pure) turning a raw column value into what field.to_representation returns
+        function is None when the value is already in its final form; pure means
+        the result depends only on the value, so it can be memoized
+        """
+        if isinstance(field, serializers.DecimalField):
+            if not getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING) or field.localize:
+                return field.to_representation, False
+            if field.decimal_places is None:
+                return '{:f}'.format, True
+            exponent = decimal.Decimal('.1') ** field.decimal_places
+            context = decimal.getcontext().copy()
+            if field.max_digits is not None:
+                context.prec = field.max_digits
+            if field.rounding is not None:
+                context.rounding = field.rounding
+            return (lambda value: '{:f}'.format(value.quantize(exponent, context=context))), True
+
+        if isinstance(field, serializers.ReadOnlyField):
+            # Passed through untouched - the JSON encoder turns Decimal columns into floats
+            if isinstance(model._meta.get_field(field.source), models.DecimalField):
+                return float, True
+            return None, False
+
+        if isinstance(field, (serializers.IntegerField, serializers.BooleanField, serializers.CharField,
+                              serializers.ChoiceField)):
+            return None, False
+
+        return field.to_representation, False
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._build()
+        return self._names
+
+    def restrict(self, fields=None, exclude=None):
+        """
+        Sparse fieldset - a list serializer for a subset of the fields, in serializer order
+        Unknown names raise ValidationError (400) rather than being silently ignored
+        """
+        names = self.names
+        errors = {}
+        for param, requested in (('fields', fields), ('exclude', exclude)):
+            unknown = [name for name in requested or () if name not in names]
+            if unknown:
+                errors[param] = [f"Unknown field(s): {', '.join(unknown)}"]
+        keep = set(names if fields is None else fields) - set(exclude or ())
+        if not errors and not keep:
+            errors['fields'] = ['At least one field must be selected']
+        if errors:
+            raise ValidationError(errors)
+
+        subset = ValuesListSerializer(self.serializer_class)
+        subset._sources = [source for name, source in zip(names, self._sources) if name in keep]
+        subset._conversions = [conversion for conversion in self._conversions if conversion[0] in keep]
+        subset._names = [name for name in names if name in keep]
+        return subset
+
+    def for_request(self, request, fields_param='fields', exclude_param='exclude'):
+        """
+        Apply ?fields=a,b / ?exclude=c (comma separated) - self when neither is sent
+        """
+        params = getattr(request, 'query_params', request.GET)  # DRF Request or plain HttpRequest
+
+        def names(param):
+            value = params.get(param)
+            if value is None:
+                return None
+            return [name.strip() for name in value.split(',') if name.strip()]
+
+        fields, exclude = names(fields_param), names(exclude_param)
+        if fields is None and exclude is None:
+            return self
+        return self.restrict(fields, exclude)
+
+    def project(self, queryset, extra=()):
+        """
+        Only the serialized columns, as named tuples (keyset pagination reads them by name)
+        extra sources (e.g. the keyset ordering) are fetched after them and not serialized
+        """
+        if self._names is None:
+            self._build()
+        sources = self._sources + [source for source in extra if source not in self._sources]
+        return queryset.values_list(*sources, named=True)
+
+    def serialize(self, rows):
+        """
+        Rows from project() -> list of dicts equal to serializer_class(..., many=True).data
+        """
+        names = self.names
+        data = [dict(zip(names, row)) for row in rows]
+        for name, convert, pure in self._conversions:
+            if pure:
+                convert = _memoized(convert)
+            for item in data:
+                value = item[name]
+                if value is not None:
+                    item[name] = convert(value)
+        return data
+
+
+product_list_serializer = ValuesListSerializer(ProductSerializer)
+customer_product_list_serializer = ValuesListSerializer(CustomerProductSerializer)
@@ -0,0 +1,63 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import Product
+from .catalog_cache import bump_catalog_version
+from .search_index import product_changed
+from .change_tracking import record_deletion
+from .stock_events import publish_deleted, publish_rows
+from .stock_alerts import stock_levels_changed
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_category(sender, instance, **kwargs):
+    """
+    Keep the stored category (and name) so moving a product invalidates its old category too,
+    and the stored stock so low stock threshold crossings can be detected
+    Runs inside Product.save's transaction; the row lock makes concurrent saves see each other's stock
+    """
+    instance._previous_category = None
+    instance._previous_name = None
+    instance._previous_stock = None
+    if instance.pk:
+        previous = Product.objects.select_for_update().filter(pk=instance.pk).values_list(
+            'category', 'name', 'stock'
+        ).first()
+        if previous:
+            instance._previous_category, instance._previous_name, instance._previous_stock = previous
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    bump_catalog_version([instance.category, getattr(instance, '_previous_category', None)])
+
+    # Stock-only saves leave the search index alone
+    if created or instance.name != getattr(instance, '_previous_name', None) \
+            or instance.category != getattr(instance, '_previous_category', None):
+        product_changed(instance.pk, instance.name, instance.category)
+
+    # Subscribers of the old category see a moved product leave it
+    previous_category = getattr(instance, '_previous_category', None)
+    if previous_category and previous_category != instance.category:
+        publish_deleted(instance.pk, previous_category)
+    publish_rows([{
+        'id': instance.pk,
+        'name': instance.name,
+        'category': instance.category,
+        'selling_price': instance.selling_price,
+        'stock': instance.stock,
+        'reserved': instance.reserved,
+        'in_stock': instance.in_stock,
+    }])
+
+    # Viewset and admin edits - same transaction as the row (Product.save wraps the write and its signals in atomic())
+    previous_stock = None if created else getattr(instance, '_previous_stock', None)
+    if created or previous_stock != instance.stock:
+        stock_levels_changed({instance.pk: (previous_stock, instance.stock)})
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    bump_catalog_version([instance.category])
+    record_deletion(instance.pk)  # Tombstone for delta sync clients (same transaction as the delete)
+    publish_deleted(instance.pk, instance.category)
+    product_changed(instance.pk)
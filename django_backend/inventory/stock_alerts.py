@@ -0,0 +1,103 @@
+from django.db import transaction
+from django.utils import timezone
+from .models import LowStockAlert, ManagerProfile
+from .whatsapp_service import queue_low_stock_alerts
+import logging
+
+logger = logging.getLogger(__name__)
+
+CROSSED_BELOW = 'crossed_below'
+RECOVERED_ABOVE = 'recovered_above'
+
+DEFAULT_THRESHOLD = 10  # Node's default lowStockThreshold
+
+
+def alert_settings():
+    """
+    (threshold, manager phone) used at write time - phone is None while WhatsApp alerts are off
+    Read from the local ManagerProfile row, which sync_alert_settings keeps in step with the Node profile,
+    so stock writes never wait on the Node server
+    """
+    profile = ManagerProfile.objects.order_by('id').values(
+        'low_stock_threshold', 'whatsapp_number', 'whatsapp_alerts_enabled'
+    ).first()
+    if profile is None:
+        return DEFAULT_THRESHOLD, None
+    enabled = profile['whatsapp_alerts_enabled'] and profile['whatsapp_number']
+    return profile['low_stock_threshold'], profile['whatsapp_number'] if enabled else None
+
+
+def sync_alert_settings(manager_profile):
+    """
+    Copy the alert settings of a Node manager profile into the local ManagerProfile
+    Returns True when they changed - the caller should then queue a full low stock check,
+    since products already past the new threshold produced no crossing. Open alerts for
+    products now above the threshold are resolved here.
+    """
+    threshold = manager_profile.get('lowStockThreshold', DEFAULT_THRESHOLD)
+    phone = manager_profile.get('contact') or ''
+    enabled = bool(manager_profile.get('whatsappAlertsEnabled'))
+
+    with transaction.atomic():
+        profile = ManagerProfile.objects.order_by('id').select_for_update().first() or ManagerProfile()
+        previous = (profile.pk, profile.low_stock_threshold, profile.whatsapp_number, profile.whatsapp_alerts_enabled)
+        if previous[1:] == (threshold, phone, enabled) and profile.pk:
+            return False
+
+        profile.low_stock_threshold = threshold
+        profile.whatsapp_number = phone
+        profile.whatsapp_alerts_enabled = enabled
+        profile.save()
+
+        if previous[1] != threshold:
+            # Alerts raised under the old threshold - without waiting for the next reconciliation pass
+            LowStockAlert.objects.filter(product__stock__gt=threshold, is_resolved=False).update(
+                is_resolved=True, resolved_at=timezone.now()
+            )
+    logger.info(f"Alert settings synced: threshold {threshold}, alerts {'on' if enabled and phone else 'off'}")
+    return True
+
+
+def threshold_crossings(changes, threshold):
+    """
+    Classify stock changes against threshold
+    changes maps product id -> (old stock, new stock); old stock is None for a new product
+    Returns {product id: CROSSED_BELOW or RECOVERED_ABOVE} for the products that crossed
+    """
+    crossings = {}
+    for product_id, (old_stock, new_stock) in changes.items():
+        was_low = old_stock is not None and old_stock <= threshold
+        is_low = new_stock <= threshold
+        if is_low and not was_low:
+            crossings[product_id] = CROSSED_BELOW
+        elif was_low and not is_low:
+            crossings[product_id] = RECOVERED_ABOVE
+    return crossings
+
+
+def stock_levels_changed(changes):
+    """
+    Raise and resolve low stock alerts for products whose stock crossed the threshold
+
+    Called by every stock write (stock_service and the Product save signal)
+    inside the write's transaction, with changes mapping product id ->
+    (old stock, new stock). Work is proportional to the products written:
+    products that stay on the same side of the threshold cost nothing beyond
+    reading the settings, so no write ever rescans the catalog.
+    """
+    if not changes:
+        return {}
+    threshold, manager_phone = alert_settings()
+    crossings = threshold_crossings(changes, threshold)
+
+    recovered = [product_id for product_id, crossing in crossings.items() if crossing == RECOVERED_ABOVE]
+    if recovered:
+        resolved = LowStockAlert.objects.filter(product_id__in=recovered, is_resolved=False).update(
+            is_resolved=True, resolved_at=timezone.now()
+        )
+        logger.info(f"Marked {resolved} alerts as resolved (stock replenished)")
+
+    crossed = [product_id for product_id, crossing in crossings.items() if crossing == CROSSED_BELOW]
+    if crossed and manager_phone:
+        queue_low_stock_alerts(manager_phone, threshold, crossed)
+    return crossings
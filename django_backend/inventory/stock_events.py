@@ -0,0 +1,260 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.db import transaction
+from .renderers import FastJSONRenderer
+import logging
+
+logger = logging.getLogger(__name__)
+
+STOCK = 'stock'
+LOW_STOCK = 'low_stock'
+DELETED = 'deleted'
+RESYNC = 'resync'
+
+_renderer = FastJSONRenderer()
+
+
+def sse_frame(event, data):
+    """
+    One Server-Sent Events frame - rendered once and shared by every subscriber
+    """
+    return b'event: ' + event.encode('ascii') + b'\ndata: ' + _renderer.render(data) + b'\n\n'
+
+
+RESYNC_FRAME = sse_frame(RESYNC, {'reason': 'slow consumer - refetch products or call /api/products/changes/'})
+
+
+class StockEvent:
+    """
+    A rendered event plus what the broker needs to route and conflate it
+    key identifies the state it carries - a newer event with the same key replaces an undelivered one
+    """
+    __slots__ = ('key', 'category', 'frame')
+
+    def __init__(self, kind, product_id, category, data):
+        self.key = (kind, product_id)
+        self.category = category
+        self.frame = sse_frame(kind, data)
+
+
+class Subscription:
+    """
+    One connected client - a bounded, conflating buffer owned by the event loop serving it
+
+    Backpressure: a slow consumer only ever holds the latest state per
+    product. If even that outgrows max_pending, the buffer is dropped and the
+    client gets a single resync event instead of an unbounded backlog.
+    """
+
+    def __init__(self, loop, categories, max_pending):
+        self.loop = loop
+        self.categories = categories  # None means every category
+        self.max_pending = max_pending
+        self.pending = OrderedDict()
+        self.overflowed = False
+        self.delivered = 0
+        self.dropped = 0
+        self._waiter = None  # Future the stream is parked on - cheaper than asyncio.wait_for per wait
+
+    def offer(self, events):
+        """
+        Queue events (event loop thread only)
+        """
+        if self.overflowed:
+            self.dropped += len(events)
+            return
+        for event in events:
+            self.pending[event.key] = event
+            self.pending.move_to_end(event.key)
+        if len(self.pending) > self.max_pending:
+            self.dropped += len(self.pending)
+            self.pending.clear()
+            self.overflowed = True
+        _wake(self._waiter)
+
+    async def next_frames(self, timeout=None):
+        """
+        Wait for events and return them as one SSE chunk (b'' on timeout)
+        """
+        if not self.pending and not self.overflowed:
+            self._waiter = self.loop.create_future()
+            timer = self.loop.call_later(timeout, _wake, self._waiter) if timeout is not None else None
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+                if timer is not None:
+                    timer.cancel()
+
+        if self.overflowed:
+            self.overflowed = False
+            return RESYNC_FRAME
+        if not self.pending:
+            return b''
+        frames = b''.join(event.frame for event in self.pending.values())
+        self.delivered += len(self.pending)
+        self.pending.clear()
+        return frames
+
+
+class StockEventBroker:
+    """
+    In-process publish/subscribe for product stock events
+
+    Writers publish from request threads after commit; subscribers are
+    served by an asyncio event loop (the ASGI server's). Each publish renders
+    every event once, routes it by category and hands each loop one batch,
+    so fan-out cost is one dict insert per subscriber and event.
+
+    Only clients connected to this process are reached - with several
+    server processes a shared broker (e.g. Redis pub/sub) would sit behind
+    the same publish()/subscribe() interface.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._everything = set()
+        self._by_category = {}
+        self.published = 0
+
+    def subscribe(self, categories=None, max_pending=None):
+        """
+        Register a subscriber on the running event loop; categories=None follows the whole catalog
+        """
+        subscription = Subscription(
+            asyncio.get_running_loop(),
+            frozenset(categories) if categories else None,
+            max_pending or settings.STOCK_EVENTS_MAX_PENDING
+        )
+        with self._lock:
+            if subscription.categories is None:
+                self._everything.add(subscription)
+            for category in subscription.categories or ():
+                self._by_category.setdefault(category, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._everything.discard(subscription)
+            for category in subscription.categories or ():
+                subscribers = self._by_category.get(category)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_category[category]
+
+    def publish(self, events):
+        """
+        Deliver events to matching subscribers - safe to call from any thread
+        """
+        if not events:
+            return
+        self.published += len(events)
+
+        batches = {}
+        with self._lock:
+            for event in events:
+                for subscription in self._everything:
+                    batches.setdefault(subscription, []).append(event)
+                for subscription in self._by_category.get(event.category, ()):
+                    batches.setdefault(subscription, []).append(event)
+
+        by_loop = {}
+        for subscription, batch in batches.items():
+            by_loop.setdefault(subscription.loop, []).append((subscription, batch))
+        for loop, deliveries in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, deliveries)
+            except RuntimeError:
+                # Loop already closed - its subscribers are gone
+                pass
+
+    def has_subscribers(self):
+        return bool(self._everything or self._by_category)
+
+    def stats(self):
+        with self._lock:
+            subscribers = self._everything.union(*self._by_category.values())
+            return {
+                'subscribers': len(subscribers),
+                'categories': len(self._by_category),
+                'published': self.published,
+                'pending': sum(len(subscription.pending) for subscription in subscribers),
+                'dropped': sum(subscription.dropped for subscription in subscribers),
+            }
+
+
+async def event_stream(categories=None):
+    """
+    SSE body for one client: subscribe, then relay events with keepalive comments
+    The stream ends after STOCK_EVENTS_MAX_CONNECTION_SECONDS and EventSource reconnects,
+    so a client that vanished without the server noticing is dropped within that bound
+    """
+    subscription = broker.subscribe(categories)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.STOCK_EVENTS_MAX_CONNECTION_SECONDS
+    try:
+        yield b'retry: 3000\n: connected\n\n'
+        while loop.time() < deadline:
+            frames = await subscription.next_frames(timeout=settings.STOCK_EVENTS_HEARTBEAT_SECONDS)
+            yield frames or b': keepalive\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def _wake(waiter):
+    if waiter is not None and not waiter.done():
+        waiter.set_result(None)
+
+
+def _deliver(deliveries):
+    for subscription, batch in deliveries:
+        subscription.offer(batch)
+
+
+broker = StockEventBroker()
+
+
+def _stock_events(row):
+    """
+    Events for a product row dict (id, name, category, selling_price, stock, reserved, in_stock)
+    """
+    data = {
+        'id': row['id'],
+        'name': row['name'],
+        'category': row['category'],
+        'price': str(row['selling_price']),
+        'stock': row['stock'],
+        'available': row['stock'] - row['reserved'],
+        'in_stock': row['in_stock'],
+    }
+    events = [StockEvent(STOCK, row['id'], row['category'], data)]
+    if row['stock'] <= settings.LOW_STOCK_EVENT_THRESHOLD:
+        events.append(StockEvent(LOW_STOCK, row['id'], row['category'], {
+            'id': row['id'],
+            'name': row['name'],
+            'category': row['category'],
+            'stock': row['stock'],
+            'threshold': settings.LOW_STOCK_EVENT_THRESHOLD,
+        }))
+    return events
+
+
+def publish_rows(rows):
+    """
+    Push the new state of changed products once the transaction commits
+    """
+    if not broker.has_subscribers():
+        return
+    events = [event for row in rows for event in _stock_events(row)]
+    if events:
+        transaction.on_commit(lambda: broker.publish(events))
+
+
+def publish_deleted(product_id, category):
+    if not broker.has_subscribers():
+        return
+    event = StockEvent(DELETED, product_id, category, {'id': product_id, 'category': category})
+    transaction.on_commit(lambda: broker.publish([event]))
@@ -0,0 +1,235 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from .models import Product
+from .catalog_cache import bump_catalog_version
+from .change_tracking import change_stamp
+from .stock_events import publish_rows
+from .stock_alerts import stock_levels_changed
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Line statuses returned by decrement_stock
+APPLIED = 'applied'
+INSUFFICIENT = 'insufficient'
+NOT_FOUND = 'not_found'
+INVALID = 'invalid'
+
+
+def _quantity_case(quantities):
+    """
+    Build a CASE expression mapping product id -> requested quantity
+    """
+    return Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+
+def in_stock_after(quantity):
+    """
+    in_stock value after subtracting quantity (evaluated against the pre-update stock)
+    """
+    return Case(
+        When(stock__gt=quantity, then=Value(True)),
+        default=Value(False)
+    )
+
+
+def normalize_items(items):
+    """
+    Validate cart lines and merge duplicate products
+    Returns (quantities, invalid_items) where quantities preserves first-seen order
+    """
+    quantities = {}
+    invalid_items = []
+
+    for item in items:
+        product_id = item.get('productId') or item.get('id')
+        quantity = item.get('quantity', 0)
+
+        try:
+            product_id = int(product_id)
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            invalid_items.append(item)
+            continue
+
+        if quantity <= 0:
+            invalid_items.append(item)
+            continue
+
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    return quantities, invalid_items
+
+
+def apply_guarded_update(quantities, guard, changes):
+    """
+    Apply a conditional UPDATE to every product in quantities
+
+    guard(quantity) returns filter kwargs that must hold for the row to change,
+    changes(quantity) returns the update kwargs; both receive a per-row quantity
+    expression. The whole set is tried as one statement first; if any row fails
+    its guard, that statement is rolled back and rows are applied one by one.
+    Changed rows share one change version (delta sync).
+    Must be called inside a transaction. Returns the set of product ids changed.
+    """
+    quantity = _quantity_case(quantities)
+    stamp = change_stamp()
+    savepoint = transaction.savepoint()
+    updated = Product.objects.filter(id__in=list(quantities), **guard(quantity)).update(**changes(quantity), **stamp)
+
+    if updated == len(quantities):
+        transaction.savepoint_commit(savepoint)
+        return set(quantities)
+
+    transaction.savepoint_rollback(savepoint)
+    applied = set()
+    for product_id, line_quantity in quantities.items():
+        line_quantity = Value(line_quantity)
+        if Product.objects.filter(id=product_id, **guard(line_quantity)).update(**changes(line_quantity), **stamp):
+            applied.add(product_id)
+    return applied
+
+
+def _decrement_guard(quantity):
+    # Only unreserved units may be sold without a reservation
+    return {'stock__gte': F('reserved') + quantity}
+
+
+def _decrement_changes(quantity):
+    return {
+        'stock': F('stock') - quantity,
+        'in_stock': in_stock_after(quantity)
+    }
+
+
+def build_line_results(quantities, applied, rows):
+    """
+    Turn applied ids and fresh product rows into per-line result dicts
+    rows maps product id -> {'name', 'category', 'selling_price', 'stock', 'reserved', 'in_stock'} read after the update
+    """
+    results = []
+    for product_id, quantity in quantities.items():
+        row = rows.get(product_id)
+
+        if row is None:
+            results.append({
+                'status': NOT_FOUND,
+                'product_id': product_id,
+                'quantity': quantity,
+                'error': f"Product with ID {product_id} not found"
+            })
+        elif product_id in applied:
+            results.append({
+                'status': APPLIED,
+                'product_id': product_id,
+                'product_name': row['name'],
+                'quantity': quantity,
+                'original_stock': row['stock'] + quantity,
+                'new_stock': row['stock'],
+                'in_stock': row['in_stock']
+            })
+        else:
+            available = row['stock'] - row['reserved']
+            results.append({
+                'status': INSUFFICIENT,
+                'product_id': product_id,
+                'product_name': row['name'],
+                'quantity': quantity,
+                'available': available,
+                'error': f"Insufficient stock for {row['name']}. Available: {available}, Requested: {quantity}"
+            })
+    return results
+
+
+def fetch_rows(product_ids):
+    """
+    Read the columns needed for line results in one query
+    """
+    return {
+        row['id']: row
+        for row in Product.objects.filter(id__in=list(product_ids)).values(
+            'id', 'name', 'category', 'selling_price', 'stock', 'reserved', 'in_stock'
+        )
+    }
+
+
+def stock_changed(applied, rows, deltas=None):
+    """
+    Invalidate cached catalog responses, push the new stock to subscribers and
+    raise/resolve low stock alerts for products that crossed the threshold
+    deltas maps product id -> signed stock change applied (omit for reserved-only changes)
+    """
+    if applied:
+        bump_catalog_version(rows[product_id]['category'] for product_id in applied if product_id in rows)
+        publish_rows(rows[product_id] for product_id in applied if product_id in rows)
+        if deltas:
+            stock_levels_changed({
+                product_id: (rows[product_id]['stock'] - deltas[product_id], rows[product_id]['stock'])
+                for product_id in applied if product_id in rows
+            })
+
+
+def decrement_stock(items):
+    """
+    Atomically decrement stock for a whole cart
+
+    Every line is guarded by ``stock - reserved >= quantity`` inside the UPDATE
+    itself, so concurrent checkouts can never oversell. The common case (every
+    line has enough stock) costs one UPDATE plus one SELECT regardless of cart
+    size; if any line is short, each line is re-applied on its own so it gets
+    an exact result.
+
+    Returns a list of per-line result dicts, invalid lines first, then one
+    entry per product in cart order.
+    """
+    quantities, invalid_items = normalize_items(items)
+
+    results = [
+        {'status': INVALID, 'item': item, 'error': f"Invalid item data: {item}"}
+        for item in invalid_items
+    ]
+
+    if not quantities:
+        return results
+
+    with transaction.atomic():
+        applied = apply_guarded_update(quantities, _decrement_guard, _decrement_changes)
+        rows = fetch_rows(quantities)
+        stock_changed(applied, rows, {product_id: -quantity for product_id, quantity in quantities.items()})
+
+    logger.info(f"Stock decrement applied {len(applied)}/{len(quantities)} products")
+    return results + build_line_results(quantities, applied, rows)
+
+
+def increment_stock(product_id, quantity):
+    """
+    Atomically add quantity to a product's stock (restock)
+    Returns the fresh row dict, or None if the product does not exist
+    """
+    with transaction.atomic():
+        updated = Product.objects.filter(id=product_id).update(
+            stock=F('stock') + quantity,
+            in_stock=in_stock_after(-quantity),
+            **change_stamp()
+        )
+        if not updated:
+            return None
+        rows = fetch_rows([product_id])
+        stock_changed({product_id}, rows, {product_id: quantity})
+        return rows[product_id]
+
+
+def get_available_stock(product_ids):
+    """
+    Available (sellable) units per product: stock minus active reservations
+    Primary-key lookup against the maintained Product.reserved counter - no reservation scan
+    """
+    return dict(
+        Product.objects.filter(id__in=list(product_ids))
+        .annotate(available=F('stock') - F('reserved'))
+        .values_list('id', 'available')
+    )
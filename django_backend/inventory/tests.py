@@ -1,3 +1,1472 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+import requests
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from twilio.base.exceptions import TwilioRestException
+from .models import Product, LowStockAlert, StockReservation, AlertOutbox, ManagerProfile, IdempotencyKey, CatalogVersion
+from .idempotency import idempotent, purge_expired_keys
+from .facets import build_filters, facet_counts
+from .pagination import KeysetPagination
+from .catalog_snapshots import CatalogSnapshot
+from .renderers import FastJSONRenderer
+from .serializers import (
+    CustomerProductSerializer, ProductSerializer, customer_product_list_serializer, product_list_serializer
+)
+from .catalog_cache import CATALOG_SCOPE, SEARCH_SCOPE, bump_version_now, category_scope, get_cache as get_catalog_cache, get_watermark
+from .change_tracking import purge_tombstones
+from .stock_service import decrement_stock, increment_stock
+from .reservation_service import (
+    attach_order, commit_reservations, fulfil_order, release_expired_reservations, reserve_stock
+)
+from .stock_alerts import CROSSED_BELOW, RECOVERED_ABOVE, stock_levels_changed, sync_alert_settings, threshold_crossings
+from .stock_events import broker, event_stream
+from .search_index import ProductSearchIndex
+from .whatsapp_service import (
+    WhatsAppService, WHATSAPP_MAX_LENGTH, account_status_cache, low_stock_candidates, message_length
+)
+from .messaging import FakeTransport, FileTransport, MessageTransport, TwilioTransport, get_transport
+from .alert_outbox import AlertOutboxWorker, outbox_stats, retry_dead_letters
+from .manager_profile import ManagerProfileCache, profile_cache
+from .outbound import RAZORPAY, TWILIO, BulkheadFull, CircuitOpen, Dependency, LatencyHistogram, dependency
+from . import views
+from . import async_views
 
-# Create your tests here.
+
+@skipUnless(connection.vendor == 'sqlite', 'Plan assertions use SQLite EXPLAIN QUERY PLAN output')
+class HotQueryPlanTests(TestCase):
+    """
+    Fails if a hot inventory query falls back to a full table scan (or an extra sort where order matters)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            name='Basmati Rice', category='Groceries', selling_price=180, cost_price=150, stock=5
+        )
+        Product.objects.create(name='Garam Masala', category='Spices', selling_price=150, cost_price=100, stock=30)
+
+    def assertUsesIndex(self, queryset, ordered=False):
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            detail = line.split(None, 3)[-1]
+            if detail.startswith('SCAN') and 'INDEX' not in detail:
+                self.fail(f"Full table scan in plan for {queryset.query}:\n{plan}")
+            if ordered and 'TEMP B-TREE' in detail:
+                self.fail(f"Sort without index in plan for {queryset.query}:\n{plan}")
+
+    def test_customer_products_category_filter(self):
+        self.assertUsesIndex(Product.objects.filter(category='Spices').order_by('id'), ordered=True)
+
+    def test_category_keyset_page(self):
+        paginator = KeysetPagination()
+        fields = paginator.orderings['category']
+        queryset = paginator.after(Product.objects.order_by(*fields), fields, ['Groceries', 'Basmati Rice', 1])
+        self.assertUsesIndex(queryset[:51], ordered=True)
+
+    def test_distinct_categories(self):
+        self.assertUsesIndex(Product.objects.values_list('category', flat=True).distinct())
+
+    def test_low_stock_scan(self):
+        self.assertUsesIndex(Product.objects.filter(stock__lte=10))
+
+    def test_product_by_name(self):
+        self.assertUsesIndex(Product.objects.filter(name='Basmati Rice'))
+
+    def test_unresolved_alert_probe(self):
+        self.assertUsesIndex(LowStockAlert.objects.filter(
+            product=self.product, threshold_value=10, is_resolved=False
+        ), ordered=True)
+
+    def test_alert_history(self):
+        self.assertUsesIndex(LowStockAlert.objects.order_by('-sent_at')[:50], ordered=True)
+
+    def test_low_stock_alert_candidates(self):
+        self.assertUsesIndex(low_stock_candidates(10))
+
+    def test_expired_reservation_sweep(self):
+        self.assertUsesIndex(StockReservation.objects.filter(
+            status=StockReservation.ACTIVE, expires_at__lte=timezone.now()
+        ))
+
+    def test_reservations_by_order(self):
+        self.assertUsesIndex(StockReservation.objects.filter(
+            order_id='order_123', status=StockReservation.ACTIVE
+        ))
+
+    def test_delta_sync_page(self):
+        paginator = KeysetPagination()
+        fields = ('change_version', 'id')
+        queryset = paginator.after(Product.objects.order_by(*fields), fields, [10, 1])
+        self.assertUsesIndex(queryset[:1001], ordered=True)
+
+
+class StockDecrementTests(TestCase):
+    """
+    decrement_stock - guarded against overselling, exact per-line results when a cart is short
+    """
+
+    def setUp(self):
+        self.rice = Product.objects.create(name='Basmati Rice', category='Groceries', selling_price=180, stock=10)
+        self.masala = Product.objects.create(name='Garam Masala', category='Spices', selling_price=150, stock=3)
+
+    def test_whole_cart_applied(self):
+        results = decrement_stock([
+            {'productId': self.rice.id, 'quantity': 4},
+            {'productId': self.masala.id, 'quantity': 3},
+            {'productId': self.rice.id, 'quantity': 1},  # Duplicate lines are merged
+        ])
+        self.assertEqual([(line['status'], line['quantity'], line['new_stock']) for line in results],
+                         [('applied', 5, 5), ('applied', 3, 0)])
+        self.masala.refresh_from_db()
+        self.assertEqual((self.masala.stock, self.masala.in_stock), (0, False))
+        self.assertTrue(Product.objects.get(id=self.rice.id).in_stock)
+
+    def test_short_line_falls_back_per_line(self):
+        results = decrement_stock([
+            {'productId': self.rice.id, 'quantity': 2},
+            {'productId': self.masala.id, 'quantity': 4},
+        ])
+        self.assertEqual([line['status'] for line in results], ['applied', 'insufficient'])
+        self.assertEqual(results[1]['available'], 3)
+        self.assertEqual(list(Product.objects.order_by('id').values_list('stock', flat=True)), [8, 3])
+
+    def test_reserved_units_are_not_sold(self):
+        Product.objects.filter(id=self.rice.id).update(reserved=8)
+        results = decrement_stock([{'productId': self.rice.id, 'quantity': 3}])
+        self.assertEqual((results[0]['status'], results[0]['available']), ('insufficient', 2))
+        self.assertEqual(decrement_stock([{'productId': self.rice.id, 'quantity': 2}])[0]['status'], 'applied')
+        self.assertEqual(Product.objects.get(id=self.rice.id).stock, 8)
+
+    def test_invalid_and_unknown_lines(self):
+        results = decrement_stock([
+            {'productId': 'abc', 'quantity': 1},
+            {'productId': self.rice.id, 'quantity': 0},
+            {'productId': 999999, 'quantity': 1},
+            {'productId': self.rice.id, 'quantity': 1},
+        ])
+        self.assertEqual([line['status'] for line in results], ['invalid', 'invalid', 'not_found', 'applied'])
+        self.assertEqual(decrement_stock([{'quantity': 1}])[0]['status'], 'invalid')
+        self.assertEqual(Product.objects.get(id=self.rice.id).stock, 9)
+
+    def test_restock_flips_in_stock(self):
+        decrement_stock([{'productId': self.masala.id, 'quantity': 3}])
+        self.assertFalse(Product.objects.get(id=self.masala.id).in_stock)
+        self.assertEqual(increment_stock(self.masala.id, 2)['stock'], 2)
+        self.assertTrue(Product.objects.get(id=self.masala.id).in_stock)
+        self.assertIsNone(increment_stock(999999, 2))
+
+
+class StockReservationTests(TestCase):
+    """
+    Checkout holds - all or nothing, released on expiry, committed once per order
+    """
+
+    def setUp(self):
+        self.rice = Product.objects.create(name='Basmati Rice', category='Groceries', selling_price=180, stock=10)
+        self.masala = Product.objects.create(name='Garam Masala', category='Spices', selling_price=150, stock=3)
+
+    def stock_and_reserved(self):
+        return list(Product.objects.order_by('id').values_list('stock', 'reserved'))
+
+    def test_reservation_is_all_or_nothing(self):
+        key, results = reserve_stock([
+            {'productId': self.rice.id, 'quantity': 2},
+            {'productId': self.masala.id, 'quantity': 4},
+        ])
+        self.assertIsNone(key)
+        self.assertEqual([line['status'] for line in results], ['insufficient'])
+        self.assertEqual(self.stock_and_reserved(), [(10, 0), (3, 0)])
+        self.assertFalse(StockReservation.objects.exists())
+
+        key, results = reserve_stock([{'productId': self.masala.id, 'quantity': 3}])
+        self.assertIsNotNone(key)
+        self.assertEqual(results[0]['available'], 0)
+        self.assertIsNone(reserve_stock([{'productId': self.masala.id, 'quantity': 1}])[0])
+
+    def test_bad_cart_is_400_shortfall_is_409(self):
+        def create_order(*items):
+            return self.client.post('/api/payment/create-order/', {'amount': 100, 'items': list(items)},
+                                    content_type='application/json')
+
+        for bad in ({'productId': 'rice', 'quantity': 1}, {'productId': self.rice.id, 'quantity': 0},
+                    {'productId': self.rice.id, 'quantity': -2}, {'productId': 999999, 'quantity': 1}):
+            with self.subTest(item=bad):
+                response = create_order({'productId': self.masala.id, 'quantity': 1}, bad)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Invalid cart items')
+
+        response = create_order({'productId': self.masala.id, 'quantity': 4})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['error'], 'Some items are no longer available')
+        self.assertEqual(self.stock_and_reserved(), [(10, 0), (3, 0)])
+
+    def test_expired_holds_are_released(self):
+        key, _ = reserve_stock([{'productId': self.masala.id, 'quantity': 3}])
+        StockReservation.objects.filter(reservation_key=key).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(release_expired_reservations(), 1)
+        self.assertEqual(self.stock_and_reserved()[1], (3, 0))
+        self.assertEqual(StockReservation.objects.get().status, StockReservation.EXPIRED)
+        self.assertEqual(release_expired_reservations(), 0)
+
+    def test_commit_and_repeated_fulfil(self):
+        items = [{'productId': self.rice.id, 'quantity': 4}, {'productId': self.masala.id, 'quantity': 1}]
+        key, _ = reserve_stock(items)
+        attach_order(key, 'order_1')
+        self.assertEqual(self.stock_and_reserved(), [(10, 4), (3, 1)])
+
+        results = fulfil_order('order_1', items)
+        self.assertEqual([line['status'] for line in results], ['applied', 'applied'])
+        self.assertEqual(self.stock_and_reserved(), [(6, 0), (2, 0)])
+
+        # Payment webhook and client confirmation both arrive - the second is a no-op
+        self.assertEqual(fulfil_order('order_1', items), [])
+        self.assertEqual(commit_reservations('order_1'), [])
+        self.assertEqual(self.stock_and_reserved(), [(6, 0), (2, 0)])
+
+    def test_full_save_keeps_reserved(self):
+        product = Product.objects.get(id=self.rice.id)
+        reserve_stock([{'productId': self.rice.id, 'quantity': 4}])
+        product.name = 'Basmati Rice 5kg'
+        product.save()
+        response = self.client.put(f'/api/products/{self.rice.id}/', {
+            'name': 'Basmati Rice 10kg', 'category': 'Groceries', 'selling_price': '190.00', 'stock': 10
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Product.objects.get(id=self.rice.id).reserved, 4)
+
+
+class IdempotencyTests(TestCase):
+    """
+    @idempotent - a repeated Idempotency-Key replays the stored response instead of re-running the view
+    """
+
+    def setUp(self):
+        self.calls = []
+        self.status = 201
+
+        @api_view(['POST'])
+        @idempotent('test-scope')
+        def view(request):
+            self.calls.append(request.data)
+            return Response({'call': len(self.calls)}, status=self.status)
+
+        self.view = view
+        self.factory = APIRequestFactory()
+
+    def post(self, data=None, key='key-1'):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.view(self.factory.post('/test/', data or {'amount': 100}, format='json', **headers))
+
+    def test_replays_stored_response(self):
+        first = self.post()
+        replay = self.post()
+        self.assertEqual((first.status_code, first.data), (201, {'call': 1}))
+        self.assertEqual((replay.status_code, replay.data), (201, {'call': 1}))
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(len(self.calls), 1)
+        # No header - runs every time
+        self.post(key=None)
+        self.post(key=None)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_in_flight_key_conflicts(self):
+        IdempotencyKey.objects.create(scope='test-scope', key='key-1', request_hash='x',
+                                      expires_at=timezone.now() + timedelta(seconds=60))
+        self.assertEqual(self.post().status_code, 409)
+        self.assertFalse(self.calls)
+
+    def test_different_request_same_key(self):
+        self.post()
+        self.assertEqual(self.post({'amount': 200}).status_code, 422)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_server_errors_are_not_stored(self):
+        self.status = 503
+        self.assertEqual(self.post().status_code, 503)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.status = 201
+        self.assertEqual(self.post().data, {'call': 2})
+
+    def test_purge_expired_keys(self):
+        self.post()
+        self.post(key='key-2')
+        IdempotencyKey.objects.filter(key='key-1').update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(purge_expired_keys(batch_size=1), 1)
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['key-2'])
+        # An expired key can be used again
+        self.assertEqual(self.post().data, {'call': 3})
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Opt-in keyset pages - every row exactly once, ties broken by id, in both directions
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Few distinct prices and names, so most page boundaries fall inside a tie
+        Product.objects.bulk_create([
+            Product(name=f'Product {i % 3}', category=('Spices', 'Snacks')[i % 2],
+                    selling_price=100 + i % 4, stock=i)
+            for i in range(23)
+        ])
+
+    def walk(self, ordering, page_size=5):
+        ids, params = [], {'ordering': ordering, 'page_size': page_size}
+        while True:
+            body = self.client.get('/api/products/', params).json()
+            self.assertLessEqual(len(body['results']), page_size)
+            ids += [row['id'] for row in body['results']]
+            if not body['next_cursor']:
+                return ids
+            params['cursor'] = body['next_cursor']
+
+    def test_pages_cover_the_list_once(self):
+        expected = {
+            'id': Product.objects.order_by('id'),
+            'category': Product.objects.order_by('category', 'name', 'id'),
+            'price': Product.objects.order_by('selling_price', 'id'),
+            '-price': Product.objects.order_by('-selling_price', '-id'),
+            '-stock': Product.objects.order_by('-stock', '-id'),
+        }
+        for ordering, queryset in expected.items():
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.walk(ordering), list(queryset.values_list('id', flat=True)))
+
+    def test_unpaginated_list_uses_the_same_order(self):
+        body = self.client.get('/api/products/', {'ordering': '-price'}).json()
+        self.assertEqual([row['id'] for row in body], self.walk('-price'))
+
+    def test_cursor_round_trip_and_bad_cursor(self):
+        paginator = KeysetPagination()
+        cursor = paginator.encode_cursor(['Snacks', 'Product 1', 7])
+        self.assertEqual(paginator.decode_values(cursor, ('category', 'name', 'id')), ['Snacks', 'Product 1', 7])
+        for bad in ('not-base64!', paginator.encode_cursor([1, 2])):
+            response = self.client.get('/api/products/', {'ordering': 'id', 'cursor': bad})
+            self.assertEqual(response.status_code, 404)
+
+    def test_customer_cursor_holds_no_internal_columns(self):
+        Product.objects.update(profit_margin=Decimal('37.25'), cost_price=Decimal('63.10'))
+        paginator = KeysetPagination()
+        for ordering in ('margin', '-margin'):
+            with self.subTest(ordering=ordering):
+                body = self.client.get('/api/customer/products/', {'ordering': ordering, 'page_size': 5}).json()
+                raw = base64.urlsafe_b64decode(body['next_cursor']).decode('utf-8')
+                self.assertNotIn('37.25', raw)
+                self.assertNotIn('63.10', raw)
+                # Falls back to id order
+                self.assertEqual(paginator.decode_values(body['next_cursor'], ('id',)), [body['results'][-1]['id']])
+                self.assertEqual([row['id'] for row in body['results']],
+                                 list(Product.objects.order_by('id').values_list('id', flat=True)[:5]))
+
+        # The manager list still pages by margin
+        body = self.client.get('/api/products/', {'ordering': 'margin', 'page_size': 5}).json()
+        self.assertEqual(paginator.decode_values(body['next_cursor'], ('profit_margin', 'id'))[0], '37.25')
+
+
+class FacetTests(TestCase):
+    """
+    Faceted listing - each dimension's counts ignore that dimension's own filter
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for name, category, price, stock in [('Basmati Rice', 'Groceries', 180, 10), ('Brown Rice', 'Groceries', 90, 0),
+                                             ('Garam Masala', 'Spices', 150, 30), ('Chilli Powder', 'Spices', 40, 5),
+                                             ('Potato Chips', 'Snacks', 20, 0)]:
+            Product.objects.create(name=name, category=category, selling_price=price, cost_price=price / 2, stock=stock,
+                                   demand_level='High' if category == 'Spices' else 'Normal')
+
+    def names(self, *conditions):
+        return sorted(Product.objects.filter(*conditions).values_list('name', flat=True))
+
+    def test_build_filters(self):
+        base, faceted = build_filters({'category': ['Spices', 'Snacks'], 'in_stock': True, 'min_price': 30,
+                                       'max_price': 160, 'demand_level': ['High'], 'min_margin': 10})
+        self.assertEqual(set(faceted), {'category', 'in_stock', 'price'})
+        self.assertEqual(self.names(base), ['Chilli Powder', 'Garam Masala'])
+        self.assertEqual(self.names(faceted['category']), ['Chilli Powder', 'Garam Masala', 'Potato Chips'])
+        self.assertEqual(self.names(faceted['price']), ['Brown Rice', 'Chilli Powder', 'Garam Masala'])
+        self.assertEqual(self.names(base, *faceted.values()), ['Chilli Powder', 'Garam Masala'])
+
+        base, faceted = build_filters({'in_stock': None})
+        self.assertEqual((faceted, len(self.names(base))), ({}, 5))
+
+    def test_counts_ignore_own_dimension(self):
+        _, faceted = build_filters({'category': ['Spices'], 'in_stock': True})
+        counts = facet_counts(Product.objects.all(), faceted)
+        self.assertEqual(counts['count'], 2)
+        facets = counts['facets']
+        # Categories counted with the stock filter only, stock status with the category filter only
+        self.assertEqual(facets['category'], [{'value': 'Spices', 'count': 2}, {'value': 'Groceries', 'count': 1}])
+        self.assertEqual(facets['in_stock'], {'true': 2, 'false': 0})
+        self.assertEqual([bucket['count'] for bucket in facets['price']], [1, 0, 1, 0, 0, 0])
+        self.assertEqual((facets['price'][-1]['min'], facets['price'][-1]['max']), (1000, None))
+
+    def test_endpoint(self):
+        with self.assertNumQueries(3):  # Version lookup, the page, the facet aggregate
+            body = self.client.get('/api/products/facets/', {'category': 'Groceries,Snacks', 'ordering': '-price',
+                                                              'page_size': 2}).json()
+        self.assertEqual(body['count'], 3)
+        self.assertEqual([row['name'] for row in body['results']], ['Basmati Rice', 'Brown Rice'])
+        self.assertIsNotNone(body['next_cursor'])
+        self.assertEqual(body['facets']['in_stock'], {'true': 1, 'false': 2})
+
+        response = self.client.get('/api/products/facets/', {'demand_level': 'Urgent'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CatalogCacheTests(TestCase):
+    """
+    Catalog responses are cached per scope version - a committed write bumps the version and the next read rebuilds
+    """
+
+    def setUp(self):
+        get_catalog_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rice = Product.objects.create(name='Basmati Rice', category='Groceries', selling_price=180, stock=10)
+            Product.objects.create(name='Garam Masala', category='Spices', selling_price=150, stock=30)
+
+    def versions(self, *scopes):
+        return get_watermark(RequestFactory().get('/'), scopes)[0]
+
+    def test_cached_until_a_write_commits(self):
+        self.assertEqual(self.client.get('/api/customer/categories/').json(), ['Groceries', 'Spices'])
+        with self.assertNumQueries(1):  # Version lookup only
+            self.assertEqual(self.client.get('/api/customer/categories/').json(), ['Groceries', 'Spices'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Potato Chips', category='Snacks', selling_price=20, stock=5)
+        self.assertEqual(sorted(self.client.get('/api/customer/categories/').json()), ['Groceries', 'Snacks', 'Spices'])
+
+    def test_stock_write_invalidates_only_its_category(self):
+        params = {'category': 'Groceries', 'page_size': 10}
+        self.assertEqual(self.client.get('/api/customer/products/', params).json()['results'][0]['stock'], 10)
+        before = self.versions(CATALOG_SCOPE, category_scope('Groceries'), category_scope('Spices'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            decrement_stock([{'productId': self.rice.id, 'quantity': 4}])
+        after = self.versions(CATALOG_SCOPE, category_scope('Groceries'), category_scope('Spices'))
+        self.assertEqual([new - old for old, new in zip(before, after)], [1, 1, 0])
+        self.assertEqual(self.client.get('/api/customer/products/', params).json()['results'][0]['stock'], 6)
+
+    def test_rolled_back_write_keeps_the_cache(self):
+        before = self.versions(CATALOG_SCOPE)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            decrement_stock([{'productId': self.rice.id, 'quantity': 4}])
+        self.assertTrue(callbacks)  # Bumped after commit, never inside the checkout transaction
+        self.assertEqual(self.versions(CATALOG_SCOPE), before)
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Catalog lists carry an ETag/Last-Modified and answer 304 until the catalog changes; errors are never tagged
+    """
+
+    def setUp(self):
+        get_catalog_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rice = Product.objects.create(name='Basmati Rice', category='Groceries', selling_price=180, stock=10)
+
+    def test_etag_and_not_modified(self):
+        for url in ('/api/customer/products/', '/api/products/', '/api/customer/categories/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(1):  # Version lookup only - no list query, no serializer
+                    cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_write_changes_the_etag(self):
+        etag = self.client.get('/api/customer/products/')['ETag']
+        self.assertNotEqual(self.client.get('/api/customer/products/', {'page_size': 5})['ETag'], etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            increment_stock(self.rice.id, 5)
+        response = self.client.get('/api/customer/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_error_responses_are_not_tagged(self):
+        for url, params in (('/api/customer/products/', {'cursor': 'bogus'}),
+                            ('/api/products/facets/', {'min_price': 'cheap'})):
+            with self.subTest(url=url):
+                response = self.client.get(url, params)
+                self.assertGreaterEqual(response.status_code, 400)
+                self.assertFalse(response.has_header('ETag'))
+                self.assertFalse(response.has_header('Last-Modified'))
+
+
+class CatalogSnapshotTests(TestCase):
+    """
+    Pre-rendered customer catalog - byte-identical to the serializer, only a written category re-rendered
+    """
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(12):
+                Product.objects.create(name=f'Product {i:02d}', category=('Spices', 'Snacks', 'Dairy')[i % 3],
+                                       selling_price=100 + i, cost_price=80, stock=i)
+        self.snapshot = CatalogSnapshot()
+
+    @staticmethod
+    def rendered(products):
+        return FastJSONRenderer().render(CustomerProductSerializer(products.order_by('id'), many=True).data)
+
+    def test_blobs_match_the_serializer(self):
+        self.assertEqual(self.snapshot.catalog_bytes(), self.rendered(Product.objects.all()))
+        self.assertEqual(self.snapshot.category_bytes('Snacks'), self.rendered(Product.objects.filter(category='Snacks')))
+        self.assertEqual(self.snapshot.category_bytes('Toys'), b'[]')
+
+    def test_write_rebuilds_only_its_category(self):
+        self.snapshot.catalog_bytes()
+        product = Product.objects.filter(category='Snacks').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            product.stock = 99
+            product.save()
+
+        with mock.patch.object(self.snapshot, '_rebuild_category', wraps=self.snapshot._rebuild_category) as rebuild:
+            self.assertEqual(self.snapshot.catalog_bytes(), self.rendered(Product.objects.all()))
+        self.assertEqual([call.args[0] for call in rebuild.call_args_list], ['Snacks'])
+        self.assertEqual(self.snapshot.stats()['rebuilds'], 2)
+
+    def test_moved_product_leaves_its_old_category(self):
+        self.snapshot.catalog_bytes()
+        product = Product.objects.filter(category='Dairy').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            product.category = 'Spices'
+            product.save()
+        self.assertEqual(self.snapshot.category_bytes('Dairy'), self.rendered(Product.objects.filter(category='Dairy')))
+        self.assertEqual(self.snapshot.category_bytes('Spices'), self.rendered(Product.objects.filter(category='Spices')))
+        self.assertEqual(self.snapshot.catalog_bytes(), self.rendered(Product.objects.all()))
+
+    def test_version_check_runs_outside_the_lock(self):
+        self.snapshot.catalog_bytes()
+        locked = []
+
+        def record(execute, sql, params, many, context):
+            locked.append(self.snapshot._lock.locked())
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            self.snapshot.catalog_bytes()
+            self.snapshot.category_bytes('Snacks')
+        self.assertEqual(locked, [False, False])  # One version query per hit, none under the lock
+
+
+class ListSerializerTests(TestCase):
+    """
+    values_list() list mode renders the same bytes as the DRF serializers it stands in for
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create([
+            Product(name='Basmati Rice', category='Groceries', selling_price='180.50', cost_price='150.25',
+                    profit_per_unit='30.25', profit_margin='16.76', stock=5, reserved=2, demand_level='High'),
+            Product(name='Free Sample', category='Snacks', selling_price='0.00', cost_price='-0.00', stock=0,
+                    in_stock=False),
+            Product(name='Saffron "Kashmiri" 1g', category='Spices', selling_price='99999999.99',
+                    cost_price='0.01', profit_margin='99.99', stock=1000000),
+        ])
+
+    def test_matches_drf_serializers(self):
+        render = FastJSONRenderer().render
+        products = Product.objects.order_by('id')
+        for serializer_class, list_serializer in ((ProductSerializer, product_list_serializer),
+                                                  (CustomerProductSerializer, customer_product_list_serializer)):
+            with self.subTest(serializer=serializer_class.__name__):
+                expected = render(serializer_class(products, many=True).data)
+                self.assertEqual(render(list_serializer.serialize(list_serializer.project(products))), expected)
+
+    def test_list_endpoint_bytes(self):
+        expected = FastJSONRenderer().render(ProductSerializer(Product.objects.order_by('id'), many=True).data)
+        self.assertEqual(self.client.get('/api/products/').content, expected)
+
+
+class SparseFieldsetTests(TestCase):
+    """
+    ?fields= / ?exclude= - narrowed output in serializer order, unknown names rejected with 400
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(name='Basmati Rice', category='Groceries', selling_price=180, cost_price=150, stock=5)
+
+    def test_fields_and_exclude(self):
+        row = self.client.get('/api/products/', {'fields': 'stock, name,id'}).json()[0]
+        self.assertEqual(list(row), ['id', 'name', 'stock'])
+        row = self.client.get('/api/products/', {'exclude': 'cost_price,profit_per_unit,profit_margin'}).json()[0]
+        self.assertNotIn('cost_price', row)
+        self.assertIn('selling_price', row)
+        row = self.client.get('/api/products/', {'fields': 'id,name,stock', 'exclude': 'stock'}).json()[0]
+        self.assertEqual(list(row), ['id', 'name'])
+        # Keyset cursors still work when the ordering column is not selected
+        body = self.client.get('/api/products/', {'fields': 'id', 'ordering': 'price', 'page_size': 1}).json()
+        self.assertEqual(list(body['results'][0]), ['id'])
+
+    def test_invalid_selections(self):
+        response = self.client.get('/api/products/', {'fields': 'id,secret', 'exclude': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'fields', 'exclude'})
+        self.assertEqual(self.client.get('/api/products/', {'fields': 'id', 'exclude': 'id'}).status_code, 400)
+        # Customer view: only its own fields (price alias, no cost data)
+        self.assertEqual(list(customer_product_list_serializer.restrict(fields=['price', 'id']).names), ['id', 'price'])
+        with self.assertRaises(ValidationError):
+            customer_product_list_serializer.restrict(fields=['cost_price'])
+
+
+class SearchIndexTests(TestCase):
+    """
+    Prefix search - tiered ranking, incremental updates in this process, rebuild after another process's write
+    """
+
+    def setUp(self):
+        names = ['Basmati Rice', 'Brown Rice', 'Rice Flour', 'Basmati Rice Premium Aged 5kg', 'Garam Masala',
+                 'Rice Bran Oil']
+        self.products = {name: Product.objects.create(name=name, category='Groceries', selling_price=100, stock=5)
+                         for name in names}
+        self.index = ProductSearchIndex()
+
+    def ids(self, *names):
+        return [self.products[name].id for name in names]
+
+    def test_ranking(self):
+        # Tier 0 (name starts with the query), then tier 1 (whole words), then shorter names first
+        self.assertEqual(self.index.search('rice', 10), self.ids('Rice Flour', 'Rice Bran Oil', 'Brown Rice', 'Basmati Rice',
+                                                                 'Basmati Rice Premium Aged 5kg'))
+        self.assertEqual(self.index.search('basmati ri'), self.ids('Basmati Rice', 'Basmati Rice Premium Aged 5kg'))
+        self.assertEqual(self.index.search('groc masala'), self.ids('Garam Masala'))
+        self.assertEqual(self.index.search('basmati', 1), self.ids('Basmati Rice'))
+        self.assertEqual(self.index.search('saffron'), [])
+        self.assertEqual(self.index.search('  '), [])
+
+    def test_name_match_found_behind_many_word_matches(self):
+        # Twenty shorter names contain "rice" as a later word, the one name starting with it is long
+        for i in range(20):
+            Product.objects.create(name=f'Red{i:02d} Rice', category='Groceries', selling_price=100, stock=5)
+        long_name = Product.objects.create(name='Rice Noodles Family Pack Extra Large', category='Groceries',
+                                           selling_price=100, stock=5)
+        self.index.scan_factor = 2
+        self.assertEqual(self.index.search('rice', 3)[2], long_name.id)
+
+    def test_broad_name_range_walks_postings(self):
+        # More names start with "amul" than limit * scan_factor - ranked through the postings instead
+        amul = [Product.objects.create(name=name, category='Dairy', selling_price=100, stock=5)
+                for name in ['Amul Gold Full Cream Milk', 'Amul Butter', 'Amul Cheese Slices', 'Amul Ghee',
+                             'Amul Taaza', 'Amul Kool Cafe']]
+        Product.objects.create(name='Kadai Amul Paneer', category='Dairy', selling_price=100, stock=5)
+        self.index.scan_factor = 1
+        by_rank = sorted(amul, key=lambda product: (len(product.name), product.name.lower()))
+        self.assertEqual(self.index.search('amul', 3), [product.id for product in by_rank[:3]])
+        self.assertEqual(self.index.search('amul ch', 3), [amul[2].id])
+
+    def test_incremental_updates(self):
+        self.index.search('rice')
+        rice = self.products['Brown Rice']
+        Product.objects.filter(id=rice.id).update(name='Brown Jasmine')
+        self.index.apply(rice.id, 'Brown Jasmine', 'Groceries')
+        created = Product.objects.create(name='Jasmine Rice', category='Groceries', selling_price=100, stock=5)
+        self.index.apply(created.id, 'Jasmine Rice', 'Groceries')
+        flour = self.products['Rice Flour']
+        self.index.apply(flour.id)  # Deleted
+
+        self.assertEqual(self.index.search('jasmine'), [created.id, rice.id])
+        self.assertNotIn(rice.id, self.index.search('rice', 10))
+        self.assertNotIn(flour.id, self.index.search('rice', 10))
+        self.assertEqual(self.index.builds, 1)
+
+    def test_write_in_another_process_rebuilds(self):
+        self.index.recheck_interval = 0
+        self.index.search('rice')
+        created = Product.objects.create(name='Sona Masoori Rice', category='Groceries', selling_price=100, stock=5)
+        bump_version_now(SEARCH_SCOPE)  # What another process's apply() does
+        self.assertIn(created.id, self.index.search('sona'))
+        self.assertEqual(self.index.builds, 2)
+
+        # A local write that finds the version moved by someone else resyncs instead of applying on top
+        self.index.recheck_interval = 60
+        bump_version_now(SEARCH_SCOPE)
+        self.index.apply(created.id)
+        self.assertIsNone(self.index.stats()['version'])
+        self.index.search('sona')
+        self.assertEqual(self.index.builds, 3)
+
+
+class FuzzySearchTests(TestCase):
+    """
+    Typo-tolerant search - trigram corrections, the similarity cut-off, index updates
+    """
+
+    def setUp(self):
+        self.products = {name: Product.objects.create(name=name, category='Groceries', selling_price=100, stock=5)
+                         for name in ['Basmati Rice', 'Garam Masala', 'Toor Dal']}
+        self.index = ProductSearchIndex()
+
+    def test_typo_corrected(self):
+        ids, corrections = self.index.fuzzy_search('basmti rice')
+        self.assertEqual(ids, [self.products['Basmati Rice'].id])
+        self.assertEqual(corrections, {'basmti': 'basmati'})
+
+        ids, corrections = self.index.fuzzy_search('garam masla')
+        self.assertEqual(ids, [self.products['Garam Masala'].id])
+        self.assertEqual(corrections, {'masla': 'masala'})
+
+        # Exact prefixes need no correction
+        self.assertEqual(self.index.fuzzy_search('toor'), ([self.products['Toor Dal'].id], {}))
+
+    def test_threshold(self):
+        self.assertEqual(self.index.fuzzy_search('xqzvw'), ([], {}))
+        self.index.fuzzy_threshold = 0.9
+        self.assertEqual(self.index.fuzzy_search('basmti'), ([], {}))
+
+    def test_rename_and_delete_update_trigrams(self):
+        self.index.fuzzy_search('basmti')
+        words = self.index.stats()['fuzzy_words']
+
+        masala = self.products['Garam Masala']
+        Product.objects.filter(id=masala.id).update(name='Garam Chaat')
+        self.index.apply(masala.id, 'Garam Chaat', 'Groceries')
+        self.assertEqual(self.index.fuzzy_search('masla'), ([], {}))
+        self.assertEqual(self.index.fuzzy_search('chat garam')[0], [masala.id])
+
+        toor = self.products['Toor Dal']
+        Product.objects.filter(id=toor.id).delete()
+        self.index.apply(toor.id)
+        self.assertEqual(self.index.fuzzy_search('tor'), ([], {}))
+        self.assertEqual(self.index.stats()['fuzzy_words'], words - 2)  # masala, toor, dal out - chaat in
+        self.assertEqual(self.index.builds, 1)
+
+
+class ProductExportTests(TestCase):
+    """
+    Streaming NDJSON/CSV export - same rows as the list endpoint, memory flat in catalog size
+    """
+
+    @staticmethod
+    def seed(count):
+        Product.objects.bulk_create([
+            Product(name=f'Product {i:06d}', category=('Spices', 'Snacks')[i % 2],
+                    selling_price=100 + i % 50, cost_price=80, stock=i % 20, in_stock=i % 20 > 0)
+            for i in range(count)
+        ])
+
+    def export(self, export_format, **params):
+        response = self.client.get(f'/api/manager/export-products/{export_format}/', params)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content)
+
+    def test_ndjson_matches_list_endpoint(self):
+        self.seed(25)
+        lines = self.export('ndjson').decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.client.get('/api/products/').json())
+
+    def test_csv_header_and_field_selection(self):
+        self.seed(5)
+        rows = list(csv.reader(io.StringIO(self.export('csv', fields='id,name,stock', category='Snacks').decode())))
+        self.assertEqual(rows[0], ['id', 'name', 'stock'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][1], 'Product 000001')
+
+    def test_empty_catalog_and_unknown_format(self):
+        self.assertEqual(self.export('csv').decode().splitlines()[0].split(',')[0], 'id')
+        self.assertEqual(self.client.get('/api/manager/export-products/xml/').status_code, 404)
+
+    def test_memory_stays_flat(self):
+        """
+        Peak memory while streaming 8x more rows stays within the same bound (one chunk in flight)
+        """
+        def peak(count):
+            Product.objects.all().delete()
+            self.seed(count)
+            tracemalloc.start()
+            for _ in self.client.get('/api/manager/export-products/ndjson/').streaming_content:
+                pass
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak_bytes
+
+        small, large = peak(2500), peak(20000)
+        self.assertLess(large, small * 1.5, f'peak grew from {small} to {large} bytes')
+
+
+@override_settings(DELTA_SYNC_SETTLE_SECONDS=0)
+class DeltaSyncTests(TestCase):
+    """
+    /api/products/changes/ - only rows written and ids deleted since the token
+    """
+
+    def setUp(self):
+        self.rice = Product.objects.create(name='Basmati Rice', category='Groceries', selling_price=180, stock=5)
+        self.masala = Product.objects.create(name='Garam Masala', category='Spices', selling_price=150, stock=30)
+
+    def changes(self, status_code=200, **params):
+        response = self.client.get('/api/products/changes/', params)
+        self.assertEqual(response.status_code, status_code)
+        return response.json()
+
+    def test_full_sync_then_only_changes(self):
+        full = self.changes()
+        self.assertEqual([row['id'] for row in full['changed']], [self.rice.id, self.masala.id])
+        self.assertFalse(full['has_more'])
+
+        # Nothing new - an empty delta
+        idle = self.changes(since=full['token'])
+        self.assertEqual((idle['changed'], idle['deleted']), ([], []))
+
+        decrement_stock([{'productId': self.masala.id, 'quantity': 2}])
+        rice_id = self.rice.id
+        self.rice.delete()
+        delta = self.changes(since=full['token'], fields='id,stock')
+        self.assertEqual(delta['changed'], [{'id': self.masala.id, 'stock': 28}])
+        self.assertEqual(delta['deleted'], [rice_id])
+        self.assertEqual(self.changes(since=delta['token'])['changed'], [])
+
+    def test_pages_resume_from_token(self):
+        token = self.changes()['token']
+        for product in Product.objects.order_by('-id'):
+            product.save()
+
+        first = self.changes(since=token, limit=1)
+        self.assertTrue(first['has_more'])
+        second = self.changes(since=first['token'], limit=1)
+        self.assertFalse(second['has_more'])
+        self.assertEqual([first['changed'][0]['id'], second['changed'][0]['id']], [self.masala.id, self.rice.id])
+
+    def test_recent_writes_wait_for_the_settle_window(self):
+        token = self.changes()['token']
+        with override_settings(DELTA_SYNC_SETTLE_SECONDS=60):
+            decrement_stock([{'productId': self.masala.id, 'quantity': 2}])
+            self.assertEqual(self.changes(since=token)['changed'], [])
+            later = time.time_ns() + 61 * 10 ** 9
+            with mock.patch('inventory.change_tracking.time.time_ns', return_value=later):
+                self.assertEqual([row['id'] for row in self.changes(since=token)['changed']], [self.masala.id])
+
+    def test_writes_share_no_version_row(self):
+        versions = list(CatalogVersion.objects.values_list('scope', 'version'))
+        with self.captureOnCommitCallbacks():  # Cache invalidation bumps run after commit only
+            before = Product.objects.get(id=self.masala.id).change_version
+            decrement_stock([{'productId': self.masala.id, 'quantity': 2}])
+            increment_stock(self.masala.id, 1)
+            self.rice.save()
+            self.assertGreater(Product.objects.get(id=self.masala.id).change_version, before)
+        self.assertEqual(list(CatalogVersion.objects.values_list('scope', 'version')), versions)
+
+    def test_purged_token_expires(self):
+        token = self.changes()['token']
+        self.rice.delete()
+        self.assertEqual(purge_tombstones(timezone.now() + timedelta(seconds=1)), 1)
+        self.changes(status_code=410, since=token)
+        self.changes(status_code=404, since='not-a-token')
+
+
+class StockEventTests(TestCase):
+    """
+    Stock push - committed writes reach matching subscribers, slow ones are conflated then resynced
+    """
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.masala = Product.objects.create(name='Garam Masala', category='Spices', selling_price=150, stock=30)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def subscribe(self, categories=None, max_pending=None):
+        async def subscribe():
+            return broker.subscribe(categories, max_pending)
+        subscription = self.loop.run_until_complete(subscribe())
+        self.addCleanup(broker.unsubscribe, subscription)
+        return subscription
+
+    def frames(self, subscription):
+        return self.loop.run_until_complete(subscription.next_frames(timeout=0.5)).decode()
+
+    def decrement(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            decrement_stock([{'productId': self.masala.id, 'quantity': quantity}])
+
+    def test_committed_stock_change_reaches_category_subscribers(self):
+        spices, snacks = self.subscribe(['Spices']), self.subscribe(['Snacks'])
+        self.decrement(25)
+
+        frames = self.frames(spices)
+        self.assertIn('event: stock\ndata: {"id":%d' % self.masala.id, frames)
+        self.assertIn('"stock":5,"available":5', frames)
+        self.assertIn('event: low_stock', frames)
+        self.assertEqual(self.frames(snacks), '')
+
+    def test_slow_subscriber_gets_latest_state_then_resync(self):
+        subscription = self.subscribe(max_pending=1)
+        self.decrement(1)
+        self.decrement(1)
+        frames = self.frames(subscription)
+        self.assertEqual(frames.count('event: stock'), 1)  # Conflated to the newest state
+        self.assertIn('"stock":28', frames)
+
+        self.decrement(25)  # stock + low_stock events overflow a buffer of one
+        self.assertIn('event: resync', self.frames(subscription))
+
+    def test_stream_relays_events_and_unsubscribes(self):
+        stream = event_stream(['Spices'])
+        self.assertIn(b': connected', self.loop.run_until_complete(stream.__anext__()))
+        self.decrement(1)
+        self.assertIn(b'"stock":29', self.loop.run_until_complete(stream.__anext__()))
+        self.loop.run_until_complete(stream.aclose())
+        self.assertFalse(broker.has_subscribers())
+
+    def test_wsgi_request_is_refused(self):
+        self.assertEqual(self.client.get('/api/events/stock/').status_code, 501)
+
+
+class AsyncCatalogViewTests(TestCase):
+    """
+    Native async catalog views answer exactly like the sync DRF views they replace under ASGI
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rice = Product.objects.create(name='Basmati Rice', category='Groceries', selling_price=180, cost_price=150, stock=5)
+        Product.objects.create(name='Garam Masala', category='Spices', selling_price=150, cost_price=100, stock=30)
+        LowStockAlert.objects.create(product=rice, threshold_value=10, stock_at_alert=5, manager_phone='+911234567890')
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+
+    async def assertSameResponse(self, view, url, **params):
+        expected = await sync_to_async(self.client.get)(url, params)
+        response = await view(self.factory.get(url, params))
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.get('ETag'), expected.get('ETag'))
+        return response
+
+    async def test_product_list(self):
+        await self.assertSameResponse(async_views.products, '/api/products/')
+        await self.assertSameResponse(async_views.products, '/api/products/', fields='id,name,stock', ordering='-price')
+        await self.assertSameResponse(async_views.products, '/api/products/', page_size=1, ordering='category')
+        await self.assertSameResponse(async_views.products, '/api/products/', fields='nope')
+
+    async def test_customer_products_and_categories(self):
+        await self.assertSameResponse(async_views.customer_products, '/api/customer/products/')
+        await self.assertSameResponse(async_views.customer_products, '/api/customer/products/', category='Spices')
+        await self.assertSameResponse(async_views.customer_products, '/api/customer/products/', page_size=1)
+        await self.assertSameResponse(async_views.customer_products, '/api/customer/products/', page_size=1, ordering='margin')
+        await self.assertSameResponse(async_views.get_categories, '/api/customer/categories/')
+
+    async def test_alert_history(self):
+        await self.assertSameResponse(async_views.low_stock_alerts_history, '/api/manager/alerts-history/')
+
+    async def test_not_modified(self):
+        etag = (await async_views.customer_products(self.factory.get('/api/customer/products/')))['ETag']
+        response = await async_views.customer_products(
+            self.factory.get('/api/customer/products/', headers={'If-None-Match': etag})
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class LowStockAlertCheckTests(TestCase):
+    """
+    check_and_send_alerts - one alert per low stock episode, in a fixed number of queries
+    """
+
+    def setUp(self):
+        self.products = Product.objects.bulk_create([
+            Product(name=f'Product {i}', category='Groceries', selling_price=100, stock=i) for i in range(20)
+        ])
+        self.service = WhatsAppService(transport=FakeTransport())
+
+    def check(self, threshold=10):
+        queued = AlertOutbox.objects.filter(kind=AlertOutbox.LOW_STOCK_ALERT).count()
+        sent = self.service.check_and_send_alerts('+910000000000', threshold)
+        self.assertEqual(AlertOutbox.objects.filter(kind=AlertOutbox.LOW_STOCK_ALERT).count() - queued, sent)
+        return sent
+
+    def test_query_count_independent_of_catalog_size(self):
+        # Savepoint, resolve UPDATE, candidate anti-join, digest window, alert INSERT, outbox INSERT,
+        # release (plus the two outbox counts in check())
+        with self.assertNumQueries(9):
+            self.assertEqual(self.check(), 11)
+        with self.assertNumQueries(9):
+            self.assertEqual(self.check(threshold=15), 16)
+
+    def test_reconciles_writes_that_skipped_crossing_detection(self):
+        self.check()
+        # Bulk updates send no signals - one product restocked, one run down, neither seen at write time
+        Product.objects.filter(id=self.products[2].id).update(stock=40)
+        Product.objects.filter(id=self.products[15].id).update(stock=1)
+        self.assertEqual(self.check(), 1)
+        self.assertTrue(LowStockAlert.objects.get(product=self.products[2]).is_resolved)
+        self.assertEqual(LowStockAlert.objects.get(product=self.products[15]).stock_at_alert, 1)
+
+    def test_one_alert_per_episode(self):
+        self.check()
+        self.assertEqual(self.check(), 0)
+
+        # Restocked above the threshold, then low again - resolved by the write, then alerted once more
+        product = self.products[3]
+        increment_stock(product.id, 47)
+        self.assertIsNotNone(LowStockAlert.objects.get(product=product).resolved_at)
+        self.assertEqual(self.check(), 0)
+        decrement_stock([{'productId': product.id, 'quantity': 48}])
+        self.assertEqual(self.check(), 1)
+        self.assertEqual(LowStockAlert.objects.filter(product=product, is_resolved=False).get().stock_at_alert, 2)
+        self.assertFalse(self.service.transport.sent)  # Sending is the worker's job
+
+
+class StockCrossingTests(TestCase):
+    """
+    Stock writes raise and resolve low stock alerts themselves, touching only the products they wrote
+    """
+
+    def setUp(self):
+        sync_alert_settings({'whatsappAlertsEnabled': True, 'contact': '+910000000000', 'lowStockThreshold': 10})
+        self.products = Product.objects.bulk_create([
+            Product(name=f'Product {i}', category='Groceries', selling_price=100, stock=20) for i in range(5)
+        ])
+
+    def alert_rows(self):
+        return AlertOutbox.objects.filter(kind=AlertOutbox.LOW_STOCK_ALERT).count()
+
+    def test_threshold_crossings(self):
+        changes = {1: (20, 10), 2: (10, 11), 3: (20, 15), 4: (5, 3), 5: (None, 0), 6: (None, 50)}
+        self.assertEqual(threshold_crossings(changes, 10), {1: CROSSED_BELOW, 2: RECOVERED_ABOVE, 5: CROSSED_BELOW})
+
+    def test_sale_crossing_below_queues_one_alert(self):
+        first, second = self.products[:2]
+        decrement_stock([{'productId': first.id, 'quantity': 12}, {'productId': second.id, 'quantity': 5}])
+        self.assertEqual(self.alert_rows(), 1)
+        self.assertEqual(LowStockAlert.objects.get(is_resolved=False).product_id, first.id)
+
+        # Still low - no second alert for the same episode
+        decrement_stock([{'productId': first.id, 'quantity': 1}])
+        self.assertEqual(self.alert_rows(), 1)
+
+    def test_restock_resolves(self):
+        product = self.products[0]
+        decrement_stock([{'productId': product.id, 'quantity': 15}])
+        increment_stock(product.id, 30)
+        self.assertTrue(LowStockAlert.objects.get(product=product).is_resolved)
+
+    def test_alerts_off_still_resolve(self):
+        product = self.products[0]
+        decrement_stock([{'productId': product.id, 'quantity': 15}])
+        sync_alert_settings({'whatsappAlertsEnabled': False, 'contact': '+910000000000', 'lowStockThreshold': 10})
+        increment_stock(product.id, 30)
+        decrement_stock([{'productId': product.id, 'quantity': 30}])
+        self.assertEqual(self.alert_rows(), 1)
+        self.assertTrue(LowStockAlert.objects.get(product=product).is_resolved)
+
+    def test_threshold_change_resolves_old_alerts(self):
+        product = self.products[0]
+        decrement_stock([{'productId': product.id, 'quantity': 12}])
+        self.assertFalse(sync_alert_settings({
+            'whatsappAlertsEnabled': True, 'contact': '+910000000000', 'lowStockThreshold': 10
+        }))
+        self.assertTrue(sync_alert_settings({
+            'whatsappAlertsEnabled': True, 'contact': '+910000000000', 'lowStockThreshold': 5
+        }))
+        self.assertTrue(LowStockAlert.objects.get(product=product).is_resolved)
+
+    def test_save_rolls_back_with_its_alert_rows(self):
+        product = Product.objects.get(id=self.products[0].id)
+        product.stock = 3
+        with mock.patch.object(AlertOutbox.objects, 'bulk_create', side_effect=RuntimeError('outbox down')):
+            with self.assertRaises(RuntimeError):
+                product.save()
+        self.assertEqual(Product.objects.get(id=product.id).stock, 20)
+        self.assertFalse(LowStockAlert.objects.exists())
+
+        # Nothing half-written blocks the retry
+        product.save()
+        self.assertEqual((self.alert_rows(), LowStockAlert.objects.filter(is_resolved=False).count()), (1, 1))
+
+    def test_write_without_crossing_does_not_scan(self):
+        with self.assertNumQueries(1):  # The settings read
+            self.assertEqual(stock_levels_changed({self.products[0].id: (20, 15)}), {})
+
+
+@override_settings(ALERT_OUTBOX_BACKOFF_SECONDS=0, ALERT_OUTBOX_MAX_ATTEMPTS=4, ALERT_DIGEST_WINDOW_SECONDS=0)
+class AlertOutboxTests(TestCase):
+    """
+    Product writes only queue alerts; the worker delivers with retries and dead-letters what keeps failing
+    """
+
+    def queue_messages(self, count):
+        AlertOutbox.objects.bulk_create([
+            AlertOutbox(kind=AlertOutbox.WHATSAPP, payload={'to': '+910000000000', 'body': f'Message {i}'})
+            for i in range(count)
+        ])
+
+    def drain(self, transport, threads=8):
+        worker = AlertOutboxWorker(threads=threads, service=WhatsAppService(transport=transport))
+        worker.run(interval=0.01, once=True)
+        return worker
+
+    def test_product_write_only_enqueues(self):
+        sync_alert_settings({'whatsappAlertsEnabled': True, 'contact': '+910000000000', 'lowStockThreshold': 10})
+        product = Product.objects.create(name='Basmati Rice', category='Groceries', selling_price=180, stock=50)
+        with mock.patch('inventory.views.profile_cache.get') as node_request:
+            for stock in (5, 3):
+                response = self.client.patch(
+                    f'/api/products/{product.id}/', {'stock': stock}, content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 200)
+        node_request.assert_not_called()
+        # One crossing, one alert - the second write stayed below the threshold
+        self.assertEqual(AlertOutbox.objects.get().kind, AlertOutbox.LOW_STOCK_ALERT)
+
+        transport = FakeTransport()
+        worker = self.drain(transport)
+        self.assertEqual((worker.checks, worker.sent), (0, 1))
+        self.assertIn('Basmati Rice', transport.sent[0]['body'])
+        self.assertEqual(outbox_stats()['counts'][AlertOutbox.SENT], 1)
+
+    @override_settings(ALERT_OUTBOX_MAX_ATTEMPTS=10)
+    def test_retries_until_every_message_is_sent_once(self):
+        self.queue_messages(200)
+        transport = FakeTransport(latency=0.005, failure_rate=0.3, seed=1)
+        with self.assertLogs('inventory.alert_outbox', 'WARNING'):
+            worker = self.drain(transport)
+        self.assertEqual(len({message['body'] for message in transport.sent}), 200)
+        self.assertEqual((worker.sent, len(transport.sent), worker.dead), (200, 200, 0))
+        self.assertEqual(worker.retried, transport.failed)
+
+    def test_throughput_scales_with_threads(self):
+        self.queue_messages(200)
+        start = time.perf_counter()
+        self.drain(FakeTransport(latency=0.01), threads=16)
+        # 200 x 10 ms sends would take 2 s one at a time
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(AlertOutbox.objects.filter(status=AlertOutbox.SENT).count(), 200)
+
+    def test_dead_letters(self):
+        self.queue_messages(3)
+        with self.assertLogs('inventory.alert_outbox', 'WARNING'):
+            worker = self.drain(FakeTransport(failure_rate=1))
+        self.assertEqual(worker.dead, 3)
+        self.assertEqual(set(AlertOutbox.objects.values_list('status', 'attempts')), {(AlertOutbox.DEAD, 4)})
+
+        # A Twilio 4xx (e.g. invalid number) is dead-lettered without retrying
+        retry_dead_letters()
+        transport = FakeTransport()
+        with mock.patch.object(transport, 'send', side_effect=TwilioRestException(400, '/Messages.json')):
+            with self.assertLogs('inventory.alert_outbox', 'ERROR'):
+                self.drain(transport)
+        self.assertEqual(set(AlertOutbox.objects.values_list('status', 'attempts')), {(AlertOutbox.DEAD, 1)})
+
+    def test_failed_low_stock_check_is_retried(self):
+        AlertOutbox.objects.create(kind=AlertOutbox.LOW_STOCK_CHECK)
+        profile = {'whatsappAlertsEnabled': True, 'contact': '', 'lowStockThreshold': 10}
+        with mock.patch('inventory.views.get_manager_profile_from_mongodb', return_value=profile):
+            with self.assertLogs('inventory.alert_outbox', 'WARNING'):
+                worker = self.drain(FakeTransport())
+        # Retried with backoff, then dead-lettered - never recorded as sent
+        self.assertEqual((worker.checks, worker.retried, worker.dead), (0, 3, 1))
+        row = AlertOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts), (AlertOutbox.DEAD, 4))
+        self.assertIn('AlertRecipientMissing', row.last_error)
+
+        # A scan that fails on the database is retried as well
+        retry_dead_letters()
+        profile['contact'] = '+910000000000'
+        with mock.patch('inventory.views.get_manager_profile_from_mongodb', return_value=profile), \
+                mock.patch('inventory.whatsapp_service.queue_low_stock_alerts', side_effect=RuntimeError('db down')):
+            with self.assertLogs('inventory.alert_outbox', 'WARNING'), \
+                    self.assertLogs('inventory.whatsapp_service', 'ERROR'):
+                worker = self.drain(FakeTransport())
+        self.assertEqual((worker.checks, worker.dead), (0, 1))
+        self.assertIn('db down', AlertOutbox.objects.get().last_error)
+
+
+@override_settings(ALERT_OUTBOX_BACKOFF_SECONDS=0)
+class AlertDigestTests(TestCase):
+    """
+    Low stock alerts raised together reach the manager as one digest, split only at the WhatsApp length limit
+    """
+
+    def setUp(self):
+        self.products = Product.objects.bulk_create([
+            Product(name=f'Masala Blend {i:02d}', category='Spices', selling_price=100, stock=50) for i in range(60)
+        ])
+        self.transport = FakeTransport()
+        self.service = WhatsAppService(transport=self.transport)
+
+    def drain(self):
+        worker = AlertOutboxWorker(threads=4, service=self.service)
+        worker.run(interval=0.01, once=True)
+        return worker
+
+    def test_window_collects_alerts_from_several_checks(self):
+        Product.objects.filter(id=self.products[0].id).update(stock=2)
+        self.service.check_and_send_alerts('+910000000000', 10)
+        Product.objects.filter(id=self.products[1].id).update(stock=1)
+        self.service.check_and_send_alerts('+910000000000', 10)
+
+        # Both wait for the window opened by the first alert
+        self.assertEqual(self.drain().sent, 0)
+        self.assertEqual(AlertOutbox.objects.values('available_at').distinct().count(), 1)
+        AlertOutbox.objects.update(available_at=timezone.now())
+
+        worker = self.drain()
+        self.assertEqual((worker.sent, worker.alerts), (1, 2))
+        self.assertIn('Masala Blend 00', self.transport.sent[0]['body'])
+        self.assertIn('Masala Blend 01', self.transport.sent[0]['body'])
+        self.assertEqual(LowStockAlert.objects.count(), 2)
+
+    @override_settings(ALERT_DIGEST_WINDOW_SECONDS=0)
+    def test_digest_split_at_length_limit(self):
+        Product.objects.update(stock=3)
+        self.assertEqual(self.service.check_and_send_alerts('+910000000000', 10), 60)
+        worker = self.drain()
+
+        bodies = [message['body'] for message in self.transport.sent]
+        self.assertTrue(1 < len(bodies) < 10)
+        self.assertTrue(all(message_length(body) <= WHATSAPP_MAX_LENGTH for body in bodies))
+        for product in self.products:
+            self.assertEqual(sum(product.name in body for body in bodies), 1)
+        self.assertEqual(outbox_stats()['digests'], {
+            'alerts_sent': 60, 'messages_sent': len(bodies), 'messages_saved': 60 - len(bodies)
+        })
+        self.assertEqual(worker.sent, len(bodies))
+
+    @override_settings(ALERT_DIGEST_WINDOW_SECONDS=0, ALERT_OUTBOX_BACKOFF_SECONDS=60)
+    def test_failed_digest_retries_as_a_whole(self):
+        Product.objects.filter(id__in=[product.id for product in self.products[:3]]).update(stock=3)
+        self.service.check_and_send_alerts('+910000000000', 10)
+        self.transport.failure_rate = 1
+        with self.assertLogs('inventory.alert_outbox', 'WARNING'):
+            self.assertEqual(self.drain().retried, 1)
+        retry = AlertOutbox.objects.values_list('status', 'attempts', 'available_at').distinct()
+        self.assertEqual(len(retry), 1)
+        self.assertEqual(retry[0][:2], (AlertOutbox.PENDING, 1))
+
+        self.transport.failure_rate = 0
+        AlertOutbox.objects.update(available_at=timezone.now())
+        worker = self.drain()
+        self.assertEqual((worker.sent, worker.alerts), (1, 3))
+
+
+class MessageTransportTests(TestCase):
+    """
+    WHATSAPP_TRANSPORT picks where alerts go - Twilio, the in-memory fake or the file/log sink
+    """
+
+    @override_settings(WHATSAPP_TRANSPORT='fake', WHATSAPP_FAKE_LATENCY_SECONDS=0.001, WHATSAPP_FAKE_FAILURE_RATE=0.5)
+    def test_transport_from_settings(self):
+        transport = WhatsAppService().transport
+        self.assertIsInstance(transport, FakeTransport)
+        self.assertEqual((transport.latency, transport.failure_rate), (0.001, 0.5))
+        self.assertIsInstance(get_transport('twilio'), TwilioTransport)
+        with self.assertRaises(ImproperlyConfigured):
+            get_transport('carrier-pigeon')
+
+        class Incomplete(MessageTransport):
+            name = 'incomplete'
+
+        with self.assertRaises(TypeError):  # At construction, not on the first alert
+            Incomplete()
+        self.assertIn('error', WhatsAppService().check_account_status())
+
+    def test_file_sink(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'whatsapp.jsonl')
+            with override_settings(WHATSAPP_TRANSPORT='file', WHATSAPP_FILE_SINK_PATH=path):
+                AlertOutbox.objects.bulk_create([
+                    AlertOutbox(kind=AlertOutbox.WHATSAPP, payload={'to': '+910000000000', 'body': f'Message {i}'})
+                    for i in range(20)
+                ])
+                worker = AlertOutboxWorker(threads=4)
+                worker.run(interval=0.01, once=True)
+            with open(path, encoding='utf-8') as sink:
+                lines = [json.loads(line) for line in sink]
+        self.assertEqual(worker.sent, 20)
+        self.assertEqual(sorted(line['body'] for line in lines), sorted(f'Message {i}' for i in range(20)))
+        self.assertEqual({line['to'] for line in lines}, {'whatsapp:+910000000000'})
+        self.assertEqual(len({line['sid'] for line in lines}), 20)
+
+        with self.assertLogs('inventory.messaging', 'INFO') as logs:
+            self.assertEqual(FileTransport().send('whatsapp:+910000000000', 'whatsapp:+14155238886', 'Hi').status, 'logged')
+        self.assertIn('Hi', logs.output[0])
+
+
+@override_settings(MANAGER_PROFILE_CACHE_SECONDS=60, MANAGER_PROFILE_STALE_SECONDS=60)
+class ManagerProfileCacheTests(TestCase):
+    """
+    The Node manager profile is fetched once per TTL, refreshed in the background while stale, and kept through outages
+    """
+
+    def setUp(self):
+        self.fetches = 0
+        self.node_down = False
+        self.cache = ManagerProfileCache(fetch=self.fetch)
+
+    def fetch(self):
+        self.fetches += 1
+        if self.node_down:
+            raise ConnectionError('Node server unreachable')
+        time.sleep(0.01)
+        return {'contact': '+910000000000', 'lowStockThreshold': 10, 'version': self.fetches}
+
+    def age(self, seconds):
+        self.cache._fetched_at -= seconds
+
+    def test_one_fetch_per_ttl_even_under_a_burst(self):
+        threads = [threading.Thread(target=self.cache.get) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get()['version'], 1)
+        self.assertEqual(self.fetches, 1)
+
+    def test_stale_profile_served_while_refreshing(self):
+        self.cache.get()
+        self.age(90)
+        self.assertEqual(self.cache.get()['version'], 1)  # Stale, returned without waiting
+        for thread in threading.enumerate():
+            if thread.name == 'manager-profile-refresh':
+                thread.join()
+        self.assertEqual(self.cache.get()['version'], 2)
+        self.assertEqual(self.cache.stats()['stale_hits'], 1)
+
+    def test_node_outage(self):
+        self.node_down = True
+        with self.assertLogs('inventory.refreshing_cache', 'WARNING'):
+            self.assertIsNone(self.cache.get())
+        self.assertIsNone(self.cache.get())  # Backing off - no second timeout
+        self.assertEqual(self.fetches, 1)
+
+        # Past the stale window the last good profile is still better than nothing
+        self.cache.reset()
+        self.node_down = False
+        last_good = self.cache.get()
+        self.age(600)
+        self.node_down = True
+        with self.assertLogs('inventory.refreshing_cache', 'WARNING'):
+            self.assertIs(self.cache.get(), last_good)
+
+    def test_invalidate(self):
+        self.cache.get()
+        self.cache.invalidate()
+        self.assertEqual(self.cache.get()['version'], 2)
+
+    def test_invalidate_endpoint_syncs_alert_settings(self):
+        profile = {'whatsappAlertsEnabled': True, 'contact': '+910000000000', 'lowStockThreshold': 25}
+        with mock.patch.object(profile_cache, '_fetch', return_value=profile):
+            response = self.client.post('/api/manager/profile/invalidate/')
+        profile_cache.reset()
+        self.assertEqual(response.json(), {'invalidated': True, 'alert_settings_changed': True})
+        self.assertEqual(ManagerProfile.objects.get().low_stock_threshold, 25)
+        self.assertEqual(AlertOutbox.objects.get().kind, AlertOutbox.LOW_STOCK_CHECK)
+
+
+@override_settings(OUTBOUND_BREAKER_FAILURES=3, OUTBOUND_BREAKER_RESET_SECONDS=60, OUTBOUND_BULKHEAD_WAIT_SECONDS=0.01)
+class OutboundDependencyTests(TestCase):
+    """
+    Outbound calls are bounded per dependency and fail fast while a dependency is down
+    """
+
+    def setUp(self):
+        self.dependency = Dependency('stub', connect_timeout=1, read_timeout=2, max_concurrent=2)
+
+    def response(self, status):
+        response = requests.Response()
+        response.status_code = status
+        return response
+
+    def test_circuit_opens_then_recovers(self):
+        with self.assertLogs('inventory.outbound', 'WARNING'):
+            for _ in range(3):
+                with self.assertRaises(requests.ConnectionError):
+                    self.dependency.guard(mock.Mock(side_effect=requests.ConnectionError('refused')))
+        call = mock.Mock(return_value=self.response(200))
+        with self.assertRaises(CircuitOpen):
+            self.dependency.guard(call)
+        call.assert_not_called()
+
+        # After the reset period one trial call goes through and closes the circuit
+        self.dependency.breaker.reset_seconds = 0
+        self.dependency.guard(call)
+        stats = self.dependency.stats()
+        self.assertEqual((stats['circuit'], stats['errors'], stats['rejected']['circuit']), ('closed', 3, 1))
+
+    def test_bulkhead_caps_calls_in_flight(self):
+        release = threading.Event()
+        threads = [threading.Thread(target=self.dependency.guard, args=(release.wait,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        while self.dependency.stats()['in_flight'] < 2:
+            time.sleep(0.001)
+        with self.assertRaises(BulkheadFull):
+            self.dependency.guard(mock.Mock())
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.dependency.guard(mock.Mock(return_value=self.response(200)))
+        self.assertEqual(self.dependency.stats()['rejected']['bulkhead'], 1)
+
+    def test_session_applies_timeouts_and_counts_5xx(self):
+        with mock.patch.object(requests.Session, 'send', return_value=self.response(503)) as send:
+            self.dependency.session.get('http://stub.invalid/status')
+        self.assertEqual(send.call_args.kwargs['timeout'], (1, 2))
+        self.assertEqual(self.dependency.stats()['errors'], 1)
+
+    def test_integrations_share_guarded_sessions(self):
+        self.assertIs(views.razorpay_client.session, dependency(RAZORPAY).session)
+        self.assertIs(WhatsAppService().transport.client.http_client.session, dependency(TWILIO).session)
+
+    def test_twilio_client_and_account_status_shared(self):
+        self.assertIs(WhatsAppService().transport.client, WhatsAppService().transport.client)
+
+        status = {'account_status': 'active', 'account_type': 'Trial', 'recent_messages': []}
+        with mock.patch.object(account_status_cache, '_fetch', return_value=status) as fetch:
+            for _ in range(3):
+                response = self.client.get('/api/manager/twilio-status/')
+                self.assertEqual(response.json()['account_status'], 'active')
+        account_status_cache.reset()
+        fetch.assert_called_once()
+
+    def test_account_status_error_names_the_failure(self):
+        account_status_cache.reset()
+        self.addCleanup(account_status_cache.reset)
+        failures = [(CircuitOpen('twilio circuit open'), 'CircuitOpen: twilio circuit open'),
+                    (TwilioRestException(401, '/Accounts.json', msg='Authenticate'), 'Authenticate')]
+        for failure, detail in failures:
+            account_status_cache.invalidate()
+            with mock.patch.object(account_status_cache, '_fetch', side_effect=failure), \
+                    self.assertLogs('inventory.refreshing_cache', 'WARNING'), \
+                    self.assertLogs('inventory.whatsapp_service', 'ERROR') as logs:
+                error = self.client.get('/api/manager/twilio-status/').json()['error']
+            self.assertIn(detail, error)
+            self.assertIn(error, logs.output[0])
+        self.assertEqual(account_status_cache.stats()['fetch_errors'], 2)
+
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram()
+        for elapsed_ms in [1] * 90 + [40] * 9 + [20000]:
+            histogram.record(elapsed_ms)
+        stats = histogram.stats()
+        self.assertEqual((stats['p50_ms'], stats['p95_ms'], stats['p99_ms']), (5, 50, 50))
+        self.assertEqual(stats['buckets']['slower'], 1)
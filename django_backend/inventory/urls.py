@@ -1,15 +1,22 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     ProductViewSet, 
     customer_products, 
     get_categories,
+    catalog_cache_stats,
+    stock_events,
     manager_profile,
+    invalidate_manager_profile,
     test_whatsapp_alert,
     check_low_stock_alerts,
     low_stock_alerts_history,
+    alert_outbox_status,
     twilio_account_status,
     download_stock_pdf,
+    export_products,
     restock_product,
     update_stock_after_purchase,
     create_payment_order,
@@ -20,16 +27,28 @@ from .views import (
 router = DefaultRouter()
 router.register(r'products', ProductViewSet)
 
+# Under ASGI the catalog reads are served by native async views (same responses)
+if settings.ASYNC_CATALOG_VIEWS:
+    customer_products = async_views.customer_products
+    get_categories = async_views.get_categories
+    low_stock_alerts_history = async_views.low_stock_alerts_history
+
 urlpatterns = [
+    *([path('products/', async_views.products, name='product-list')] if settings.ASYNC_CATALOG_VIEWS else []),
     path('', include(router.urls)),
     path('customer/products/', customer_products, name='customer-products'),
     path('customer/categories/', get_categories, name='customer-categories'),
+    path('events/stock/', stock_events, name='stock-events'),
     path('manager/profile/', manager_profile, name='manager-profile'),
+    path('manager/profile/invalidate/', invalidate_manager_profile, name='invalidate-manager-profile'),
     path('manager/test-whatsapp/', test_whatsapp_alert, name='test-whatsapp'),
     path('manager/check-alerts/', check_low_stock_alerts, name='check-alerts'),
     path('manager/alerts-history/', low_stock_alerts_history, name='alerts-history'),
+    path('manager/alert-outbox/', alert_outbox_status, name='alert-outbox'),
     path('manager/twilio-status/', twilio_account_status, name='twilio-status'),
+    path('manager/cache-stats/', catalog_cache_stats, name='catalog-cache-stats'),
     path('manager/download-stock-pdf/', download_stock_pdf, name='download-stock-pdf'),
+    path('manager/export-products/<str:export_format>/', export_products, name='export-products'),
     path('manager/restock-product/', restock_product, name='restock-product'),
     path('billing/update-stock/', update_stock_after_purchase, name='update-stock-after-purchase'),
     # Razorpay Payment endpoints
@@ -1,44 +1,57 @@
 import json
-import requests
 import razorpay
 import time
 import os
+from django.conf import settings
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view, renderer_classes
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.utils.decorators import method_decorator
+from django.core.handlers.asgi import ASGIRequest
 from .models import Product, ManagerProfile, LowStockAlert
-from .serializers import ProductSerializer, CustomerProductSerializer
-from .whatsapp_service import WhatsAppService
+from .serializers import (
+    ProductSerializer, ProductFacetQuerySerializer, product_list_serializer, customer_product_list_serializer
+)
+from .renderers import FastJSONRenderer
+from .whatsapp_service import WhatsAppService, account_status_cache
+from .alert_outbox import enqueue_low_stock_check, outbox_stats
+from .stock_alerts import sync_alert_settings
+from .manager_profile import profile_cache
+from .outbound import RAZORPAY, dependency, outbound_stats
+from .stock_service import decrement_stock, increment_stock, APPLIED
+from .idempotency import idempotent
+from .pagination import KeysetPagination, CustomerKeysetPagination, FacetPagination
+from .facets import build_filters, facet_counts
+from .change_tracking import CHANGES_PAGE_SIZE, CHANGES_MAX_PAGE_SIZE, changes_since
+from .exports import CONTENT_TYPES as EXPORT_CONTENT_TYPES, STREAMS as EXPORT_STREAMS
+from .catalog_snapshots import snapshot as catalog_snapshot
+from .search_index import index as search_index
+from .stock_events import broker as stock_event_broker, event_stream as stock_event_stream
+from .catalog_cache import (
+    CATALOG_SCOPE, RESERVATIONS_SCOPE, cached_response_data, catalog_condition, category_scope,
+    get_cache as get_catalog_cache
+)
+from .reservation_service import reserve_stock, attach_order, release_reservation, fulfil_order, is_invalid_cart
 
 
-# Node.js server configuration for manager profile data
-NODE_SERVER_URL = 'http://localhost:8080'
-
 # Razorpay configuration - Load from environment variables
 RAZORPAY_KEY_ID = os.getenv('RAZORPAY_KEY_ID', 'rzp_test_defaultkey')
 RAZORPAY_KEY_SECRET = os.getenv('RAZORPAY_KEY_SECRET', 'defaultsecret')
 
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
+# Initialize Razorpay client - on the razorpay outbound dependency (timeouts, bulkhead, circuit breaker)
+razorpay_client = razorpay.Client(session=dependency(RAZORPAY).session, auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
 
 
 def get_manager_profile_from_mongodb():
     """
-    Fetch manager profile from Node.js MongoDB server
+    Manager profile from the Node.js MongoDB server - served from the in-process TTL cache (see manager_profile.py)
     """
-    try:
-        response = requests.get(f'{NODE_SERVER_URL}/manager/profile')
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('success'):
-                return data.get('manager')
-        return None
-    except Exception as e:
-        print(f"Error fetching manager profile from MongoDB: {e}")
-        return None
+    return profile_cache.get()
 
 
 class ProductViewSet(viewsets.ModelViewSet):
@@ -47,71 +60,198 @@ class ProductViewSet(viewsets.ModelViewSet):
     """
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    pagination_class = KeysetPagination  # Opt-in via ?page_size= / ?cursor=
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     
-    def update(self, request, *args, **kwargs):
-        """Override update to check for low stock alerts after product update"""
-        response = super().update(request, *args, **kwargs)
-        
-        # After updating product, check if we need to send alerts
-        if response.status_code == 200:
-            product = self.get_object()
-            self.check_low_stock_alert(product)
-        
-        return response
+    def get_queryset(self):
+        """Stable server-side ordering (?ordering=id or ?ordering=category)"""
+        return self.paginator.order_queryset(super().get_queryset(), self.request)
     
-    def create(self, request, *args, **kwargs):
-        """Override create to check for low stock alerts after product creation"""
-        response = super().create(request, *args, **kwargs)
-        
-        # After creating product, check if we need to send alerts
-        if response.status_code == 201:
-            product_id = response.data.get('id')
-            if product_id:
-                product = Product.objects.get(id=product_id)
-                self.check_low_stock_alert(product)
-        
-        return response
+    @method_decorator(catalog_condition('products', lambda request: [CATALOG_SCOPE, RESERVATIONS_SCOPE]))
+    def list(self, request, *args, **kwargs):
+        """
+        Conditional GET - 304 when nothing changed since the client's ETag
+        Rows are read with values_list() and serialized in list mode (same JSON as ProductSerializer)
+        ?fields=id,name,stock / ?exclude=cost_price narrow both the SELECT and the output
+        """
+        list_serializer = product_list_serializer.for_request(request)
+        
+        # Keyset cursors are built from the ordering columns, selected or not
+        extra = self.paginator.get_columns(request) if self.paginator.is_requested(request) else ()
+        queryset = list_serializer.project(self.filter_queryset(self.get_queryset()), extra=extra)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(list_serializer.serialize(page))
+        return Response(list_serializer.serialize(queryset))
     
-    def check_low_stock_alert(self, product):
-        """Check if product stock is below threshold and send WhatsApp alert"""
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked product search over name/category - /api/products/search/?q=basmati ri&limit=20
+        Every word is prefix-matched through the in-process index; ?fields= / ?exclude= apply to results
+        With no match the query is retried typo-tolerantly ("basmti rice"), unless ?fuzzy=0
+        """
+        query = request.query_params.get('q', '').strip()
         try:
-            # Get manager profile from MongoDB via Node.js
-            manager_profile = get_manager_profile_from_mongodb()
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            limit = 20
+        
+        list_serializer = product_list_serializer.for_request(request)
+        ids = search_index.search(query, limit)
+        corrections = {}
+        if not ids and request.query_params.get('fuzzy', '1') != '0':
+            ids, corrections = search_index.fuzzy_search(query, limit)
+        
+        # Fresh rows (stock changes don't touch the index), kept in rank order
+        rows = {row.id: row for row in list_serializer.project(Product.objects.filter(id__in=ids), extra=('id',))}
+        results = list_serializer.serialize([rows[product_id] for product_id in ids if product_id in rows])
+        return Response({'query': query, 'corrections': corrections, 'count': len(results), 'results': results})
+    
+    @action(detail=False, methods=['get'])
+    @method_decorator(catalog_condition('product-facets', lambda request: [CATALOG_SCOPE, RESERVATIONS_SCOPE]))
+    def facets(self, request):
+        """
+        Faceted product listing - filtered keyset page plus category / stock status / price bucket counts
+        ?category=Spices,Snacks&min_price=&max_price=&in_stock=true&demand_level=High&min_margin=&max_margin=
+        &ordering=-price&page_size=50&cursor=... (?fields= / ?exclude= apply to results)
+        Two queries per request: the page and one aggregate for all facet counts
+        """
+        params = ProductFacetQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        list_serializer = product_list_serializer.for_request(request)
+        
+        def build():
+            base, faceted = build_filters(params.validated_data)
+            products = Product.objects.filter(base)
             
-            if manager_profile and manager_profile.get('whatsappAlertsEnabled') and manager_profile.get('contact'):
-                threshold = manager_profile.get('lowStockThreshold', 10)
-                if product.stock <= threshold:
-                    whatsapp_service = WhatsAppService()
-                    whatsapp_service.check_and_send_alerts(
-                        manager_profile['contact'],
-                        threshold
-                    )
-        except Exception as e:
-            print(f"Error checking low stock alert: {e}")
+            paginator = FacetPagination()
+            page_queryset = list_serializer.project(
+                paginator.order_queryset(products.filter(*faceted.values()), request),
+                extra=paginator.get_columns(request)
+            )
+            page = paginator.paginate_queryset(page_queryset, request)
+            data = paginator.get_paginated_response(list_serializer.serialize(page)).data
+            data.update(facet_counts(products, faceted))
+            return data
+        
+        return Response(cached_response_data('product-facets', [CATALOG_SCOPE, RESERVATIONS_SCOPE], request, build))
+    
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync - products changed and ids deleted since a token: /api/products/changes/?since=<token>&limit=1000
+        Start without ?since= (full sync), then poll with the returned token; has_more means call again now
+        ?fields= / ?exclude= apply to changed rows; 410 when the deletes since the token were purged
+        """
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', CHANGES_PAGE_SIZE)), CHANGES_MAX_PAGE_SIZE))
+        except ValueError:
+            limit = CHANGES_PAGE_SIZE
+        
+        list_serializer = product_list_serializer.for_request(request)
+        return Response(changes_since(list_serializer, request.query_params.get('since'), limit))
+    
+    @idempotent('product-update')
+    def update(self, request, *args, **kwargs):
+        """Idempotent update - a stock change crossing the alert threshold raises or resolves its alert in the save"""
+        return super().update(request, *args, **kwargs)
+    
+    @idempotent('product-create')
+    def create(self, request, *args, **kwargs):
+        """Idempotent create - a product created below the alert threshold is alerted in the save"""
+        return super().create(request, *args, **kwargs)
+
+
+def customer_products_scopes(request):
+    category = request.GET.get('category')
+    return [category_scope(category) if category else CATALOG_SCOPE]
 
 
+@catalog_condition('customer-products', customer_products_scopes)
 @api_view(['GET'])
+@renderer_classes([FastJSONRenderer, BrowsableAPIRenderer])
 def customer_products(request):
     """
     Get products for customer view - shows ALL products (in-stock and out-of-stock)
     Excludes sensitive data like demand_level
     """
     category = request.GET.get('category')
-    if category:
-        products = Product.objects.filter(category=category)
-    else:
-        products = Product.objects.all()
-    serializer = CustomerProductSerializer(products, many=True)
-    return Response(serializer.data)
+    
+    # Plain listings are sent straight from the pre-rendered snapshot (no per-request serialization)
+    if set(request.GET) <= {'category'}:
+        blob = catalog_snapshot.category_bytes(category) if category else catalog_snapshot.catalog_bytes()
+        return HttpResponse(blob, content_type='application/json')
+    
+    def build():
+        if category:
+            products = Product.objects.filter(category=category)
+        else:
+            products = Product.objects.all()
+        
+        # Opt-in keyset pagination (?page_size= / ?cursor=), full list otherwise
+        paginator = CustomerKeysetPagination()
+        products = customer_product_list_serializer.project(
+            paginator.order_queryset(products, request), extra=paginator.get_columns(request)
+        )
+        page = paginator.paginate_queryset(products, request)
+        if page is not None:
+            return paginator.get_paginated_response(customer_product_list_serializer.serialize(page)).data
+        
+        return customer_product_list_serializer.serialize(products)
+    
+    # Served from the catalog cache until a product in scope is written
+    return Response(cached_response_data('customer-products', customer_products_scopes(request), request, build))
 
 
+@catalog_condition('categories', lambda request: [CATALOG_SCOPE])
 @api_view(['GET'])
 def get_categories(request):
     """
     Get all unique product categories (includes categories of out-of-stock products)
     """
-    categories = Product.objects.all().values_list('category', flat=True).distinct()
-    return Response(list(categories))
+    def build():
+        return list(Product.objects.all().values_list('category', flat=True).distinct())
+    
+    return Response(cached_response_data('categories', [CATALOG_SCOPE], request, build))
+
+
+@api_view(['GET'])
+def catalog_cache_stats(request):
+    """
+    Catalog cache hit/miss/eviction counters, snapshot memory footprint and search index size for monitoring,
+    plus the manager profile / Twilio status caches and outbound dependency health (circuit, bulkhead, latency histogram)
+    """
+    stats = get_catalog_cache().get_stats()
+    stats['snapshot'] = catalog_snapshot.stats()
+    stats['search_index'] = search_index.stats()
+    stats['stock_events'] = stock_event_broker.stats()
+    stats['manager_profile'] = profile_cache.stats()
+    stats['twilio_account_status'] = account_status_cache.stats()
+    stats['outbound'] = outbound_stats()
+    return Response(stats)
+
+
+async def stock_events(request):
+    """
+    Push channel for stock/price changes and low-stock events (Server-Sent Events, ASGI only)
+    /api/events/stock/?category=Spices,Snacks - omit category to follow the whole catalog
+    Events: stock, low_stock, deleted, and resync when a slow client fell too far behind
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    # Under WSGI the stream would hold a worker thread for its whole lifetime
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({
+            'error': 'Stock events need the ASGI server (django_backend.asgi:application) - poll /api/products/changes/ instead'
+        }, status=501)
+    
+    categories = [category.strip() for category in request.GET.get('category', '').split(',') if category.strip()]
+    response = StreamingHttpResponse(stock_event_stream(categories or None), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let a proxy buffer the stream
+    return response
 
 
 @api_view(['GET', 'POST'])
@@ -172,6 +312,25 @@ def manager_profile(request):
             return Response({'error': str(e)}, status=500)
 
 
+@api_view(['POST'])
+def invalidate_manager_profile(request):
+    """
+    Called by the Node server after the manager profile changes - drop the cached copy,
+    refetch it and bring the alert settings stock writes use up to date
+    """
+    try:
+        profile_cache.invalidate()
+        manager_profile = get_manager_profile_from_mongodb()
+        changed = False
+        if manager_profile:
+            changed = sync_alert_settings(manager_profile)
+            if changed:
+                enqueue_low_stock_check()
+        return Response({'invalidated': True, 'alert_settings_changed': changed})
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+
 @api_view(['POST'])
 def test_whatsapp_alert(request):
     """
@@ -189,6 +348,8 @@ def test_whatsapp_alert(request):
             return Response({'error': 'Manager contact number not configured'}, status=400)
         
         threshold = manager_profile.get('lowStockThreshold', 10)
+        if sync_alert_settings(manager_profile):
+            enqueue_low_stock_check()
         
         whatsapp_service = WhatsAppService()
         success = whatsapp_service.send_low_stock_alert(
@@ -210,7 +371,7 @@ def test_whatsapp_alert(request):
 @api_view(['POST'])
 def check_low_stock_alerts(request):
     """
-    Manually trigger low stock alert check - scans all products and sends alerts
+    Manually trigger low stock alert check - scans all products and queues alerts for the alert worker
     """
     try:
         # Get manager profile from MongoDB via Node.js
@@ -219,6 +380,9 @@ def check_low_stock_alerts(request):
         if not manager_profile:
             return Response({'error': 'Manager profile not found'}, status=400)
         
+        # Keep the settings write-time alerting uses in step (threshold, number, on/off)
+        sync_alert_settings(manager_profile)
+        
         if not manager_profile.get('whatsappAlertsEnabled', False):
             return Response({'message': 'WhatsApp alerts are disabled'})
         
@@ -229,14 +393,15 @@ def check_low_stock_alerts(request):
         threshold = manager_profile.get('lowStockThreshold', 10)
         
         whatsapp_service = WhatsAppService()
-        whatsapp_service.check_and_send_alerts(
+        alerts_queued = whatsapp_service.check_and_send_alerts(
             whatsapp_number,
             threshold
         )
         
         return Response({
             'message': f'Low stock check completed',
-            'threshold': threshold
+            'threshold': threshold,
+            'alerts_queued': alerts_queued
         })
         
     except Exception as e:
@@ -244,6 +409,7 @@ def check_low_stock_alerts(request):
 
 
 @api_view(['POST'])
+@idempotent('restock')
 def restock_product(request):
     """
     Restock a specific product - Updates stock quantity for wishlisted items
@@ -258,30 +424,23 @@ def restock_product(request):
         if not add_quantity or add_quantity < 1:
             return Response({'error': 'Quantity must be greater than 0'}, status=400)
         
-        # Find the product
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        # Add stock with a single UPDATE so concurrent restocks never overwrite each other
+        add_quantity = int(add_quantity)
+        product = increment_stock(int(product_id), add_quantity)
+        if product is None:
             return Response({'error': 'Product not found'}, status=404)
         
-        # Store original stock for logging
-        original_stock = product.stock
-        
-        # Update stock
-        product.stock += int(add_quantity)
-        product.save()  # This will automatically update in_stock field via model's save method
-        
         return Response({
             'success': True,
-            'message': f'Successfully restocked {product.name}',
+            'message': f'Successfully restocked {product["name"]}',
             'data': {
-                'productId': product.id,
-                'productName': product.name,
-                'originalStock': original_stock,
-                'addedQuantity': int(add_quantity),
-                'newStock': product.stock,
-                'inStock': product.in_stock,
-                'updatedAt': product.name  # Using name as timestamp placeholder
+                'productId': product['id'],
+                'productName': product['name'],
+                'originalStock': product['stock'] - add_quantity,
+                'addedQuantity': add_quantity,
+                'newStock': product['stock'],
+                'inStock': product['in_stock'],
+                'updatedAt': product['name']  # Using name as timestamp placeholder
             }
         })
         
@@ -292,6 +451,7 @@ def restock_product(request):
 
 
 @api_view(['POST'])
+@idempotent('purchase-stock-update')
 def update_stock_after_purchase(request):
     """
     Update stock quantities after a successful purchase
@@ -306,44 +466,20 @@ def update_stock_after_purchase(request):
         updated_products = []
         errors = []
         
-        # Process each item in the cart
-        for item in items:
-            product_id = item.get('productId') or item.get('id')
-            quantity = item.get('quantity', 0)
-            
-            if not product_id or quantity <= 0:
-                errors.append(f"Invalid item data: {item}")
+        # Decrement the whole cart in one transaction (guarded against overselling)
+        for line in decrement_stock(items):
+            if line['status'] != APPLIED:
+                errors.append(line['error'])
                 continue
             
-            try:
-                # Find the product
-                product = Product.objects.get(id=product_id)
-                
-                # Check if enough stock is available
-                if product.stock < quantity:
-                    errors.append(f"Insufficient stock for {product.name}. Available: {product.stock}, Requested: {quantity}")
-                    continue
-                
-                # Update stock
-                original_stock = product.stock
-                product.stock -= int(quantity)
-                product.save()  # This will automatically update in_stock field via model's save method
-                
-                updated_products.append({
-                    'productId': product.id,
-                    'productName': product.name,
-                    'originalStock': original_stock,
-                    'purchasedQuantity': int(quantity),
-                    'newStock': product.stock,
-                    'inStock': product.in_stock
-                })
-                
-            except Product.DoesNotExist:
-                errors.append(f"Product with ID {product_id} not found")
-                continue
-            except Exception as e:
-                errors.append(f"Error updating stock for product {product_id}: {str(e)}")
-                continue
+            updated_products.append({
+                'productId': line['product_id'],
+                'productName': line['product_name'],
+                'originalStock': line['original_stock'],
+                'purchasedQuantity': line['quantity'],
+                'newStock': line['new_stock'],
+                'inStock': line['in_stock']
+            })
         
         # Return response
         response_data = {
@@ -369,7 +505,7 @@ def update_stock_after_purchase(request):
 @api_view(['GET'])
 def twilio_account_status(request):
     """
-    Check Twilio account status and recent message delivery
+    Check Twilio account status and recent message delivery (cached - see TWILIO_STATUS_CACHE_SECONDS)
     """
     try:
         whatsapp_service = WhatsAppService()
@@ -379,6 +515,17 @@ def twilio_account_status(request):
         return Response({'error': str(e)}, status=500)
 
 
+@api_view(['GET'])
+def alert_outbox_status(request):
+    """
+    WhatsApp alert delivery queue - counts by status and the latest dead letters
+    """
+    try:
+        return Response(outbox_stats())
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+
 @api_view(['GET'])
 def low_stock_alerts_history(request):
     """
@@ -406,6 +553,7 @@ def low_stock_alerts_history(request):
 
 
 @api_view(['POST'])
+@idempotent('payment-create-order')
 def create_payment_order(request):
     """
     Create Razorpay order for payment processing
@@ -419,6 +567,23 @@ def create_payment_order(request):
         # Convert amount to paisa (Razorpay uses smallest currency unit)
         amount_in_paisa = int(float(amount) * 100)
         
+        # Hold the cart before the customer pays, so stock cannot run out mid-payment
+        reservation_key = None
+        if items:
+            reservation_key, reserved_lines = reserve_stock(items)
+            if not reservation_key and is_invalid_cart(reserved_lines):
+                return Response({
+                    'success': False,
+                    'error': 'Invalid cart items',
+                    'errors': [line['error'] for line in reserved_lines]
+                }, status=400)
+            if not reservation_key:
+                return Response({
+                    'success': False,
+                    'error': 'Some items are no longer available',
+                    'errors': [line['error'] for line in reserved_lines]
+                }, status=409)
+        
         # Create Razorpay order
         order_data = {
             'amount': amount_in_paisa,
@@ -427,7 +592,15 @@ def create_payment_order(request):
             'payment_capture': 1  # Auto capture payment
         }
         
-        order = razorpay_client.order.create(order_data)
+        try:
+            order = razorpay_client.order.create(order_data)
+        except Exception:
+            if reservation_key:
+                release_reservation(reservation_key)
+            raise
+        
+        if reservation_key:
+            attach_order(reservation_key, order['id'])
         
         return Response({
             'success': True,
@@ -437,6 +610,10 @@ def create_payment_order(request):
                 'currency': order['currency'],
                 'receipt': order['receipt']
             },
+            'reservation': {
+                'reserved': reservation_key is not None,
+                'ttl_seconds': settings.STOCK_RESERVATION_TTL_SECONDS
+            },
             'key_id': RAZORPAY_KEY_ID  # Frontend needs this for checkout
         })
         
@@ -449,6 +626,7 @@ def create_payment_order(request):
 
 
 @api_view(['POST'])
+@idempotent('payment-verify')
 def verify_payment(request):
     """
     Verify Razorpay payment signature and update stock
@@ -493,39 +671,19 @@ def verify_payment(request):
                     updated_products = []
                     errors = []
                     
-                    # Process each item in the cart
-                    for item in items:
-                        product_id = item.get('productId') or item.get('id')
-                        quantity = item.get('quantity', 0)
-                        
-                        if not product_id or quantity <= 0:
-                            errors.append(f"Invalid item data: {item}")
+                    # Commit the order's reservations; unreserved items get a guarded decrement
+                    for line in fulfil_order(order_id, items):
+                        if line['status'] != APPLIED:
+                            errors.append(line['error'])
                             continue
                         
-                        try:
-                            # Find the product
-                            product = Product.objects.get(id=product_id)
-                            
-                            # Check if enough stock is available
-                            if product.stock < quantity:
-                                errors.append(f"Insufficient stock for {product.name}. Available: {product.stock}, Requested: {quantity}")
-                                continue
-                            
-                            # Update the stock
-                            product.stock -= quantity
-                            product.save()
-                            
-                            updated_products.append({
-                                'id': product.id,
-                                'name': product.name,
-                                'previous_stock': product.stock + quantity,
-                                'new_stock': product.stock,
-                                'quantity_sold': quantity
-                            })
-                            
-                        except Product.DoesNotExist:
-                            errors.append(f"Product with ID {product_id} not found")
-                            continue
+                        updated_products.append({
+                            'id': line['product_id'],
+                            'name': line['product_name'],
+                            'previous_stock': line['original_stock'],
+                            'new_stock': line['new_stock'],
+                            'quantity_sold': line['quantity']
+                        })
                     
                     return Response({
                         'success': True,
@@ -604,6 +762,35 @@ def get_payment_status(request):
         }, status=500)
 
 
+@require_http_methods(["GET"])
+def export_products(request, export_format):
+    """
+    Stream the whole catalog as NDJSON or CSV (manager/export-products/ndjson|csv/)
+    Rows go out in id order as they are read, so memory stays flat at any catalog size
+    Optional ?category= filter and ?fields= / ?exclude= column selection
+    """
+    if export_format not in EXPORT_STREAMS:
+        return JsonResponse({'error': f"Unsupported export format '{export_format}' (use ndjson or csv)"}, status=404)
+    
+    try:
+        list_serializer = product_list_serializer.for_request(request)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+    
+    products = Product.objects.order_by('id')
+    category = request.GET.get('category')
+    if category:
+        products = products.filter(category=category)
+    
+    response = StreamingHttpResponse(
+        EXPORT_STREAMS[export_format](list_serializer, products),
+        content_type=EXPORT_CONTENT_TYPES[export_format]
+    )
+    filename = f"products-{time.strftime('%Y%m%d')}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @require_http_methods(["GET"])
 @csrf_exempt
 def download_stock_pdf(request):
@@ -1,23 +1,200 @@
 import os
-from twilio.rest import Client
+from datetime import timedelta
 from django.conf import settings
-from .models import Product, LowStockAlert, ManagerProfile
+from django.db import transaction
+from django.db.models import Exists, Min, OuterRef
+from django.utils import timezone
+from .models import Product, LowStockAlert, ManagerProfile, AlertOutbox
+from .messaging import TwilioTransport, get_transport, twilio_client, twilio_credentials
+from .refreshing_cache import RefreshingCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+ALERT_BATCH_SIZE = 500  # LowStockAlert rows per INSERT
+WHATSAPP_MAX_LENGTH = 1600  # Twilio's limit for a WhatsApp message body, in UTF-16 code units
+
+
+class AlertRecipientMissing(Exception):
+    """
+    WhatsApp alerts are on but no manager number is configured - nothing can be queued
+    """
+
+
+def digest_deadline(manager_phone):
+    """
+    When the manager's next digest goes out - joins the open window, or opens one ALERT_DIGEST_WINDOW_SECONDS long
+    """
+    open_window = AlertOutbox.objects.filter(
+        kind=AlertOutbox.LOW_STOCK_ALERT,
+        recipient=manager_phone,
+        status=AlertOutbox.PENDING,
+        attempts=0
+    ).aggregate(send_after=Min('available_at'))['send_after']
+    return open_window or timezone.now() + timedelta(seconds=settings.ALERT_DIGEST_WINDOW_SECONDS)
+
+
+def low_stock_candidates(threshold, product_ids=None):
+    """
+    Products at or below threshold with no unresolved alert at that threshold - one anti-join query
+    The NOT EXISTS probe is served by the partial inv_alert_open_idx index
+    product_ids limits the check to those products (write-time crossings) instead of the whole catalog
+    """
+    open_alerts = LowStockAlert.objects.filter(
+        product=OuterRef('pk'),
+        threshold_value=threshold,
+        is_resolved=False
+    )
+    products = Product.objects.filter(stock__lte=threshold)
+    if product_ids is not None:
+        products = products.filter(id__in=list(product_ids))
+    return products.exclude(Exists(open_alerts)).only('id', 'name', 'stock')
+
+
+def queue_low_stock_alerts(manager_phone, threshold, product_ids=None):
+    """
+    Record a LowStockAlert and queue a digest entry for every low product without an open alert
+    Call inside a transaction so alert rows and their outbox entries commit together; returns the count
+    """
+    candidates = list(low_stock_candidates(threshold, product_ids))
+    if not candidates:
+        return 0
+    
+    new_alerts = []
+    messages = []
+    send_after = digest_deadline(manager_phone)
+    for product in candidates:
+        new_alerts.append(LowStockAlert(
+            product=product,
+            threshold_value=threshold,
+            stock_at_alert=product.stock,
+            manager_phone=manager_phone,
+            is_resolved=False
+        ))
+        messages.append(AlertOutbox(
+            kind=AlertOutbox.LOW_STOCK_ALERT,
+            recipient=manager_phone,
+            payload={'product_name': product.name, 'stock': product.stock, 'threshold': threshold},
+            available_at=send_after
+        ))
+    
+    LowStockAlert.objects.bulk_create(new_alerts, batch_size=ALERT_BATCH_SIZE)
+    AlertOutbox.objects.bulk_create(messages, batch_size=ALERT_BATCH_SIZE)
+    return len(new_alerts)
+
+
+def format_low_stock_message(product_name, current_stock, threshold):
+    return f"""
+🚨 *LOW STOCK ALERT* 🚨
+
+Product: *{product_name}*
+Current Stock: *{current_stock}*
+Threshold: *{threshold}*
+
+⚠️ Please restock this item soon!
+
+- StoreZen Management System
+        """.strip()
+
+
+def message_length(body):
+    """
+    Length as Twilio counts it - UTF-16 code units, so most emoji count twice
+    """
+    return len(body.encode('utf-16-le')) // 2
+
+
+def _digest_body(lines):
+    return "\n".join([
+        f"🚨 *LOW STOCK ALERT* - {len(lines)} products 🚨",
+        "",
+        *lines,
+        "",
+        "⚠️ Please restock these items soon!",
+        "",
+        "- StoreZen Management System",
+    ])
+
+
+def format_low_stock_digest(alerts):
+    """
+    Message bodies for a batch of (product_name, current_stock, threshold) alerts
+    Packs as many alerts per message as fit in WHATSAPP_MAX_LENGTH; a lone alert keeps the single-alert format.
+    Returns [(body, number of alerts it carries)] in input order
+    """
+    if len(alerts) == 1:
+        return [(format_low_stock_message(*alerts[0]), 1)]
+
+    bodies = []
+    lines = []
+    for product_name, current_stock, threshold in alerts:
+        line = f"• *{product_name}* - stock *{current_stock}* (threshold {threshold})"
+        if lines and message_length(_digest_body(lines + [line])) > WHATSAPP_MAX_LENGTH:
+            bodies.append((_digest_body(lines), len(lines)))
+            lines = []
+        lines.append(line)
+    if lines:
+        bodies.append((_digest_body(lines), len(lines)))
+    return bodies
+
+
+def fetch_account_status():
+    """
+    Twilio account status and the last 5 messages - two API calls, made by account_status_cache only
+    """
+    client = twilio_client()
+    account = client.api.accounts(twilio_credentials()[0]).fetch()
+    recent_messages = [{
+        'sid': msg.sid,
+        'to': msg.to,
+        'from': msg.from_,
+        'status': msg.status,
+        'date_sent': str(msg.date_sent),
+        'error_code': msg.error_code,
+        'error_message': msg.error_message
+    } for msg in client.messages.list(limit=5)]
+    return {
+        'account_status': account.status,
+        'account_type': account.type,
+        'recent_messages': recent_messages,
+        'checked_at': timezone.now().isoformat(),
+    }
+
+
+# Dashboard reads come from here; Twilio is asked at most once per TWILIO_STATUS_CACHE_SECONDS, in the background
+account_status_cache = RefreshingCache(
+    fetch_account_status, 'twilio-account-status', 'TWILIO_STATUS_CACHE_SECONDS', 'TWILIO_STATUS_STALE_SECONDS'
+)
+
+
 class WhatsAppService:
-    def __init__(self):
-        # Twilio credentials - Add these to your environment variables
-        self.account_sid = os.getenv('TWILIO_ACCOUNT_SID', 'your_account_sid_here')
-        self.auth_token = os.getenv('TWILIO_AUTH_TOKEN', 'your_auth_token_here')
+    def __init__(self, transport=None):
+        self.account_sid, self.auth_token = twilio_credentials()
         self.whatsapp_from = os.getenv('TWILIO_WHATSAPP_FROM', 'whatsapp:+14155238886')  # Twilio Sandbox number
         
+        if transport is not None:
+            self.transport = transport
+            return
+        
+        # Twilio, the in-memory fake or the file/log sink, per settings.WHATSAPP_TRANSPORT
         try:
-            self.client = Client(self.account_sid, self.auth_token)
+            self.transport = get_transport()
         except Exception as e:
-            logger.error(f"Failed to initialize Twilio client: {e}")
-            self.client = None
+            logger.error(f"Failed to initialize WhatsApp transport: {e}")
+            self.transport = None
+    
+    def send_message(self, manager_phone, message_body):
+        """
+        Send one WhatsApp message - raises on failure so the outbox worker can retry it
+        """
+        if not self.transport:
+            raise RuntimeError("WhatsApp transport not initialized")
+        
+        # Format phone number for WhatsApp
+        if not manager_phone.startswith('whatsapp:'):
+            manager_phone = f'whatsapp:{manager_phone}'
+        
+        return self.transport.send(manager_phone, self.whatsapp_from, message_body)
     
     def send_low_stock_alert(self, manager_phone, product_name, current_stock, threshold):
         """
@@ -25,9 +202,9 @@ class WhatsAppService:
         """
         print(f"[WhatsApp] Attempting to send alert to {manager_phone} for {product_name}")
         
-        if not self.client:
-            print("[WhatsApp] ERROR: Twilio client not initialized")
-            logger.error("Twilio client not initialized")
+        if not self.transport:
+            print("[WhatsApp] ERROR: WhatsApp transport not initialized")
+            logger.error("WhatsApp transport not initialized")
             return False
         
         # Format phone number for WhatsApp
@@ -36,27 +213,13 @@ class WhatsAppService:
         
         print(f"[WhatsApp] Formatted phone number: {manager_phone}")
         
-        message_body = f"""
-🚨 *LOW STOCK ALERT* 🚨
-
-Product: *{product_name}*
-Current Stock: *{current_stock}*
-Threshold: *{threshold}*
-
-⚠️ Please restock this item soon!
-
-- StoreZen Management System
-        """.strip()
+        message_body = format_low_stock_message(product_name, current_stock, threshold)
         
         print(f"[WhatsApp] Message body prepared, length: {len(message_body)} chars")
-        print(f"[WhatsApp] Using credentials - SID: {self.account_sid[:10]}..., From: {self.whatsapp_from}")
+        print(f"[WhatsApp] Using {self.transport.name} transport - SID: {self.account_sid[:10]}..., From: {self.whatsapp_from}")
         
         try:
-            message = self.client.messages.create(
-                body=message_body,
-                from_=self.whatsapp_from,
-                to=manager_phone
-            )
+            message = self.send_message(manager_phone, message_body)
             
             print(f"[WhatsApp] SUCCESS: Message sent with SID: {message.sid}")
             print(f"[WhatsApp] Message status: {message.status}")
@@ -71,70 +234,44 @@ Threshold: *{threshold}*
     
     def check_and_send_alerts(self, manager_phone, threshold):
         """
-        Check all products for low stock and send alerts
+        Check all products for low stock and queue alerts
         Intelligent spam prevention: 
-        - Sends alert when stock first goes below threshold
+        - Alerts when stock first goes below threshold
         - After restocking above threshold, allows new alert when it goes below again
         - Prevents multiple alerts for same low stock episode
+        Alerts are normally raised and resolved at write time (stock_alerts.stock_levels_changed);
+        this full scan is the reconciliation pass for writes that skipped it (bulk QuerySet.update,
+        imports) - one resolve UPDATE, one anti-join for products needing an alert and batched
+        inserts, a fixed number of queries however large the catalog.
+        Alerts go to the alert outbox in the same transaction as their LowStockAlert rows
+        and the alert worker sends each manager's alerts as digests, so nothing here waits on Twilio.
+        Returns the number of alerts queued. Failures are raised (AlertRecipientMissing without a
+        number), so the worker retries the check instead of recording it as done.
         """
         if not manager_phone:
-            logger.warning("Manager phone number not provided")
-            return
+            raise AlertRecipientMissing("Manager phone number not provided")
         
         try:
-            # First, mark alerts as resolved for products that are now above threshold
-            resolved_count = LowStockAlert.objects.filter(
-                product__stock__gt=threshold,
-                is_resolved=False
-            ).update(is_resolved=True)
-            
-            if resolved_count > 0:
-                logger.info(f"Marked {resolved_count} alerts as resolved (stock replenished)")
-            
-            # Get all products below threshold
-            low_stock_products = Product.objects.filter(stock__lte=threshold)
-            
-            alerts_sent = 0
-            for product in low_stock_products:
-                # Check if there's an unresolved alert for this product at current threshold
-                existing_unresolved_alert = LowStockAlert.objects.filter(
-                    product=product,
-                    threshold_value=threshold,
+            # Products below threshold without an unresolved alert at this threshold:
+            # either first time below threshold, or restocked and now below again
+            with transaction.atomic():
+                # First, mark alerts as resolved for products that are now above threshold
+                resolved_count = LowStockAlert.objects.filter(
+                    product__stock__gt=threshold,
                     is_resolved=False
-                ).first()
+                ).update(is_resolved=True, resolved_at=timezone.now())
+                
+                if resolved_count > 0:
+                    logger.info(f"Marked {resolved_count} alerts as resolved (stock replenished)")
                 
-                # Only send alert if no unresolved alert exists
-                # This means: either first time below threshold, or was restocked and now below again
-                if not existing_unresolved_alert:
-                    # Send alert and create record
-                    success = self.send_low_stock_alert(
-                        manager_phone, 
-                        product.name, 
-                        product.stock, 
-                        threshold
-                    )
-                    
-                    if success:
-                        LowStockAlert.objects.create(
-                            product=product,
-                            threshold_value=threshold,
-                            stock_at_alert=product.stock,
-                            manager_phone=manager_phone,
-                            is_resolved=False
-                        )
-                        alerts_sent += 1
-                        logger.info(f"New alert sent for {product.name} (stock: {product.stock})")
-                    else:
-                        logger.warning(f"Failed to send alert for {product.name}")
-                else:
-                    logger.debug(f"Skipping {product.name} - alert already active (stock: {product.stock})")
+                queued = queue_low_stock_alerts(manager_phone, threshold)
             
-            logger.info(f"Sent {alerts_sent} new low stock alerts")
-            return alerts_sent
+            logger.info(f"Queued {queued} new low stock alerts")
+            return queued
             
         except Exception as e:
             logger.error(f"Error in check_and_send_alerts: {e}")
-            return 0
+            raise
 
     def get_alert_status_for_product(self, product_name):
         """
@@ -164,35 +301,15 @@ Threshold: *{threshold}*
 
     def check_account_status(self):
         """
-        Check Twilio account status and recent messages
+        Twilio account status and recent messages - from account_status_cache, not a live API call
         """
-        if not self.client:
-            return {"error": "Twilio client not initialized"}
+        if not isinstance(self.transport, TwilioTransport):
+            return {"error": f"Account status needs the Twilio transport (WHATSAPP_TRANSPORT is {settings.WHATSAPP_TRANSPORT!r})"}
         
-        try:
-            # Get account info
-            account = self.client.api.accounts.get(self.account_sid).fetch()
-            
-            # Get recent messages
-            messages = self.client.messages.list(limit=5)
-            
-            recent_messages = []
-            for msg in messages:
-                recent_messages.append({
-                    'sid': msg.sid,
-                    'to': msg.to,
-                    'from': msg.from_,
-                    'status': msg.status,
-                    'date_sent': str(msg.date_sent),
-                    'error_code': msg.error_code,
-                    'error_message': msg.error_message
-                })
-            
-            return {
-                'account_status': account.status,
-                'account_type': account.type,
-                'recent_messages': recent_messages
-            }
-            
-        except Exception as e:
-            return {"error": str(e)}
+        status = account_status_cache.get()
+        if status is None:
+            # The fetch error itself - timeout, open circuit or Twilio's message
+            error = account_status_cache.last_error or "no status fetched yet"
+            logger.error(f"Twilio account status unavailable: {error}")
+            return {"error": f"Twilio account status unavailable: {error}"}
+        return status
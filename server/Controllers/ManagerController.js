@@ -1,5 +1,16 @@
 const ManagerModel = require('../Models/Manager');
 const bcrypt = require('bcrypt');
+const axios = require('axios');
+
+const DJANGO_SERVER_URL = process.env.DJANGO_SERVER_URL || 'http://localhost:8000';
+
+
+// Tell the Django inventory server its cached copy of the manager profile is out of date.
+// Fire and forget - a failure only means Django picks up the change when its cache expires
+const notifyProfileChanged = () => {
+    axios.post(`${DJANGO_SERVER_URL}/api/manager/profile/invalidate/`, {}, { timeout: 2000 })
+        .catch(error => console.error('Error invalidating Django manager profile cache:', error.message));
+};
 
 
 // API endpoint - Get manager profile data from database
@@ -89,6 +100,7 @@ const updateManagerProfile = async (req, res) => {
         if (whatsappAlertsEnabled !== undefined) manager.whatsappAlertsEnabled = whatsappAlertsEnabled;
 
         await manager.save();
+        notifyProfileChanged();
 
         res.status(200).json({
             success: true,
@@ -134,6 +146,7 @@ const updateStoreSettings = async (req, res) => {
         if (storeTheme !== undefined) manager.storeSettings.storeTheme = storeTheme;
 
         await manager.save();
+        notifyProfileChanged();
 
         res.status(200).json({
             success: true,